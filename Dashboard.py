@@ -1,12 +1,42 @@
+import time
+SCRIPT_STARTED = time.perf_counter()
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import time
-from fpdf import FPDF
 import random
+import os
+import functools
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, timedelta
+from kily.data_engine import DEFAULT_SEED, DataScale
+from kily.data_sources import source_from_env
+from kily.cube import KPICube
+from kily.incremental import ROLLUP_FREQS, RollingDataset
+from kily.anomaly import agent_card, detect, feed, rationale, series_history
+from kily.efficiency import WEIGHTS as SCORE_WEIGHTS, cube_score, worst_slices
+from kily.timeline import RESOLUTION_NAMES, covering_cube, pick_resolution, rollup, trend
+from kily.dataset_store import DatasetStore
+from kily.refresh import RefreshScheduler
+from kily.shared_frames import attach, read_manifest
+from kily.dim_index import DimensionIndex
+from kily.figure_cache import FigureCache
+from kily.forecast import RISK_PROFILES, forecast
+from kily.optimizer import fit_response_curves, optimize
+from kily.paging import page_rows
+from kily.oos_stream import OOSDetector, dataset_events, event_keys
+from kily.audit_store import AuditStore, concat_columns, oos_alert_columns, synthetic_columns
+from kily.sku_prewarm import SkuPrewarmer, sku_artifacts
+from kily.price_watch import CATEGORY_DEFENDERS, COLLECTED_PLATFORMS, PriceCollector, PriceStore, StubMarket, StubServers, parse_endpoints, price_series, price_war_alerts
+from kily.pdf_brief import brief_inputs, brief_scope, create_pdf_summary
+from kily.profiler import Profiler, append_jsonl
+from kily.lazy import IMPORT_TIMES, lazy_import
+
+# Plotly is imported on the first chart drawn, not at startup.
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+IMPORT_MS = (time.perf_counter() - SCRIPT_STARTED) * 1e3
 
 # ==============================================================================
 # --- 1. PAGE CONFIGURATION & AESTHETICS (MODIFIED FOR KPI CARDS) ---
@@ -117,102 +147,332 @@ COMPETITOR_MAPPING = {
     "ITC Master Chef": {"name": "McCain", "sku": "Smiles"}
 }
 
+# Proactive Agent Feed card per finding kind, and (log colour, action label) for the AI Logbook.
+FEED_STYLES = {"OPPORTUNITY": st.info, "THREAT": st.error, "MARKET SHIFT": st.warning}
+LOG_STYLES = {"OPPORTUNITY": ("blue", "BUDGET SHIFT"), "THREAT": ("red", "RISK ALERT"), "MARKET SHIFT": ("yellow", "MARKET SHIFT")}
+
+# ==============================================================================
+# --- 3. DATA ENGINE (INCREMENTAL DAILY WINDOW) ---
 # ==============================================================================
-# --- 3. DATA GENERATION ENGINE (STABLE) ---
-# ==============================================================================
-@st.cache_data(ttl=3600)
-def generate_synthetic_data(is_kily_activated: bool):
-    brands_skus = { "Aashirvaad": ["Select Atta", "Multigrain Atta"], "Sunfeast": ["Dark Fantasy Choco Fills", "Mom's Magic Cashew"], "YiPPee!": ["Magic Masala Noodles", "Power Up Atta Noodles"], "Bingo!": ["Mad Angles", "Tedhe Medhe"], "B Natural": ["Mixed Fruit Juice", "Guava Juice"], "ITC Master Chef": ["Classic Aloo Tikki", "Chicken Nuggets"] }
-    platforms = ["Blinkit", "Zepto", "Swiggy Instamart", "Flipkart", "Amazon"]
-    cities = ["Mumbai", "Delhi", "Bangalore", "Hyderabad", "Kolkata"]
-    dayparts = ["Breakfast", "Lunch", "Snacks", "Dinner"]
-    config = { "old_way": {"roas_mean": 1.8, "roas_std": 0.8, "oos_prob": 0.10, "cvr_lift": 0.0, "content_score_range": (4, 7)}, "kily_way": {"roas_mean": 2.8, "roas_std": 0.4, "oos_prob": 0.005, "cvr_lift": 0.15, "content_score_range": (8, 11)} }
-    mode = "kily_way" if is_kily_activated else "old_way"
-    data = []
-    date_range = pd.to_datetime(pd.date_range(end=pd.Timestamp.now(), periods=30))
-    for date in date_range:
-        daily_volatility = np.random.uniform(0.85, 1.15)
-        for brand, skus in brands_skus.items():
-            for sku in skus:
-                for platform in platforms:
-                    for city in cities:
-                        for daypart in dayparts:
-                            base_roas = np.random.normal(config[mode]["roas_mean"], config[mode]["roas_std"])
-                            spend = np.random.uniform(500, 5000) * daily_volatility
-                            base_cvr = np.random.uniform(0.02, 0.10)
-                            effective_cvr = base_cvr * (1 + config[mode]["cvr_lift"])
-                            impressions = np.random.randint(2500, 40000)
-                            clicks = int(impressions * np.random.uniform(0.005, 0.05))
-                            conversions = int(clicks * effective_cvr)
-                            roas = max(0.5, base_roas + np.random.normal(0, 0.15))
-                            direct_sales = spend * roas
-                            is_oos = np.random.choice([True, False], p=[config[mode]["oos_prob"], 1 - config[mode]["oos_prob"]])
-                            content_score = np.random.randint(*config[mode]["content_score_range"])
-                            data.append([date, brand, sku, platform, city, daypart, spend, impressions, clicks, conversions, direct_sales, roas, is_oos, content_score])
-    columns = ["Date", "Brand", "SKU", "Platform", "City", "Daypart", "Spend", "Impressions", "Clicks", "Conversions", "Direct Sales", "ROAS", "Is OOS", "Content Score"]
-    return pd.DataFrame(data, columns=columns)
-
-# ==============================================================================
-# --- 4. PDF GENERATION UTILITY (STABLE) ---
-# ==============================================================================
-def create_pdf_summary(kpis_kily, kpis_old):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.set_font("Arial", 'B', 20)
-    pdf.set_text_color(40, 40, 40)
-    pdf.cell(0, 10, "Kily Agentic AI Engine: Performance Brief", 0, 1, 'C')
-    pdf.set_font("Arial", '', 10)
-    pdf.set_text_color(128, 128, 128)
-    pdf.cell(0, 8, f"Report for ITC Foods | Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')}", 0, 1, 'C')
-    pdf.ln(10)
-    pdf.set_font("Arial", 'B', 14)
-    pdf.set_text_color(0, 0, 0)
-    pdf.cell(0, 10, "1. Executive Summary", 0, 1, 'L')
-    pdf.set_font("Arial", '', 11)
-    uplift = (kpis_kily['roas'] / kpis_old['roas'] - 1) * 100 if kpis_old['roas'] > 0 else 0
-    revenue_gain = kpis_kily['sales'] - kpis_old['sales']
-    summary_text = f"Activation of the Kily Agentic AI Engine resulted in a transformative impact on performance marketing over the last 30 days. The engine delivered a {uplift:.1f}% improvement in blended ROAS, generating an additional Rs. {revenue_gain:,.0f} in incremental revenue. This was achieved through autonomous, real-time optimization across more than 40,000 campaign variables, validating the shift from manual oversight to an agentic framework."
-    pdf.multi_cell(0, 6, summary_text)
-    pdf.ln(5)
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(0, 10, "2. Top-Line Impact Analysis", 0, 1, 'L')
-    pdf.set_font("Arial", 'B', 10)
-    pdf.set_fill_color(220, 220, 220)
-    pdf.cell(80, 8, "Metric", 1, 0, 'C', 1)
-    pdf.cell(35, 8, "Baseline (Manual)", 1, 0, 'C', 1)
-    pdf.cell(35, 8, "Kily Engine (Active)", 1, 0, 'C', 1)
-    pdf.cell(35, 8, "Impact", 1, 1, 'C', 1)
-    pdf.set_font("Arial", '', 10)
-    pdf.cell(80, 8, "Total Direct Sales (Rs.)", 1, 0, 'L')
-    pdf.cell(35, 8, f"{kpis_old['sales']:,.0f}", 1, 0, 'R')
-    pdf.cell(35, 8, f"{kpis_kily['sales']:,.0f}", 1, 0, 'R')
-    pdf.set_font("Arial", 'B', 10); pdf.set_text_color(0, 128, 0)
-    pdf.cell(35, 8, f"+{revenue_gain:,.0f}", 1, 1, 'R'); pdf.set_text_color(0, 0, 0)
-    pdf.set_font("Arial", '', 10)
-    pdf.cell(80, 8, "Blended ROAS", 1, 0, 'L')
-    pdf.cell(35, 8, f"{kpis_old['roas']:.2f}x", 1, 0, 'R')
-    pdf.cell(35, 8, f"{kpis_kily['roas']:.2f}x", 1, 0, 'R')
-    pdf.set_font("Arial", 'B', 10); pdf.set_text_color(0, 128, 0)
-    pdf.cell(35, 8, f"+{uplift:.1f}%", 1, 1, 'R'); pdf.set_text_color(0, 0, 0)
-    conv_gain = kpis_kily['conv'] - kpis_old['conv']
-    pdf.set_font("Arial", '', 10)
-    pdf.cell(80, 8, "Total Conversions", 1, 0, 'L')
-    pdf.cell(35, 8, f"{kpis_old['conv']:,}", 1, 0, 'R')
-    pdf.cell(35, 8, f"{kpis_kily['conv']:,}", 1, 0, 'R')
-    pdf.set_font("Arial", 'B', 10); pdf.set_text_color(0, 128, 0)
-    pdf.cell(35, 8, f"+{conv_gain:,}", 1, 1, 'R'); pdf.set_text_color(0, 0, 0)
-    pdf.ln(5)
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(0, 10, "3. Key Impact Drivers & Conclusion", 0, 1, 'L')
-    pdf.set_font("Arial", '', 11)
-    drivers_text = """The Kily Engine's outperformance is not marginal; it's structural. The primary drivers include:\n\n  * Operational Efficiency: Eradication of wasted ad spend on Out-of-Stock SKUs.\n  * Predictive Allocation: Superior, algorithm-driven budget distribution over human heuristics.\n  * Bidding Superiority: Real-time, reinforcement learning-based bidding that minimizes acquisition cost."""
-    pdf.multi_cell(0, 6, drivers_text)
-    pdf.ln(2)
-    conclusion_text = "Conclusion: The data confirms that an agentic AI approach is a prerequisite for achieving market-leading profitability and scale in the hyper-competitive Quick Commerce landscape."
-    pdf.set_font("Arial", 'B', 11)
-    pdf.multi_cell(0, 6, conclusion_text)
-    return bytes(pdf.output(dest='S'))
+DATA_SEED = int(os.environ.get("KILY_DATA_SEED", DEFAULT_SEED))
+DATA_SCALE = DataScale.parse(os.environ.get("KILY_DATA_SCALE", ""))
+DATA_SOURCE = source_from_env(seed=DATA_SEED, scale=DATA_SCALE)
+SHARED_DATASET = os.environ.get("KILY_SHARED_DATASET", "")  # root published by `python -m kily.shared_frames serve`
+REFRESH_SECONDS = float(os.environ.get("KILY_REFRESH_SECONDS", 3600))
+
+@st.cache_resource
+def rolling_dataset(is_kily_activated: bool):
+    return RollingDataset(DATA_SOURCE, is_kily_activated, window_days=DATA_SCALE.days)
+
+@st.cache_resource
+def dataset_store():
+    return DatasetStore()
+
+def load_shared_dataset():
+    # Multi-process deployments: frames are zero-copy, read-only maps of the loader process's column files.
+    # A newly published version is attached on the next rerun; sessions leased on the old one keep reading it.
+    manifest = read_manifest(SHARED_DATASET)
+    if manifest is None:
+        st.error(f"No dataset has been published under `{SHARED_DATASET}` yet. Start the loader: `python -m kily.shared_frames serve --root {SHARED_DATASET}`")
+        st.stop()
+    label = f"shared v{manifest['version']} ({manifest['label']})"
+    current = dataset_store().current
+    def build():
+        # Cubes, rollups, indexes and findings the loader published are mapped too; anything missing is built per process.
+        shared = attach(SHARED_DATASET, manifest)
+        artifacts = {**{("cube", name): by_freq["D"] for name, by_freq in shared.cubes.items()}, **{("rollup", name, freq): cube for name, by_freq in shared.cubes.items() for freq, cube in by_freq.items() if freq != "D"}}
+        artifacts.update({("index", name): index for name, index in shared.indexes.items()})
+        artifacts.update({("anomalies", name): findings for name, findings in shared.anomalies.items()})
+        return shared.frames, artifacts, f"shared v{shared.version} ({shared.label})"
+    profiler.cache("dataset", hit=dataset_store().publish_if(lambda current: current.label != label, build) is current)
+    return dataset_store().lease_for(st.session_state)
+
+def publish_windows(windows, store, modes):
+    # Appends the days that arrived since the last build and publishes them as a new read-only version
+    # (only if a window changed). Runs on the refresh thread, so no Streamlit calls in here.
+    for name in sorted(modes):
+        windows[name].refresh()
+    windows = {name: window for name, window in windows.items() if window.end is not None}
+    label = " ".join(f"{name}@{window.version}" for name, window in windows.items())
+    build = lambda: ({name: window.frame() for name, window in windows.items()}, {**{("cube", name): window.cube() for name, window in windows.items()}, **{("rollup", name, freq): window.cube(freq) for name, window in windows.items() for freq in ROLLUP_FREQS}}, label)
+    return store.publish_if(lambda current: current.label != label, build)
+
+@st.cache_resource
+def dataset_refresher():
+    # Stale after REFRESH_SECONDS or once a window no longer ends today; reruns keep the current version meanwhile.
+    windows = {"kily": rolling_dataset(True), "old": rolling_dataset(False)}
+    day_rolled = lambda dataset: any(window.end is not None and window.end != pd.Timestamp.now().normalize() for window in windows.values())
+    return RefreshScheduler(functools.partial(publish_windows, windows, dataset_store()), max_age=REFRESH_SECONDS, is_stale=day_rolled)
+
+def load_dataset(modes):
+    # Serves the current version and leases this session onto it; every session shares the same frames without copies.
+    # Only a mode's first load waits for a build; later refreshes happen on the background thread.
+    if SHARED_DATASET:
+        return load_shared_dataset()
+    if not modes and dataset_refresher().value is None:
+        return None
+    builds = dataset_refresher().builds
+    with profiler.section("refresh_windows"):
+        dataset_refresher().get(modes)
+    profiler.cache("dataset", hit=dataset_refresher().builds == builds)
+    return dataset_store().lease_for(st.session_state)
+
+def mode_key(is_kily_activated: bool):
+    return "kily" if is_kily_activated else "old"
+
+def load_artifact(dataset, key, builder):
+    profiler.cache(key[0], hit=key in dataset)
+    with profiler.section(f"load_{key[0]}"):
+        return dataset.artifact(key, builder)
+
+def load_kpi_cube(dataset, is_kily_activated: bool):
+    return load_artifact(dataset, ("cube", mode_key(is_kily_activated)), lambda: KPICube.from_frame(dataset.frame(mode_key(is_kily_activated))))
+
+def load_kpi_cubes(dataset, is_kily_activated: bool):
+    # Day cube plus week/month rollups; the rolling windows maintain the rollups per partition, shared datasets map the loader's.
+    cube = load_kpi_cube(dataset, is_kily_activated)
+    return {"D": cube, **{freq: load_artifact(dataset, ("rollup", mode_key(is_kily_activated), freq), functools.partial(rollup, cube, freq)) for freq in ROLLUP_FREQS}}
+
+def load_dimension_index(dataset, is_kily_activated: bool):
+    return load_artifact(dataset, ("index", mode_key(is_kily_activated)), lambda: DimensionIndex(dataset.frame(mode_key(is_kily_activated))))
+
+def load_anomalies(dataset, is_kily_activated: bool):
+    # Every daily series is scanned once per dataset version; reruns and sessions share the findings.
+    return load_artifact(dataset, ("anomalies", mode_key(is_kily_activated)), lambda: detect(load_kpi_cube(dataset, is_kily_activated)))
+
+def load_oos_detector(dataset, is_kily_activated: bool):
+    # The window is replayed through the streaming detector once per dataset version.
+    def build():
+        frame = dataset.frame(mode_key(is_kily_activated))
+        labels = event_keys(frame)[1]
+        return OOSDetector(len(labels), labels).consume(dataset_events(frame))
+    return load_artifact(dataset, ("oos_stream", mode_key(is_kily_activated)), build)
+
+# Datasets ("display" = the mode the toggle selects) and displayed-mode artifacts each page reads,
+# and whether the page is scoped by the sidebar date range.
+# A page's needs are loaded when it is visited; nothing else is built for it.
+PAGE_DATA = {
+    "Agentic Orchestrator": {"modes": ("kily", "old"), "artifacts": ("cube", "anomalies"), "date_range": True},
+    "Insights & Action Center": {"modes": ("display", "kily"), "artifacts": ("index", "oos_stream", "anomalies"), "date_range": False},
+    "Strategic Campaign Planner": {"modes": ("display",), "artifacts": ("index", "cube"), "date_range": False},
+    "Competitive Intelligence": {"modes": (), "artifacts": (), "date_range": False},
+    "SKU Deep-Dive": {"modes": ("display",), "artifacts": ("index", "cube"), "date_range": True},
+}
+
+def page_modes(page, is_kily_activated: bool):
+    return list(dict.fromkeys(mode_key(is_kily_activated) if mode == "display" else mode for mode in PAGE_DATA[page]["modes"]))
+
+def load_page_artifacts(page, dataset, is_kily_activated: bool):
+    loaders = {"cube": load_kpi_cube, "index": load_dimension_index, "oos_stream": load_oos_detector, "anomalies": load_anomalies}
+    return {name: loaders[name](dataset, is_kily_activated) for name in PAGE_DATA[page]["artifacts"]}
+
+def select_date_range(dates):
+    # Spans the whole history held in the window and defaults to its last 30 days; a half-picked range runs to the last day.
+    first, last = dates[0].date(), dates[-1].date()
+    picked = st.sidebar.date_input("Date Range", value=(max(first, last - timedelta(days=29)), last), min_value=first, max_value=last, key="date_range")
+    return (picked[0], picked[1]) if len(picked) == 2 else (picked[0], last)
+
+# ==============================================================================
+# --- 3b. CHART CACHE ---
+# ==============================================================================
+MAX_CHART_POINTS = int(os.environ.get("KILY_MAX_CHART_POINTS", 500))
+
+@st.cache_resource
+def figure_cache():
+    return FigureCache(max_bytes=int(os.environ.get("KILY_FIGURE_CACHE_MB", 64)) * 2 ** 20)
+
+def cached_figure(chart, state, build):
+    # Figures are rebuilt only when the dataset version or the chart's filter state changes.
+    key = (dataset.version, chart) + tuple(state)
+    profiler.cache("figure", hit=key in figure_cache())
+    return figure_cache().get_or_build(key, build)
+
+def show_figure(chart, state, build):
+    with profiler.section(f"chart:{chart}"):
+        st.plotly_chart(cached_figure(chart, state, build), use_container_width=True)
+
+# ==============================================================================
+# --- 3c. PROFILING (OPT-IN) ---
+# ==============================================================================
+PROFILE_ALWAYS = os.environ.get("KILY_PROFILE", "").lower() in ("1", "true", "yes", "on")
+PROFILE_LOG = os.environ.get("KILY_PROFILE_LOG", "kily_profile.jsonl")
+PROFILE_LOG_BYTES = int(os.environ.get("KILY_PROFILE_LOG_MB", 16)) * 2 ** 20
+profiler = Profiler(PROFILE_ALWAYS or st.session_state.get("profile_reruns", False), PROFILE_LOG, PROFILE_LOG_BYTES)
+
+# ==============================================================================
+# --- 3d. CAMPAIGN FORECAST (MONTE CARLO) ---
+# ==============================================================================
+@st.cache_data(max_entries=512)
+def simulate_forecast(dataset_version, is_kily_activated, budget, risk, brand, platforms, cities, horizon):
+    # Memoized per parameter set (and dataset version), so dragging the sliders back and forth replays cached bands.
+    with profiler.section("monte_carlo_forecast"):
+        return forecast(load_kpi_cube(dataset, is_kily_activated), budget, risk, brand, platforms, cities, horizon)
+
+def forecast_caption(result):
+    return f"P10–P90: ₹{result.revenue[0]:,.0f} – ₹{result.revenue[2]:,.0f} ({result.roas[0]:.2f}x – {result.roas[2]:.2f}x) · {result.draws:,} scenarios over {result.slices} platform × city slices in {result.elapsed_ms:.1f} ms"
+
+# ==============================================================================
+# --- 3e. BUDGET OPTIMIZER (PROCESS POOL, ANYTIME) ---
+# ==============================================================================
+OPTIMIZER_WORKERS = int(os.environ.get("KILY_OPTIMIZER_WORKERS", min(4, os.cpu_count() or 1)))
+OPTIMIZER_SECONDS = float(os.environ.get("KILY_OPTIMIZER_SECONDS", 1.5))
+
+@st.cache_resource(on_release=lambda pool: pool.shutdown(wait=False, cancel_futures=True))
+def optimizer_pool():
+    # Workers are started by a fork server (spawn where there is none), never forked from the multithreaded server
+    # process, where a lock held by another thread at fork time could deadlock them.
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=OPTIMIZER_WORKERS, mp_context=multiprocessing.get_context(start_method))
+
+def architect_plan(params, progress=None):
+    # Response curves come from the active mode's history; the search returns its best plan when the time budget runs out.
+    with profiler.section("budget_optimizer"):
+        curves = fit_response_curves(load_kpi_cube(dataset, is_kily_activated), params['brand'], params['platforms'], params['geo_focus'])
+        return optimize(curves, params['budget'], params['start_date'], params['end_date'], pool=optimizer_pool(), workers=OPTIMIZER_WORKERS, time_budget=OPTIMIZER_SECONDS, progress=progress)
+
+# ==============================================================================
+# --- 3f. SERVER-SIDE TABLES ---
+# ==============================================================================
+def paged_table(key, frame, rows, columns, sort_by, descending=False, search_columns=('Brand', 'SKU', 'Platform', 'City')):
+    # Search, sort and paging run on the server; only the visible page is sent to the browser.
+    c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+    search = c1.text_input("Search", key=f"{key}_search", placeholder="Brand, SKU, platform or city")
+    sort_by = c2.selectbox("Sort by", columns, index=columns.index(sort_by), key=f"{key}_sort")
+    descending = c3.selectbox("Order", ["Descending", "Ascending"], index=0 if descending else 1, key=f"{key}_order") == "Descending"
+    page_size = c4.selectbox("Rows per page", [25, 50, 100, 250], index=1, key=f"{key}_size")
+    with profiler.section(f"table:{key}"):
+        result = page_rows(frame, rows, columns, sort_by, descending, st.session_state.get(f"{key}_page", 1) - 1, page_size, search, search_columns)
+    st.session_state[f"{key}_page"] = result.page + 1
+    st.dataframe(result.frame, use_container_width=True, hide_index=True)
+    n1, n2 = st.columns([1, 3])
+    n1.number_input("Page", min_value=1, max_value=result.pages, step=1, key=f"{key}_page")
+    n2.caption(f"Rows {result.first_row:,}–{result.last_row:,} of {result.matched:,} · page {result.page + 1} of {result.pages}")
+
+# ==============================================================================
+# --- 3g. AUDIT EVENT STORE ---
+# ==============================================================================
+AUDIT_DIR = os.environ.get("KILY_AUDIT_DIR", "kily_audit")
+AUDIT_SEED_EVENTS = int(os.environ.get("KILY_AUDIT_SEED_EVENTS", 200_000))
+
+@st.cache_resource
+def audit_store():
+    # An empty store is seeded once, by whichever process opens it first: the Kily window's OOS pause/resume actions plus synthetic agent activity.
+    store = AuditStore(AUDIT_DIR)
+    def seed_columns():
+        # Pages such as the Planner may not have the Kily window loaded yet (Kily switched off): load it before seeding.
+        seed = dataset if "kily" in dataset.frame_names else load_dataset(list(dataset.frame_names) + ["kily"])
+        frame = seed.frame("kily")
+        start, end = frame['Date'].min(), frame['Date'].max() + pd.Timedelta(days=1)
+        return concat_columns(oos_alert_columns(load_oos_detector(seed, True).alert_frame()), synthetic_columns(AUDIT_SEED_EVENTS, start, end, seed=DATA_SEED))
+    store.seed(seed_columns)
+    return store
+
+# ==============================================================================
+# --- 3h. COMPETITOR PRICE COLLECTOR (ASYNC, BACKGROUND) ---
+# ==============================================================================
+PRICE_ENDPOINTS = parse_endpoints(os.environ.get("KILY_PRICE_ENDPOINTS", ""))
+PRICE_POLL_SECONDS = float(os.environ.get("KILY_PRICE_POLL_SECONDS", 2))
+PRICE_CONCURRENCY = int(os.environ.get("KILY_PRICE_CONCURRENCY", 8))
+PRICE_HISTORY_ROUNDS = int(os.environ.get("KILY_PRICE_HISTORY", 2048))
+PRICE_STUB_SPEED = float(os.environ.get("KILY_PRICE_STUB_SPEED", 360))
+
+@st.cache_resource(on_release=lambda collector: collector.stop())
+def price_collector():
+    # One collector per server process, polling in its own thread; pages only ever read its store.
+    # Without KILY_PRICE_ENDPOINTS it polls local stub servers that simulate the three platforms; the collector owns them,
+    # so clearing the resource cache stops both threads.
+    store = PriceStore(price_series(), capacity=PRICE_HISTORY_ROUNDS)
+    stubs = None if PRICE_ENDPOINTS else StubServers(StubMarket(store.series, seed=DATA_SEED, speed=PRICE_STUB_SPEED))
+    endpoints = PRICE_ENDPOINTS or stubs.start()
+    collector = PriceCollector(endpoints, store, interval=PRICE_POLL_SECONDS, concurrency=PRICE_CONCURRENCY, servers=stubs).start()
+    collector.wait_for_round(timeout=2.0)  # cold start only: let the first round land before the first read
+    return collector
+
+@st.cache_data(max_entries=8)
+def price_war_frame(rounds, _history):
+    # Keyed by the store's round count, so the scan runs once per collection round for all sessions.
+    with profiler.section("price_war_detector"):
+        return price_war_alerts(_history)
+
+def counter_action(alert):
+    if alert['Depth (%)'] >= 15:
+        return f"`KILY ACTION:` A targeted {int(alert['Depth (%)'] * 2 / 3 / 5) * 5}% off counter-promotion on '{CATEGORY_DEFENDERS[alert['Category']]}' has been **autonomously deployed** on {alert['Platform']} in {alert['City']}."
+    return f"`KILY ACTION:` Kily advises against matching. Instead, it has **reallocated ₹{int(alert['Depth (%)'] / 10 * 10) * 5000:,}** to outbid them on high-intent keywords."
+
+# ==============================================================================
+# --- 3i. SKU DEEP-DIVE PREWARM (THREAD POOL) ---
+# ==============================================================================
+SKU_PREWARM_WORKERS = int(os.environ.get("KILY_SKU_PREWARM_WORKERS", 2))
+SKU_CACHE_ENTRIES = int(os.environ.get("KILY_SKU_CACHE_ENTRIES", 256))
+
+@st.cache_resource(on_release=lambda prewarmer: prewarmer.shutdown(wait=False))
+def sku_prewarmer():
+    return SkuPrewarmer(max_entries=SKU_CACHE_ENTRIES, workers=SKU_PREWARM_WORKERS)
+
+def prewarm_sku_artifacts(dataset):
+    # Once per dataset version, whichever page loaded it: a worker builds the loaded modes' indexes and cubes, then
+    # queues every SKU (the displayed mode first). dataset.artifact directly: no profiler calls off the script thread.
+    if sku_prewarmer().version == dataset.version:
+        return
+    modes = [mode_key(is_kily) for is_kily in (is_kily_activated, not is_kily_activated) if mode_key(is_kily) in dataset.frame_names]
+    def plan():
+        jobs = {}
+        for mode in modes:
+            frame = dataset.frame(mode)
+            index = dataset.artifact(("index", mode), lambda: DimensionIndex(frame))
+            cube = dataset.artifact(("cube", mode), lambda: KPICube.from_frame(frame))
+            for sku in index.values('SKU'):
+                jobs[(mode, sku)] = functools.partial(sku_artifacts, frame, index, cube, sku, COMPETITOR_MAPPING)
+        return jobs
+    sku_prewarmer().prewarm(dataset.version, plan)
+
+def load_sku_artifacts(sku):
+    key = (dataset.version, mode_key(is_kily_activated), sku)
+    profiler.cache("sku_artifacts", hit=key in sku_prewarmer())
+    with profiler.section("load_sku_artifacts"):
+        return sku_prewarmer().get(key, lambda: sku_artifacts(df_display, display_index, load_kpi_cube(dataset, is_kily_activated), sku, COMPETITOR_MAPPING))
+
+# ==============================================================================
+# --- 3j. STARTUP TIMING ---
+# ==============================================================================
+STARTUP_LOG = os.environ.get("KILY_STARTUP_LOG", "kily_startup.jsonl")
+
+@st.cache_resource
+def startup_clock():
+    # Created by the first run of the script in this server process, so it times the cold start after a deploy or restart.
+    return {"started": SCRIPT_STARTED, "import_ms": IMPORT_MS}
+
+def report_startup(page):
+    # The first run to finish records time to first render, plus the lazy imports it triggered, once per process.
+    clock = startup_clock()
+    if "report" in clock:
+        return clock["report"]
+    report = {"kind": "startup", "pid": os.getpid(), "ts": pd.Timestamp.now().isoformat(), "page": page, "import_ms": round(clock["import_ms"], 2), "lazy_imports_ms": {name: round(ms, 2) for name, ms in IMPORT_TIMES.items()}, "data_modes": list(dataset.frame_names) if dataset else [], "first_render_ms": round((time.perf_counter() - clock["started"]) * 1e3, 2)}
+    if clock.setdefault("report", report) is report:
+        append_jsonl(STARTUP_LOG, report, PROFILE_LOG_BYTES)
+    return clock["report"]
+
+# ==============================================================================
+# --- 3k. KILY EFFICIENCY SCORE ---
+# ==============================================================================
+SCORE_WORST_SLICES = int(os.environ.get("KILY_SCORE_WORST_N", 10))
+
+def efficiency_scores(cube_kily, cube_old, cube_display):
+    # Scored from the filtered, range-pruned cubes, so the card and the drill-down follow every Orchestrator filter.
+    with profiler.section("efficiency_score"):
+        return cube_score(cube_kily), cube_score(cube_old), worst_slices(cube_display, SCORE_WORST_SLICES)
+
+# ==============================================================================
+# --- 4. PDF GENERATION UTILITY (ON DEMAND) ---
+# ==============================================================================
+@st.cache_data(max_entries=256)
+def render_performance_brief(kpis_kily, kpis_old, scope):
+    # Rendered on click, after the rerun that offered it has finished, so it logs a profile of its own.
+    brief_profiler = Profiler(profiler.enabled, PROFILE_LOG, PROFILE_LOG_BYTES)
+    with brief_profiler.section("create_pdf_summary"):
+        pdf = create_pdf_summary(kpis_kily, kpis_old, scope)
+    brief_profiler.finish(page="Performance Brief", scope=scope)
+    return pdf
 
 # ==============================================================================
 # --- 5. THE APP LOGIC STARTS HERE ---
@@ -221,54 +481,52 @@ st.sidebar.title("Kily Agentic AI Engine")
 st.sidebar.header("ITC Foods")
 st.sidebar.markdown("---")
 is_kily_activated = st.sidebar.toggle("**Activate Kily AI Engine**", value=True, help="Toggle to see the direct impact of the Kily Engine vs. the manual baseline.")
-df_kily = generate_synthetic_data(is_kily_activated=True)
-df_old = generate_synthetic_data(is_kily_activated=False)
-df_display = df_kily if is_kily_activated else df_old
-page = st.sidebar.radio("Navigation", ("Agentic Orchestrator", "Insights & Action Center", "Strategic Campaign Planner", "Competitive Intelligence", "SKU Deep-Dive"))
+page = st.sidebar.radio("Navigation", tuple(PAGE_DATA), index=list(PAGE_DATA).index(st.query_params["page"]) if st.query_params.get("page") in PAGE_DATA else 0)  # ?page=<name> deep-links (and cold-starts) a single page
+dataset = load_dataset(page_modes(page, is_kily_activated))
+if dataset is not None:
+    prewarm_sku_artifacts(dataset)  # queued to the workers on every page, so the SKU Deep-Dive's first visit finds them built
+df_display = dataset.frame(mode_key(is_kily_activated)) if "display" in PAGE_DATA[page]["modes"] else None
+display_index = load_page_artifacts(page, dataset, is_kily_activated).get("index")
+date_start, date_end = select_date_range(load_kpi_cube(dataset, is_kily_activated).labels["Date"]) if PAGE_DATA[page]["date_range"] else (None, None)
+st.sidebar.toggle("Profile reruns", key="profile_reruns", value=PROFILE_ALWAYS, disabled=PROFILE_ALWAYS, help="Time each section of the page, track allocations and loader cache hits, and log every rerun to a JSON-lines file.")
 st.sidebar.markdown("---")
+profiler.lap("setup")
 st.sidebar.info("This is a functional POC for ITC's 'Interrobang' competition. All data is synthetically generated.")
 
 if page == "Agentic Orchestrator":
     st.title("📈 Agentic Orchestrator")
     st.markdown("### The Ultimate KPI: One Score to Rule Them All")
     score_col1, score_col2 = st.columns(2)
-    with score_col1:
-        if is_kily_activated:
-            score = 92
-            delta_score = score - 55
-            st.metric("Kily Efficiency Score", f"{score}/100", f"{delta_score} vs Baseline")
-        else:
-            score = 55
-            st.metric("Kily Efficiency Score", f"{score}/100", "Activate Kily for Uplift", delta_color="off")
     with score_col2:
         st.write("""This score is a composite metric reflecting the overall health and efficiency of your marketing operations. It synthesizes **ROAS**, **OOS prevention**, **Content Quality**, and **CPA** into a single, undeniable number.""")
     st.markdown("---")
-    st.markdown("#### Detailed Performance Indicators (Last 30 Days)")
+    period = f"{date_start:%d %b %Y} – {date_end:%d %b %Y}"
+    st.markdown(f"#### Detailed Performance Indicators ({period})")
+    # Only the cells inside the range are read: whole months and weeks from the rollups, days at the edges.
+    cubes_kily, cubes_old = load_kpi_cubes(dataset, True), load_kpi_cubes(dataset, False)
+    cube_kily, cube_old = covering_cube(cubes_kily, date_start, date_end), covering_cube(cubes_old, date_start, date_end)
+    cube_display = cube_kily if is_kily_activated else cube_old
     fcol1, fcol2, fcol3 = st.columns(3)
     with fcol1:
-        city_filter = st.selectbox("Filter by City", ["All Cities"] + list(df_display['City'].unique()))
+        city_filter = st.selectbox("Filter by City", ["All Cities"] + list(cube_display.labels['City']))
     with fcol2:
-        platform_filter = st.selectbox("Filter by Platform", ["All Platforms"] + list(df_display['Platform'].unique()))
+        platform_filter = st.selectbox("Filter by Platform", ["All Platforms"] + list(cube_display.labels['Platform']))
     with fcol3:
-        brand_filter = st.selectbox("Filter by Brand", ["All Brands"] + list(df_display['Brand'].unique()))
-    df_filtered = df_display.copy()
-    df_kily_filtered = df_kily.copy()
-    df_old_filtered = df_old.copy()
-    if city_filter != "All Cities":
-        df_kily_filtered = df_kily[df_kily['City'] == city_filter]
-        df_old_filtered = df_old[df_old['City'] == city_filter]
-    if platform_filter != "All Platforms":
-        df_kily_filtered = df_kily_filtered[df_kily_filtered['Platform'] == platform_filter]
-        df_old_filtered = df_old_filtered[df_old_filtered['Platform'] == platform_filter]
-    if brand_filter != "All Brands":
-        df_kily_filtered = df_kily_filtered[df_kily_filtered['Brand'] == brand_filter]
-        df_old_filtered = df_old_filtered[df_old_filtered['Brand'] == brand_filter]
-    sales_kily, spend_kily, conv_kily = df_kily_filtered['Direct Sales'].sum(), df_kily_filtered['Spend'].sum(), df_kily_filtered['Conversions'].sum()
-    roas_kily = sales_kily / spend_kily if spend_kily > 0 else 0
-    cpa_kily = spend_kily / conv_kily if conv_kily > 0 else 0
-    sales_old, spend_old, conv_old = df_old_filtered['Direct Sales'].sum(), df_old_filtered['Spend'].sum(), df_old_filtered['Conversions'].sum()
-    roas_old = sales_old / spend_old if spend_old > 0 else 0
-    cpa_old = spend_old / conv_old if conv_old > 0 else 0
+        brand_filter = st.selectbox("Filter by Brand", ["All Brands"] + list(cube_display.brands))
+    filter_state = (city_filter, platform_filter, brand_filter, date_start, date_end)
+    cube_kily_filtered = cube_kily.slice(City=city_filter, Platform=platform_filter, Brand=brand_filter)
+    cube_old_filtered = cube_old.slice(City=city_filter, Platform=platform_filter, Brand=brand_filter)
+    cube_filtered = cube_kily_filtered if is_kily_activated else cube_old_filtered
+    kpis_kily, kpis_old = cube_kily_filtered.kpis(), cube_old_filtered.kpis()
+    sales_kily, spend_kily, conv_kily, roas_kily, cpa_kily = kpis_kily['sales'], kpis_kily['spend'], kpis_kily['conv'], kpis_kily['roas'], kpis_kily['cpa']
+    sales_old, spend_old, conv_old, roas_old, cpa_old = kpis_old['sales'], kpis_old['spend'], kpis_old['conv'], kpis_old['roas'], kpis_old['cpa']
+    profiler.lap("orchestrator.filters")
+    score_kily, score_old, worst_scored = efficiency_scores(cube_kily_filtered, cube_old_filtered, cube_filtered)
+    with score_col1:
+        if is_kily_activated:
+            st.metric("Kily Efficiency Score", f"{score_kily:.0f}/100", f"{score_kily - score_old:.0f} vs Baseline")
+        else:
+            st.metric("Kily Efficiency Score", f"{score_old:.0f}/100", "Activate Kily for Uplift", delta_color="off")
     kpi1, kpi2, kpi3, kpi4, kpi5 = st.columns(5)
     if is_kily_activated:
         kpi1.metric("Total Direct Sales", f"₹{sales_kily:,.0f}", f"₹{(sales_kily - sales_old):,.0f} vs Baseline")
@@ -283,70 +541,99 @@ if page == "Agentic Orchestrator":
         kpi4.metric("Cost Per Acquisition", f"₹{cpa_old:,.2f}")
         kpi5.metric("Total Spend", f"₹{spend_old:,.0f}")
     st.write("")
-    pdf_data = create_pdf_summary({"sales": sales_kily, "roas": roas_kily, "conv": conv_kily}, {"sales": sales_old, "roas": roas_old, "conv": conv_old})
-    st.download_button("📄 Download Performance Brief (PDF)", data=pdf_data, file_name="ITC_Kily_Performance_Brief.pdf", use_container_width=True)
+    pdf_data = functools.partial(render_performance_brief, brief_inputs(kpis_kily), brief_inputs(kpis_old), brief_scope(brand_filter, city_filter, platform_filter, period))
+    st.download_button("📄 Download Performance Brief (PDF)", data=pdf_data, file_name="ITC_Kily_Performance_Brief.pdf", mime="application/pdf", use_container_width=True)
+    with st.expander(f"🔻 {len(worst_scored)} Lowest-Scoring Slices ({period})"):
+        st.dataframe(worst_scored.round(1), use_container_width=True, hide_index=True)
+        st.caption("Score weights: " + ", ".join(f"{name} {weight:.0%}" for name, weight in SCORE_WEIGHTS.items()) + ". Each slice is scored from its own sums over the selected range.")
+    profiler.lap("orchestrator.kpi_cards")
     st.markdown("---")
-    kily_time_perf = df_kily_filtered.groupby(df_kily_filtered['Date'].dt.date)['Direct Sales'].sum().rename('Kily Performance')
-    old_time_perf = df_old_filtered.groupby(df_old_filtered['Date'].dt.date)['Direct Sales'].sum().rename('Baseline Performance')
-    time_perf_df = pd.concat([kily_time_perf, old_time_perf], axis=1).reset_index()
     sales_uplift_percentage = ((sales_kily / sales_old) - 1) * 100 if sales_old > 0 else 100
-    time_title_new = f"Daily Sales: Kily Driving a +{sales_uplift_percentage:.1f}% Uplift" if is_kily_activated else "Daily Sales: Baseline vs. Kily Potential"
-    fig_time_new = go.Figure()
-    fig_time_new.add_trace(go.Scatter(x=time_perf_df['Date'], y=time_perf_df['Baseline Performance'], mode='lines', name='Baseline', line=dict(color='#FF4B4B', dash='dash')))
-    fig_time_new.add_trace(go.Scatter(x=time_perf_df['Date'], y=time_perf_df['Kily Performance'], mode='lines', name='Kily Performance', line=dict(color='#00A86B', width=3), fill='tonexty', fillcolor='rgba(0, 168, 107, 0.3)'))
-    fig_time_new.update_layout(title=time_title_new, template="plotly_dark", height=450, legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01))
-    st.plotly_chart(fig_time_new, use_container_width=True)
+    resolution = RESOLUTION_NAMES[pick_resolution(date_start, date_end, MAX_CHART_POINTS)]
+    time_title_new = f"{resolution} Sales: Kily Driving a +{sales_uplift_percentage:.1f}% Uplift" if is_kily_activated else f"{resolution} Sales: Baseline vs. Kily Potential"
+    def build_daily_sales_figure():
+        kily_time_perf = trend(cubes_kily, date_start, date_end, ['Direct Sales'], MAX_CHART_POINTS, City=city_filter, Platform=platform_filter, Brand=brand_filter)[0].reset_index()
+        old_time_perf = trend(cubes_old, date_start, date_end, ['Direct Sales'], MAX_CHART_POINTS, City=city_filter, Platform=platform_filter, Brand=brand_filter)[0].reset_index()
+        fig_time_new = go.Figure()
+        fig_time_new.add_trace(go.Scatter(x=old_time_perf['Date'], y=old_time_perf['Direct Sales'], mode='lines', name='Baseline', line=dict(color='#FF4B4B', dash='dash')))
+        fig_time_new.add_trace(go.Scatter(x=kily_time_perf['Date'], y=kily_time_perf['Direct Sales'], mode='lines', name='Kily Performance', line=dict(color='#00A86B', width=3), fill='tonexty', fillcolor='rgba(0, 168, 107, 0.3)'))
+        return fig_time_new.update_layout(title=time_title_new, template="plotly_dark", height=450, legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01))
+    show_figure("daily_sales", (is_kily_activated,) + filter_state, build_daily_sales_figure)
     st.markdown("---")
     st.subheader("⚡ Proactive Agent Feed: Threats & Opportunities")
-    intel_col1, intel_col2 = st.columns(2)
-    with intel_col1:
-        st.info("`[OPPORTUNITY]` Social sentiment for 'late-night snacks' is up 30% in Bangalore. Suggesting a 5% budget shift to Sunfeast Dark Fantasy ads between 10 PM - 1 AM.")
-        st.warning("`[MARKET SHIFT]` Weather forecast predicts a heatwave in Delhi next week. Predictive model shows a 60% increase in demand for 'B Natural' juices. Pre-emptively increasing bid aggression.")
-    with intel_col2:
-        st.error("`[THREAT]` Competitor 'Britannia' has launched a new ad campaign on YouTube targeting 'healthy biscuits'. Our model predicts a 10% overlap with our 'Farmlite' audience. Recommending a counter-campaign.")
-        st.info("`[OPPORTUNITY]` High search volume detected for 'party packs' related to 'Bingo!'. Recommending launch of new ad group targeting these keywords.")
+    findings = load_anomalies(dataset, is_kily_activated)
+    last_day = load_kpi_cube(dataset, is_kily_activated).labels['Date'].max()
+    st.caption(f"{len(findings):,} anomalies ranked across every SKU × Platform × City × Daypart series of ROAS, spend, conversions and OOS rate" + (f" for {last_day:%d %b %Y}." if pd.notna(last_day) else "."))
+    intel_cols = st.columns(2)
+    for i, (_, finding) in enumerate(feed(findings).iterrows()):
+        with intel_cols[i % 2]:
+            FEED_STYLES[finding['Kind']](agent_card(finding))
+    if findings.empty:
+        st.info("No anomalies in the latest day of data.")
     st.markdown("---")
     gcol1, gcol2 = st.columns(2)
     with gcol1:
-        st.plotly_chart(px.bar(df_filtered.groupby('Platform').agg({'Direct Sales': 'sum', 'ROAS': 'mean'}).reset_index().sort_values('Direct Sales', ascending=False), x='Platform', y='Direct Sales', color='ROAS', color_continuous_scale='greens', title="Platform Performance").update_layout(template="plotly_dark", height=400), use_container_width=True)
-        st.plotly_chart(px.treemap(df_filtered.groupby('City').agg({'Direct Sales': 'sum', 'ROAS': 'mean', 'Spend': 'sum'}).reset_index(), path=[px.Constant("All India"), 'City'], values='Direct Sales', color='ROAS', hover_data={'Spend': ':,.0f'}, color_continuous_scale='RdYlGn', title="Geographical Performance").update_layout(template="plotly_dark", height=400), use_container_width=True)
+        show_figure("platform_bar", (is_kily_activated,) + filter_state, lambda: px.bar(cube_filtered.by('Platform', ['Direct Sales', 'ROAS']).reset_index().sort_values('Direct Sales', ascending=False), x='Platform', y='Direct Sales', color='ROAS', color_continuous_scale='greens', title="Platform Performance").update_layout(template="plotly_dark", height=400))
+        show_figure("city_treemap", (is_kily_activated,) + filter_state, lambda: px.treemap(cube_filtered.by('City', ['Direct Sales', 'ROAS', 'Spend']).reset_index(), path=[px.Constant("All India"), 'City'], values='Direct Sales', color='ROAS', hover_data={'Spend': ':,.0f'}, color_continuous_scale='RdYlGn', title="Geographical Performance").update_layout(template="plotly_dark", height=400))
     with gcol2:
-        st.plotly_chart(px.pie(df_filtered.groupby('Brand')['Direct Sales'].sum().reset_index(), names='Brand', values='Direct Sales', title="Brand Contribution", hole=0.4).update_layout(template="plotly_dark", height=400), use_container_width=True)
-        heatmap_df = df_filtered[df_filtered['Brand'].isin(['Aashirvaad', 'Bingo!', 'Sunfeast', 'YiPPee!'])]
-        if not heatmap_df.empty:
-            pivot_data = heatmap_df.pivot_table(index='Daypart', columns='Brand', values='ROAS', aggfunc='mean').fillna(0)
+        show_figure("brand_pie", (is_kily_activated,) + filter_state, lambda: px.pie(cube_filtered.by('Brand', ['Direct Sales']).reset_index(), names='Brand', values='Direct Sales', title="Brand Contribution", hole=0.4).update_layout(template="plotly_dark", height=400))
+        heatmap_cube = cube_filtered.slice(Brand=['Aashirvaad', 'Bingo!', 'Sunfeast', 'YiPPee!'])
+        if heatmap_cube.total('ROAS Count') > 0:
+            with profiler.section("roas_pivot"):
+                pivot_data = heatmap_cube.pivot('Daypart', 'Brand', 'ROAS').fillna(0)
             if not pivot_data.empty:
                 pivot_data = pivot_data.reindex(['Breakfast', 'Dinner', 'Lunch', 'Snacks']).dropna(how='all')
-                st.plotly_chart(px.imshow(pivot_data, text_auto=".2f", aspect="auto", color_continuous_scale='RdYlGn', title="ROAS Heatmap: Brand vs. Daypart").update_layout(template="plotly_dark", height=400), use_container_width=True)
+                show_figure("roas_heatmap", (is_kily_activated,) + filter_state, lambda: px.imshow(pivot_data, text_auto=".2f", aspect="auto", color_continuous_scale='RdYlGn', title="ROAS Heatmap: Brand vs. Daypart").update_layout(template="plotly_dark", height=400))
 
 elif page == "Insights & Action Center":
     st.title("💡 Insights & Action Center")
     st.markdown("The AI's logbook: real-time alerts and strategic recommendations.")
     tab1, tab2, tab3, tab4 = st.tabs(["🚨 OOS Alerts", "📝 Content Audit", "🧠 AI Logbook", "📄 Raw Audit Trail"])
     with tab1:
-        oos_df = df_display[df_display['Is OOS'] == True]
-        if is_kily_activated: st.success(f"Kily Engine is active. Only {len(oos_df)} OOS instances detected. Ad spend automatically paused.")
-        else: st.error(f"Kily Engine is INACTIVE. {len(oos_df)} OOS instances detected, wasting ad spend.")
-        st.dataframe(oos_df[['Brand', 'SKU', 'Platform', 'City', 'Spend']].sort_values('Spend', ascending=False), use_container_width=True, hide_index=True)
+        oos_detector = load_oos_detector(dataset, is_kily_activated)
+        wasted_spend = float(oos_detector.wasted.sum())
+        if is_kily_activated: st.success(f"Kily Engine is active. Only {oos_detector.pauses:,} OOS episodes detected. Ad spend automatically paused, protecting ₹{wasted_spend:,.0f}.")
+        else: st.error(f"Kily Engine is INACTIVE. {oos_detector.pauses:,} OOS episodes detected, wasting ₹{wasted_spend:,.0f} of ad spend.")
+        spend_label = "Spend Protected" if is_kily_activated else "Spend Wasted"
+        o1, o2, o3, o4 = st.columns(4)
+        o1.metric("Pause Alerts", f"{oos_detector.pauses:,}")
+        o2.metric("Resume Alerts", f"{oos_detector.resumes:,}")
+        o3.metric(f"{spend_label} (24h)", f"₹{oos_detector.window_wasted(86400):,.0f}")
+        o4.metric(f"{spend_label} (7d)", f"₹{oos_detector.window_wasted(7 * 86400):,.0f}")
+        open_episodes = oos_detector.open_episodes()
+        if not open_episodes.empty:
+            st.markdown(f"##### Currently Out of Stock ({len(open_episodes)})")
+            st.dataframe(open_episodes.sort_values('Wasted Spend', ascending=False), use_container_width=True, hide_index=True)
+        st.markdown("##### Alert Stream")
+        alert_log = oos_detector.alert_frame()
+        paged_table("oos", alert_log, np.arange(len(alert_log)), ['Time', 'Alert', 'SKU', 'Platform', 'City', 'Spend'], 'Time', descending=True, search_columns=('Alert', 'SKU', 'Platform', 'City'))
     with tab2:
-        content_df = df_display[df_display['Content Score'] < 8]
+        content_rows = display_index.positions(**{'Content Score': [score for score in display_index.labels['Content Score'] if score < 8]})
         if is_kily_activated:
             st.success("Kily Engine has optimized content across most SKUs.")
-            if not content_df.empty: st.dataframe(content_df[['Brand', 'SKU', 'Platform', 'City', 'Content Score']], use_container_width=True, hide_index=True)
+            if len(content_rows): paged_table("content", df_display, content_rows, ['Brand', 'SKU', 'Platform', 'City', 'Content Score'], 'Content Score')
             else: st.write("No SKUs with poor content scores found.")
         else:
-            st.warning(f"Found {len(content_df)} SKUs with poor content scores, hurting conversion rates.")
-            st.dataframe(content_df[['Brand', 'SKU', 'Platform', 'City', 'Content Score']].sort_values('Content Score'), use_container_width=True, hide_index=True)
+            st.warning(f"Found {len(content_rows):,} SKUs with poor content scores, hurting conversion rates.")
+            paged_table("content", df_display, content_rows, ['Brand', 'SKU', 'Platform', 'City', 'Content Score'], 'Content Score')
+    profiler.lap("insights.tables")
     with tab3:
         if is_kily_activated:
             st.markdown("##### Agentic AI's Live Log (Illustrative)")
+            log_cube = load_kpi_cube(dataset, True)
+            for _, finding in feed(load_anomalies(dataset, True), {"OPPORTUNITY": 1, "MARKET SHIFT": 1}).iterrows():
+                with st.container():
+                    st.markdown(f"""<div class="log-container-{LOG_STYLES[finding['Kind']][0]}"><b>{log_cube.labels['Date'][-1]:%d %b}:</b> {LOG_STYLES[finding['Kind']][1]} - {agent_card(finding, with_kind=False)}</div>""", unsafe_allow_html=True)
+                    with st.expander("Show Rationale"):
+                        st.write(rationale(finding))
+                        st.line_chart(series_history(log_cube, finding), height=150)
             with st.container():
-                st.markdown("""<div class="log-container-blue"><b>11:39 AM:</b> BUDGET SHIFT - High ROAS (3.8x) detected for 'Aashirvaad Atta' in Hyderabad. Agent reallocated +10% of daily budget.</div>""", unsafe_allow_html=True)
-                with st.expander("Show Rationale"):
-                    st.write("Correlation analysis detected a 45% increase in searches for 'healthy meals' in Hyderabad, which has a 0.87 predictive coefficient with 'Aashirvaad Atta' sales. The agent acted to capture this emergent demand.")
-                    st.line_chart(pd.DataFrame(np.random.randn(20, 2), columns=['"healthy meals" search volume', '"Aashirvaad Atta" sales']), height=150)
-            with st.container():
-                st.markdown("""<div class="log-container-red"><b>02:00 PM:</b> OOS ALERT - 'Bingo! Tedhe Medhe' 50g OOS in Bangalore (Blinkit). Agent paused 3 associated campaigns. Prevented ~₹15,000 in wasted spend.</div>""", unsafe_allow_html=True)
+                resumes = load_oos_detector(dataset, True).alert_frame().query("Alert == 'RESUME'")
+                if not resumes.empty:
+                    worst = resumes.loc[resumes['Spend'].idxmax()]
+                    st.markdown(f"""<div class="log-container-red"><b>{worst['Time']:%I:%M %p}:</b> OOS ALERT - '{worst['SKU']}' OOS in {worst['City']} ({worst['Platform']}). Agent paused associated campaigns until stock returned. Prevented ~₹{worst['Spend']:,.0f} in wasted spend.</div>""", unsafe_allow_html=True)
+                else:
+                    st.markdown("""<div class="log-container-red"><b>OOS MONITOR:</b> No out-of-stock episodes in the current window.</div>""", unsafe_allow_html=True)
                 with st.expander("Show Rationale"):
                     st.write("Real-time inventory API reported 0 stock for the specified SKU. Pausing campaigns prevents budget waste on unfulfillable conversions, protecting ROAS.")
             with st.container():
@@ -363,43 +650,31 @@ elif page == "Insights & Action Center":
     # --- NEW: HARDENED AUDIT TRAIL ---
     with tab4:
         st.subheader("Raw Event Log: Full Audit Trail")
-        st.write("This provides a clear, immutable record of a single agentic action, from event trigger to execution, ensuring full transparency and accountability for critical operations.")
-        log_data = {
-            "Timestamp": ["2025-08-16 15:42:31"],
-            "SKU_ID": ["SunDarkF-101"],
-            "Event": ["OOS detected (Blinkit)"],
-            "Action": ["Paused Campaign ID=BK-334"],
-            "Actor": ["BudgetAgent v1.3"],
-            "Evidence": ["API Response: Inventory=0"],
-            "Impact Forecast": ["Loss prevention ~₹42,000/hr"],
-            "Override Status": ["None"]
-        }
-        log_df = pd.DataFrame(log_data)
-        st.dataframe(log_df, use_container_width=True, hide_index=True)
-        st.code("""
-# Sample Raw Event Data (JSON)
-{
-    "eventId": "e9c2b8e3-ff4d-4d7a-8b17-f2a1b9e0f3d5",
-    "timestamp": "2025-08-16T15:42:31.054Z",
-    "source": "BlinkitInventoryAPI",
-    "actor": "BudgetAgent/v1.3",
-    "trigger": {
-        "type": "inventory.level.zero",
-        "sku": "SunDarkF-101",
-        "city": "Bangalore"
-    },
-    "action": {
-        "type": "campaign.pause",
-        "targetId": "BK-334",
-        "reason": "OOS_DETECTED"
-    },
-    "metadata": {
-        "forecastedLossPerHour": 42000,
-        "humanOverride": false,
-        "confidenceScore": 0.998
-    }
-}
-        """, language="json")
+        st.write("This provides a clear, immutable record of every agentic action, from event trigger to execution, ensuring full transparency and accountability for critical operations.")
+        store = audit_store()
+        a1, a2, a3, a4 = st.columns(4)
+        window_days = (df_display['Date'].min().date(), df_display['Date'].max().date())
+        audit_dates = a1.date_input("Date Range", window_days, key="audit_dates")
+        audit_sku = a2.selectbox("SKU", ["All SKUs"] + store.values("sku"), key="audit_sku")
+        audit_actor = a3.selectbox("Actor", ["All Actors"] + store.values("actor"), key="audit_actor")
+        audit_action = a4.selectbox("Action", ["All Actions"] + store.values("action"), key="audit_action")
+        audit_start = pd.Timestamp(audit_dates[0]) if len(audit_dates) else None
+        audit_end = pd.Timestamp(audit_dates[-1]) + pd.Timedelta(days=1) - pd.Timedelta(milliseconds=1) if len(audit_dates) else None
+        p1, p2 = st.columns([1, 3])
+        audit_page_size = p2.selectbox("Events per page", [25, 50, 100, 250], index=1, key="audit_size")
+        query_audit = lambda page_no: store.query(audit_start, audit_end, offset=(page_no - 1) * audit_page_size, limit=audit_page_size, sku=None if audit_sku == "All SKUs" else audit_sku, actor=None if audit_actor == "All Actors" else audit_actor, action=None if audit_action == "All Actions" else audit_action)
+        with profiler.section("audit_query"):
+            audit_page = query_audit(st.session_state.get("audit_page", 1))
+            audit_pages = max(-(-audit_page.total // audit_page_size), 1)
+            if st.session_state.get("audit_page", 1) > audit_pages:  # filters narrowed past the current page
+                audit_page = query_audit(audit_pages)
+        st.session_state.audit_page = min(st.session_state.get("audit_page", 1), audit_pages)
+        p1.number_input("Page", min_value=1, max_value=audit_pages, step=1, key="audit_page")
+        st.dataframe(audit_page.frame, use_container_width=True, hide_index=True)
+        st.caption(f"{audit_page.total:,} matching events of {len(store):,} stored across {len(store.segments)} segments · query {audit_page.elapsed_ms:.1f} ms")
+        if len(audit_page.records):
+            st.markdown("###### Raw Event Data (JSON) of the newest matching event")
+            st.code(json.dumps(store.to_event(audit_page.records[0]), indent=4), language="json")
 
 elif page == "Strategic Campaign Planner":
     st.title("🚀 Strategic Campaign Planner")
@@ -408,7 +683,6 @@ elif page == "Strategic Campaign Planner":
     objective_text = st.text_area("Example: 'I need to increase market share for Bingo! in Delhi by 5% before Diwali.'", height=100)
     if st.button("Synthesize Strategy from Objective", use_container_width=True):
         with st.spinner("Parsing natural language objective... Cross-referencing market data... Formulating preliminary parameters..."):
-            time.sleep(2)
             if 'bingo' in objective_text.lower(): st.session_state.brand_select = "Bingo!"
             if 'delhi' in objective_text.lower(): st.session_state.geo_select = ["Delhi"]
             if 'market share' in objective_text.lower(): st.session_state.objective_select = "Dominate a Category"
@@ -420,14 +694,22 @@ elif page == "Strategic Campaign Planner":
     with sim_col1:
         sim_budget = st.slider("Campaign Budget (₹)", min_value=500000, max_value=10000000, value=st.session_state.get('budget_select', 2500000), step=100000)
     with sim_col2:
-        sim_risk = st.select_slider("Risk vs. Reward Tolerance", options=["Conservative", "Balanced", "Aggressive"], value="Balanced")
-    risk_multiplier = {"Conservative": 0.9, "Balanced": 1.0, "Aggressive": 1.15}
-    sim_roas = (2.85 + np.random.uniform(-0.15, 0.15)) * risk_multiplier[sim_risk]
-    sim_revenue = sim_budget * sim_roas
+        sim_risk = st.select_slider("Risk vs. Reward Tolerance", options=list(RISK_PROFILES), value="Balanced")
+    scope_col1, scope_col2, scope_col3 = st.columns(3)
+    with scope_col1:
+        sim_brands = list(display_index.values('Brand'))
+        sim_brand = st.selectbox("Simulate Brand", sim_brands, index=sim_brands.index(st.session_state.get('brand_select', sim_brands[0])))
+    with scope_col2:
+        sim_platforms = st.multiselect("Simulate Platforms", display_index.values('Platform'), placeholder="All Platforms")
+    with scope_col3:
+        sim_cities = st.multiselect("Simulate Cities", display_index.values('City'), default=st.session_state.get('geo_select', []), placeholder="All Cities")
+    sim_forecast = simulate_forecast(dataset.version, is_kily_activated, sim_budget, sim_risk, sim_brand, tuple(sim_platforms), tuple(sim_cities), DATA_SCALE.days)
+    sim_roas, sim_revenue = sim_forecast.roas[1], sim_forecast.revenue[1]
     st.markdown("##### Live Performance Forecast")
     f_col1, f_col2 = st.columns(2)
-    f_col1.metric("Projected Revenue", f"₹{sim_revenue:,.0f}")
-    f_col2.metric("Projected ROAS", f"{sim_roas:.2f}x")
+    f_col1.metric("Projected Revenue (P50)", f"₹{sim_revenue:,.0f}")
+    f_col2.metric("Projected ROAS (P50)", f"{sim_roas:.2f}x")
+    st.caption(forecast_caption(sim_forecast))
     st.markdown("---")
     if 'plan_architected' not in st.session_state: st.session_state.plan_architected = False
     if 'plan_deployed' not in st.session_state: st.session_state.plan_deployed = False
@@ -448,36 +730,40 @@ elif page == "Strategic Campaign Planner":
             end_date = st.date_input("Campaign End Date", date.today() + timedelta(days=30))
         with col3:
             geo_focus = st.multiselect("Geographical Focus", df_display['City'].unique(), default=st.session_state.get('geo_select', ["Mumbai", "Delhi"]))
-            sku = st.selectbox("Select Target SKU", df_display[df_display['Brand'] == brand]['SKU'].unique())
+            sku = st.selectbox("Select Target SKU", display_index.values('SKU', Brand=brand))
         submitted = st.form_submit_button("⚡ ARCHITECT STRATEGY", use_container_width=True)
-        if submitted:
-            with st.spinner("Analyzing historical data... Running multi-objective genetic algorithm... Simulating market response..."):
-                time.sleep(2.5)
+        if submitted and end_date < start_date:
+            st.error("Campaign End Date must be on or after the Start Date.")
+        elif submitted:
+            params = {"objective": objective, "brand": brand, "budget": budget, "geo_focus": geo_focus, "platforms": platforms, "sku": sku, "start_date": start_date, "end_date": end_date}
+            search_bar = st.progress(0.0, text="Fitting response curves on historical data...")
+            st.session_state.plan = architect_plan(params, lambda generation, best, elapsed: search_bar.progress(min(elapsed / OPTIMIZER_SECONDS, 1.0), text=f"Optimizing allocation: generation {generation}, best expected revenue ₹{best:,.0f}"))
             st.session_state.plan_architected = True
             st.session_state.plan_deployed = False
-            st.session_state.params = {"objective": objective, "brand": brand, "budget": budget, "geo_focus": geo_focus, "platforms": platforms, "sku": sku, "start_date": start_date, "end_date": end_date}
+            st.session_state.params = params
             st.rerun()
     if st.session_state.plan_architected and not st.session_state.plan_deployed:
         st.subheader("4. AI-Generated Strategic Brief & Deployment Plan")
         st.info(f"Mission Architecture Complete & Ready for Deployment for '{st.session_state.params['sku']}'.")
         plan_col1, plan_col2 = st.columns([2, 3])
         with plan_col1:
+            plan = st.session_state.plan
             st.markdown("##### AI-Recommended Platform Allocation")
-            df_split = pd.DataFrame({'Platform': st.session_state.params['platforms'], 'Allocation': np.random.dirichlet(np.ones(len(st.session_state.params['platforms']))) * 100})
+            df_split = (plan.by('Platform') / plan.cell_spend.sum() * 100).rename('Allocation').reset_index()
             st.plotly_chart(px.pie(df_split, names='Platform', values='Allocation', hole=0.5).update_layout(height=300, template="plotly_dark", margin=dict(l=20, r=20, t=30, b=20), legend_title_text=''), use_container_width=True)
+            st.caption(f"Expected revenue ₹{plan.revenue:,.0f} vs ₹{plan.baseline_revenue:,.0f} for a historical-share, even-paced split · {plan.evaluations:,} candidates over {len(plan.cells)} platform × city × daypart cells in {plan.generations} generations, {plan.elapsed_s:.2f} s ({plan.stopped})")
             st.markdown("##### Recommended Spend Pacing")
-            days = (st.session_state.params['end_date'] - st.session_state.params['start_date']).days
-            if days > 0:
-                pacing_dates = pd.to_datetime(pd.date_range(start=st.session_state.params['start_date'], end=st.session_state.params['end_date']))
-                pacing_spend = (np.exp(-np.linspace(-2, 2, len(pacing_dates))**2) / np.exp(-np.linspace(-2, 2, len(pacing_dates))**2).sum()) * st.session_state.params['budget']
-                st.plotly_chart(px.area(pd.DataFrame({'Date': pacing_dates, 'Daily Spend': pacing_spend}), x='Date', y='Daily Spend').update_layout(height=300, template="plotly_dark", margin=dict(l=20, r=20, t=30, b=20), yaxis_title=None, xaxis_title=None), use_container_width=True)
+            if len(plan.dates) > 1:
+                st.plotly_chart(px.area(pd.DataFrame({'Date': plan.dates, 'Daily Spend': plan.daily_spend}), x='Date', y='Daily Spend').update_layout(height=300, template="plotly_dark", margin=dict(l=20, r=20, t=30, b=20), yaxis_title=None, xaxis_title=None), use_container_width=True)
         with plan_col2:
             st.markdown("##### Kily's Agentic Rationale & Actions")
             with st.expander("Final Performance Forecast", expanded=True):
-                projected_roas = sim_roas
-                projected_revenue = st.session_state.params['budget'] * projected_roas
-                st.metric("Projected Revenue", f"₹{projected_revenue:,.0f}")
-                st.metric("Projected ROAS", f"{projected_roas:.2f}x")
+                params = st.session_state.params
+                horizon = max((params['end_date'] - params['start_date']).days + 1, 1)
+                plan_forecast = simulate_forecast(dataset.version, is_kily_activated, params['budget'], sim_risk, params['brand'], tuple(params['platforms']), tuple(params['geo_focus']), horizon)
+                st.metric("Projected Revenue (P50)", f"₹{plan_forecast.revenue[1]:,.0f}")
+                st.metric("Projected ROAS (P50)", f"{plan_forecast.roas[1]:.2f}x")
+                st.caption(forecast_caption(plan_forecast))
             with st.expander("Kily's 3-Phase Action Plan", expanded=True):
                 st.markdown("###### Phase 1: Awareness & Reach (Days 1-7)\n- **Focus:** Maximize impressions and clicks on high-reach platforms.")
                 st.markdown("###### Phase 2: High-Intent Conversion (Days 8-21)\n- **Focus:** Drive conversions and improve ROAS.")
@@ -490,6 +776,8 @@ elif page == "Strategic Campaign Planner":
         _, d_col1, d_col2, _ = st.columns([1, 2, 2, 1])
         if d_col1.button("✅ DEPLOY AUTONOMOUSLY", use_container_width=True):
             with st.spinner("Instantiating sub-agents... Propagating parameters to RL Bidding Engine... Verifying live deployment..."): time.sleep(2.5)
+            params = st.session_state.params
+            audit_store().append([{"timestamp": pd.Timestamp.now(tz="UTC"), "source": "KilyPlanner", "actor": "AgentOrchestrator v3.0", "trigger": {"type": "plan.approved", "sku": params['sku'], "city": ", ".join(params['geo_focus']) or "All Cities"}, "action": {"type": "campaign.deploy", "targetId": f"KC-{random.randint(100, 999)}", "reason": params['objective'].upper().replace(" ", "_")}, "metadata": {"forecastedLossPerHour": 0, "humanOverride": False, "confidenceScore": 1.0}}])
             st.session_state.plan_deployed = True
             st.rerun()
         if d_col2.button("✍️ MODIFY PARAMETERS", use_container_width=True, type="secondary"):
@@ -528,42 +816,65 @@ elif page == "Competitive Intelligence":
         st.plotly_chart(px.bar(df_sov.sort_values('SoV', ascending=False), x="Brand", y="SoV", color="Brand", color_discrete_map={"Sunfeast (Kily ON)": "#00A86B", "Sunfeast (Kily OFF)": "#FF4B4B"}, text='SoV').update_layout(template="plotly_dark", yaxis_title="Share of Voice (%)", xaxis_title="").update_traces(texttemplate='%{text}%', textposition='outside'), use_container_width=True)
     st.markdown("---")
     st.subheader("Live Competitor Product & Pricing Analysis")
-    ci_col1, ci_col2 = st.columns([2, 3])
-    with ci_col1:
-        st.markdown("##### Prices For Cream Biscuits")
-        st.dataframe(pd.DataFrame([{'Competitor': c, **{p: f"₹{np.random.uniform(25, 45):.1f}" for p in ["Blinkit", "Zepto", "Instamart"]}} for c in ['Competitor A', 'Competitor B', 'Competitor C']]), use_container_width=True, hide_index=True)
-        st.markdown("##### Prices For Instant Noodles")
-        st.dataframe(pd.DataFrame([{'Competitor': c, **{p: f"₹{np.random.uniform(10, 15):.1f}" for p in ["Blinkit", "Zepto", "Instamart"]}} for c in ['Competitor A', 'Competitor B', 'Competitor C']]), use_container_width=True, hide_index=True)
-    with ci_col2:
-        st.markdown("##### Product Traffic (Last 24h)")
-        st.bar_chart(pd.DataFrame({"Blinkit": np.random.randint(2000, 10000, 5), "Zepto": np.random.randint(2000, 10000, 5), "Instamart": np.random.randint(2000, 10000, 5)}, index=['Biscuits', 'Noodles', 'Chips', 'Juice', 'Atta']), height=250)
-        st.markdown("##### Average Discount by Brand")
-        st.bar_chart(pd.DataFrame({"Avg Discount (%)": np.random.uniform(2, 18, 7)}, index=['Aashirvaad', 'Sunfeast', 'Bingo!', 'YiPPee!', 'Competitor A', 'Competitor B', 'Competitor C']), height=250)
+    collector = price_collector()
+    history = collector.store.history()
+    profiler.lap("competitive.price_store")
+    if len(history.ts) == 0:
+        st.info("Waiting for the first price collection round.")
+    else:
+        latest = history.latest()
+        ci_col1, ci_col2 = st.columns([2, 3])
+        with ci_col1:
+            sel_col1, sel_col2 = st.columns(2)
+            price_category = sel_col1.selectbox("Category", list(dict.fromkeys(latest['Category'])), key="ci_category")
+            price_city = sel_col2.selectbox("City", list(dict.fromkeys(latest['City'])), key="ci_city")
+            st.markdown(f"##### Prices For {price_category} in {price_city}")
+            prices = latest[(latest['Category'] == price_category) & (latest['City'] == price_city)].pivot(index=['Brand', 'SKU'], columns='Platform', values='Price').reindex(columns=list(COLLECTED_PLATFORMS)).rename_axis(columns=None)
+            st.dataframe(prices.map(lambda v: f"₹{v:.1f}" if pd.notna(v) else "—").reset_index(), use_container_width=True, hide_index=True)
+            st.caption(f"As of {pd.Timestamp(history.ts[-1], unit='s'):%d %b %H:%M} · {len(history.ts):,} collection rounds stored · last round {collector.stats.last_round_ms:.0f} ms · {collector.stats.requests:,} requests, {collector.stats.retries:,} retried, {collector.stats.failures:,} failed")
+        with ci_col2:
+            st.markdown("##### Product Traffic (Last 24h)")
+            traffic = latest[['Category', 'Platform']].assign(Views=history.traffic_since(86400)).pivot_table(index='Category', columns='Platform', values='Views', aggfunc='sum', sort=False, observed=True)
+            st.bar_chart(traffic.round(), height=250)
+            st.markdown("##### Average Discount by Brand")
+            st.bar_chart(latest.groupby('Brand', sort=False)['Discount (%)'].mean().rename("Avg Discount (%)"), height=250)
     st.markdown("---")
-    st.subheader("Price War Monitor (Real-Time Simulated Alerts)")
-    st.warning("`ALERT:` Britannia running a 2-hour 15% off promotion on 'Bourbon' on Zepto in **Mumbai**.")
-    st.info("`KILY ACTION:` A targeted 10% off counter-promotion on 'Dark Fantasy' has been **autonomously deployed**.")
-    st.warning("`ALERT:` Cadbury running a 'Buy 2 Get 1 Free' on 'Oreo' on Blinkit in **Delhi**.")
-    st.info("`KILY ACTION:` Kily advises against matching. Instead, it has **reallocated ₹50,000** to outbid them on high-intent keywords.")
+    st.subheader("Price War Monitor")
+    price_wars = price_war_frame(history.rounds, history)
+    live_wars = price_wars[price_wars['Active']]
+    if live_wars.empty:
+        st.success("No competitor is running a promotion of 10% or more right now.")
+    for _, alert in live_wars.head(2).iterrows():
+        st.warning(f"`ALERT:` {alert['Brand']} running a {alert['Depth (%)']:.0f}% off promotion on '{alert['SKU']}' on {alert['Platform']} in **{alert['City']}** since {alert['Start']:%H:%M}.")
+        st.info(counter_action(alert))
+    st.caption(f"{len(live_wars):,} live and {len(price_wars) - len(live_wars):,} ended price wars across {len(history.series):,} competitor × platform × category × city series")
+    if not price_wars.empty:
+        st.dataframe(price_wars.head(100), use_container_width=True, hide_index=True, column_config={"Regular Price": st.column_config.NumberColumn(format="₹%.1f"), "Promo Price": st.column_config.NumberColumn(format="₹%.1f"), "Depth (%)": st.column_config.NumberColumn(format="%.1f%%")})
 
 elif page == "SKU Deep-Dive":
     st.title("🔬 SKU Deep-Dive & Digital Shelf Audit")
     st.markdown("Analyze individual product performance and make the problem of poor content **painfully visible.**")
     dcol1, dcol2 = st.columns(2)
     with dcol1:
-        brand_select = st.selectbox("Select a Brand to Analyze", df_display['Brand'].unique())
+        brand_select = st.selectbox("Select a Brand to Analyze", display_index.values('Brand'))
     with dcol2:
-        sku_select = st.selectbox("Select a Specific SKU", df_display[df_display['Brand'] == brand_select]['SKU'].unique())
+        sku_select = st.selectbox("Select a Specific SKU", display_index.values('SKU', Brand=brand_select))
     st.markdown("---")
     if sku_select:
-        sku_df = df_display[df_display['SKU'] == sku_select]
+        sku_art = load_sku_artifacts(sku_select)
+        profiler.lap("sku.artifacts")
+        prewarm_ready, prewarm_queued = sku_prewarmer().progress()
+        prewarm_stats = sku_prewarmer().stats()
+        if prewarm_ready < prewarm_queued:
+            st.progress(prewarm_ready / prewarm_queued, text=f"Prewarming SKU artifacts in the background: {prewarm_ready}/{prewarm_queued}")
+        st.caption(f"SKU artifacts: {prewarm_ready}/{prewarm_queued} prewarmed for the loaded modes · cache hit rate {prewarm_stats['hit_rate']:.0%} ({prewarm_stats['hits']:,} hits, {prewarm_stats['waits']:,} awaited, {prewarm_stats['misses']:,} built on click)")
         st.subheader("The Tale of Two Shelves: Your SKU vs. The Enemy")
-        competitor = COMPETITOR_MAPPING.get(brand_select, {"name": "Competitor", "sku": "Generic SKU"})
+        competitor = sku_art.competitor
         shelf1, shelf2 = st.columns(2)
         with shelf1:
             st.markdown(f"**Your Shelf (Kily Engine {'ON' if is_kily_activated else 'OFF'})**")
             st.markdown(f"**SKU:** *{sku_select}*")
-            avg_score = sku_df['Content Score'].mean()
+            avg_score = sku_art.content_score
             st.metric("Content Score", f"{avg_score:.1f}/10", delta="Optimized by AI" if avg_score > 8 else "Needs Improvement", delta_color="normal" if avg_score > 8 else "inverse")
             if avg_score < 8: st.error("**AI Recommendations:** Missing Video Asset. Short Description. Only 3 images.")
             else: st.success("**Analysis:** Content is fully optimized with rich media, A+ descriptions, and sufficient imagery.")
@@ -599,10 +910,30 @@ elif page == "SKU Deep-Dive":
         hcol1, hcol2 = st.columns([2, 3])
         with hcol1:
             st.subheader("ROAS Heatmap")
-            heatmap_data = sku_df.pivot_table(index='Daypart', columns='Brand', values='ROAS', aggfunc='mean').fillna(0)
-            st.plotly_chart(px.imshow(heatmap_data, text_auto=".2f", aspect="auto", color_continuous_scale='Greens', title=f"ROAS Hotspots: Kily Engine Active" if is_kily_activated else f"ROAS Hotspots (Baseline)").update_layout(template="plotly_dark", height=400), use_container_width=True)
+            build_sku_heatmap = lambda: px.imshow(sku_art.roas_heatmap(date_start, date_end), text_auto=".2f", aspect="auto", color_continuous_scale='Greens', title=f"ROAS Hotspots: Kily Engine Active" if is_kily_activated else f"ROAS Hotspots (Baseline)").update_layout(template="plotly_dark", height=400)
+            show_figure("sku_roas_heatmap", (is_kily_activated, sku_select, date_start, date_end), build_sku_heatmap)
         with hcol2:
             st.subheader(f"ROAS Trend")
-            roas_trend_df = sku_df.groupby(sku_df['Date'].dt.date)['ROAS'].mean().reset_index()
-            st.plotly_chart(px.line(roas_trend_df, x='Date', y='ROAS', title=f"Kily Drives Consistent ROAS" if is_kily_activated else f"Volatile Daily ROAS (Baseline)", markers=True).update_layout(template="plotly_dark", height=400), use_container_width=True)
+            def build_roas_trend():
+                roas_trend, resolution = sku_art.roas_trend(date_start, date_end, MAX_CHART_POINTS)
+                return px.line(roas_trend, x='Date', y='ROAS', title=f"Kily Drives Consistent ROAS" if is_kily_activated else f"Volatile {RESOLUTION_NAMES[resolution]} ROAS (Baseline)", markers=True).update_layout(template="plotly_dark", height=400)
+            show_figure("sku_roas_trend", (is_kily_activated, sku_select, date_start, date_end), build_roas_trend)
 
+# ==============================================================================
+# --- 6. PROFILER PANEL ---
+# ==============================================================================
+profiler.lap(f"page:{page}")
+profile = profiler.finish(page=page, kily=is_kily_activated, dataset_version=dataset.version if dataset else None, refresh=None if SHARED_DATASET else dataset_refresher().metrics())
+startup = report_startup(page)
+if profile:
+    with st.sidebar.expander(f"⏱️ Rerun Profile: {profile['total_ms']:,.0f} ms", expanded=True):
+        st.dataframe(pd.DataFrame(profile['sections'])[['section', 'ms', 'alloc_kb', 'peak_kb']], use_container_width=True, hide_index=True)
+        if profile['caches']:
+            st.dataframe(pd.DataFrame(profile['caches']).T.rename_axis('loader'), use_container_width=True)
+        st.caption(f"Heap traced during this rerun: {profile['traced_kb'] / 1024:,.1f} MB. Logged to `{PROFILE_LOG}`.")
+        lazy_imports = ", ".join(f"{name} {ms:,.0f} ms" for name, ms in startup['lazy_imports_ms'].items()) or "none"
+        st.caption(f"Cold start ({startup['page']}): imports {startup['import_ms']:,.0f} ms, first render {startup['first_render_ms']:,.0f} ms; lazy imports during it: {lazy_imports}. Logged to `{STARTUP_LOG}`.")
+        if profile['refresh'] and profile['refresh']['age_s'] is not None:
+            refresh = profile['refresh']
+            last_error = f" Last error: {refresh['last_error']}" if refresh['last_error'] else ""
+            st.caption(f"Dataset refresh: version {refresh['age_s']:,.0f} s old, last build {refresh['last_build_s'] * 1e3:,.0f} ms{' (rebuilding)' if refresh['refreshing'] else ''}; {refresh['stale_serves']:,} reruns served stale, {refresh['builds']:,} builds, {refresh['failures']:,} failed.{last_error}")
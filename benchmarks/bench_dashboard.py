@@ -0,0 +1,168 @@
+"""Headless per-page benchmark of Dashboard.py using Streamlit's AppTest.
+
+Every scale factor runs in its own subprocess (so peak RSS is per scale) and covers each navigation
+page with the Kily toggle on and off over a sweep of filter selections. Each case records a cold
+rerun (Streamlit caches cleared and the released background threads and worker processes joined
+first) and the median of several warm reruns.
+
+    python benchmarks/bench_dashboard.py --scales 1,4,12 --out bench.json
+    python benchmarks/bench_dashboard.py --scales 1,4,12 --compare bench.json --threshold 0.25
+
+Scale factor ``f`` means ``f * 30`` days of history (``KILY_DATA_SCALE=days=...``). With ``--compare``
+the run is checked against a stored result and the process exits non-zero on regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD = os.path.join(ROOT, "Dashboard.py")
+PAGES = ["Agentic Orchestrator", "Insights & Action Center", "Strategic Campaign Planner", "Competitive Intelligence", "SKU Deep-Dive"]
+FILTER_SWEEP = {
+    "Agentic Orchestrator": [{}, {"Filter by City": "Delhi"}, {"Filter by City": "Mumbai", "Filter by Platform": "Zepto", "Filter by Brand": "Bingo!"}],
+    "SKU Deep-Dive": [{}, {"Select a Brand to Analyze": "Sunfeast", "Select a Specific SKU": "Dark Fantasy Choco Fills"}, {"Select a Brand to Analyze": "Bingo!", "Select a Specific SKU": "Mad Angles"}],
+}
+BACKGROUND_THREADS = ("price-collector", "price-stubs", "sku-prewarm", "dataset-refresh")  # released with st.cache_resource.clear()
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is KiB on Linux
+
+
+def _select(at, filters: dict):
+    for label, value in filters.items():
+        next(box for box in at.selectbox if box.label == label).set_value(value)
+        at.run()  # dependent selectboxes (Brand -> SKU) refresh their options
+
+
+def _release_resources(st, timeout: float = 30.0) -> int:
+    """Clear Streamlit's caches and wait for the released pollers, stub servers and pools to exit, so background
+    work from earlier cases does not pile up and skew later timings; returns how many were still alive."""
+    import multiprocessing
+    import threading
+
+    st.cache_data.clear()
+    st.cache_resource.clear()  # runs each resource's on_release hook
+    deadline = time.monotonic() + timeout
+    for thread in threading.enumerate():
+        if thread.name.startswith(BACKGROUND_THREADS):
+            thread.join(max(0.0, deadline - time.monotonic()))
+    for child in multiprocessing.active_children():
+        child.join(max(0.0, deadline - time.monotonic()))
+    return sum(thread.is_alive() for thread in threading.enumerate() if thread.name.startswith(BACKGROUND_THREADS)) + len(multiprocessing.active_children())
+
+
+def run_scale(factor: int, warm_runs: int) -> dict:
+    os.environ["KILY_DATA_SCALE"] = f"days={30 * factor}"
+    sys.path.insert(0, ROOT)
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    from kily.data_engine import DataScale, generate_campaign_data
+
+    scale = DataScale.parse(os.environ["KILY_DATA_SCALE"])
+    start = time.perf_counter()
+    for is_kily in (True, False):
+        generate_campaign_data(is_kily, scale=scale)
+    generation_s = time.perf_counter() - start
+
+    at = AppTest.from_file(DASHBOARD, default_timeout=1800)
+    start = time.perf_counter()
+    at.run()
+    first_render_s = time.perf_counter() - start
+    cases = []
+    for page in PAGES:
+        for kily in (True, False):
+            for filters in FILTER_SWEEP.get(page, [{}]):
+                at.toggle[0].set_value(kily)
+                at.sidebar.radio[0].set_value(page)
+                at.run()
+                _select(at, filters)
+                leftover = _release_resources(st)
+                start = time.perf_counter()
+                at.run()
+                cold_s = time.perf_counter() - start
+                warm = []
+                for _ in range(warm_runs):
+                    start = time.perf_counter()
+                    at.run()
+                    warm.append(time.perf_counter() - start)
+                case = {"page": page, "kily": kily, "filters": filters, "cold_s": round(cold_s, 4), "warm_s": round(statistics.median(warm), 4)}
+                if leftover:
+                    case["leftover_background"] = leftover
+                if at.exception:
+                    case["error"] = at.exception[0].message
+                cases.append(case)
+    return {"scale": factor, "days": scale.days, "rows": 2 * scale.rows, "data_generation_s": round(generation_s, 4), "first_render_s": round(first_render_s, 4), "peak_rss_mb": round(_peak_rss_mb(), 1), "cases": cases}
+
+
+def flatten(result: dict) -> dict:
+    """Metric name -> value for every comparable number in a benchmark result."""
+    metrics = {}
+    for run in result["runs"]:
+        prefix = f"scale={run['scale']}"
+        for key in ("data_generation_s", "first_render_s", "peak_rss_mb"):
+            metrics[f"{prefix}|{key}"] = run[key]
+        for case in run["cases"]:
+            filters = ",".join(f"{k}={v}" for k, v in case["filters"].items()) or "default"
+            for key in ("cold_s", "warm_s"):
+                metrics[f"{prefix}|{case['page']}|kily={case['kily']}|{filters}|{key}"] = case[key]
+    return metrics
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_seconds: float) -> list:
+    """Metrics that got worse by more than ``threshold`` (relative); sub-``min_seconds`` timing noise is ignored."""
+    regressions = []
+    old = flatten(baseline)
+    for name, value in flatten(current).items():
+        before = old.get(name)
+        if before is None or before <= 0:
+            continue
+        noise_floor = 0 if name.endswith("peak_rss_mb") else min_seconds
+        if value > before * (1 + threshold) and value - before > noise_floor:
+            regressions.append({"metric": name, "baseline": before, "current": value, "change": round(value / before - 1, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1,4", help="Comma-separated scale factors (x 30 days)")
+    parser.add_argument("--warm-runs", type=int, default=3)
+    parser.add_argument("--out", default=None, help="Write the JSON result here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown before flagging")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="Ignore timing regressions smaller than this")
+    parser.add_argument("--worker", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_scale(args.worker, args.warm_runs)))
+        return
+    runs = []
+    for factor in (int(f) for f in args.scales.split(",")):
+        output = subprocess.run([sys.executable, __file__, "--worker", str(factor), "--warm-runs", str(args.warm_runs)], check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    result = {"meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()}, "runs": runs}
+    if args.compare:
+        with open(args.compare) as fh:
+            result["regressions"] = compare(result, json.load(fh), args.threshold, args.min_seconds)
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text)
+    else:
+        print(text)
+    if result.get("regressions"):
+        for regression in result["regressions"]:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']} -> {regression['current']} (+{regression['change']:.0%})", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
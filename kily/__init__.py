@@ -0,0 +1 @@
+"""Data and analytics engines backing the Kily Agentic AI Engine dashboard."""
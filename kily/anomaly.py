@@ -0,0 +1,216 @@
+"""Anomaly engine over every daily campaign series, feeding the Proactive Agent Feed.
+
+A series is one metric (ROAS, Spend, Conversions, OOS Rate) of one SKU x Platform x City x
+Daypart slice. The last ``history`` days of the KPI cube are laid out as a (days, series) matrix
+per metric, and three statistics are computed for all series at once with column reductions,
+cumulative sums and a row-wise recurrence (the only Python loop runs over days, never series):
+
+* rolling z-score of the latest day against the ``window`` days before it;
+* EWMA z-score of the latest day against the exponentially weighted mean/variance up to it;
+* changepoint t-statistic: the best split of the history into two constant-mean segments, with
+  the new level starting within the last two weeks.
+
+A spike on the latest day becomes an OPPORTUNITY or a THREAT depending on whether the metric
+moved the good way; a sustained level shift without a spike becomes a MARKET SHIFT.
+
+    python -m kily.anomaly --scale days=60,extra_skus=100,extra_cities=20
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from kily.cube import KPICube
+
+METRICS = ("ROAS", "Spend", "Conversions", "OOS Rate")
+GOOD_DIRECTION = {"ROAS": 1, "Spend": 0, "Conversions": 1, "OOS Rate": -1}  # 0: neither way is good news
+SERIES_AXES = ("SKU", "Platform", "City", "Daypart")
+Z_THRESHOLD = 3.0
+CP_THRESHOLD = 5.0
+FEED_MIX = {"OPPORTUNITY": 2, "THREAT": 1, "MARKET SHIFT": 1}
+FINDING_COLUMNS = ["Kind", "Metric", "Brand", *SERIES_AXES, "Value", "Baseline", "Z", "EWMA Z", "Shift (%)", "Shift Since", "Changepoint T", "Severity", "Series"]
+
+
+def series_matrix(cube: KPICube, metric: str) -> np.ndarray:
+    """(days, series) matrix of ``metric``; NaN where a slice has no rows that day."""
+    rows = cube.cells["ROAS Count"].reshape(cube.shape[0], -1).astype(np.float64)
+    if metric == "ROAS":
+        values = cube.cells["ROAS Sum"].reshape(rows.shape)
+    elif metric == "OOS Rate":
+        values = cube.cells["OOS Count"].reshape(rows.shape)
+    else:
+        values = cube.cells[metric].reshape(rows.shape).astype(np.float64)
+        return np.where(rows > 0, values, np.nan)
+    return np.divide(values, rows, out=np.full(rows.shape, np.nan), where=rows > 0)
+
+
+def _cumsums(x: np.ndarray):
+    """Zero-padded cumulative count, sum and sum of squares over days, ignoring NaN."""
+    seen = np.isfinite(x)
+    filled = np.where(seen, x, 0.0)
+    pad = lambda a: np.concatenate([np.zeros((1,) + a.shape[1:]), np.cumsum(a, axis=0)])
+    return pad(seen.astype(np.float64)), pad(filled), pad(filled * filled)
+
+
+def rolling_zscore(x: np.ndarray, window: int) -> tuple:
+    """(z, mean) of the latest day against the ``window`` days before it; NaN without two prior points."""
+    prior = x[-1 - window:-1]
+    seen = np.isfinite(prior)
+    count = seen.sum(axis=0)
+    filled = np.where(seen, prior, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = filled.sum(axis=0) / count
+        std = np.sqrt(np.maximum(np.einsum("ij,ij->j", filled, filled) / count - mean * mean, 0) * count / (count - 1))
+        z = (x[-1] - mean) / std
+    return np.where((count >= 2) & (std > 0), z, np.nan), mean
+
+
+def ewma_zscore(x: np.ndarray, alpha: float = 0.3) -> np.ndarray:
+    """z-score of the last day against the EWMA mean/variance of the days before it."""
+    mean, var = np.where(np.isfinite(x[0]), x[0], np.nan), np.zeros(x.shape[1])
+    for row in x[1:-1]:  # one vectorized update per day across all series
+        seen = np.isfinite(row)
+        start = seen & ~np.isfinite(mean)
+        mean = np.where(start, row, mean)
+        delta = np.where(seen, row - mean, 0.0)
+        mean = mean + alpha * delta
+        var = (1 - alpha) * (var + alpha * delta * delta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (x[-1] - mean) / np.sqrt(var)
+    return np.where(var > 0, z, np.nan)
+
+
+def changepoint(x: np.ndarray, min_segment: int = 3, recent: int = 14) -> tuple:
+    """Best mean-shift split per series among the last ``recent`` days: (t-statistic, first day of the new level, mean before, mean after)."""
+    n, s1, s2 = _cumsums(x)
+    splits = np.arange(max(min_segment, len(x) - recent), len(x) - min_segment + 1)
+    if not len(splits):
+        empty = np.full(x.shape[1], np.nan)
+        return empty, np.zeros(x.shape[1], dtype=np.int64), empty, empty
+    n1, t1 = n[splits], s1[splits]
+    n2, t2 = n[-1] - n1, s1[-1] - t1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        before, after = t1 / n1, t2 / n2
+        within = s2[-1] - t1 * before - t2 * after  # within-segment sum of squares, pooled below
+        within /= n1 + n2 - 2
+        scale = within * (1 / n1 + 1 / n2)
+        t = np.abs(after - before)
+        t /= np.sqrt(scale)
+    t[~((n1 >= 2) & (n2 >= 2) & (within > 0))] = -np.inf
+    best = np.argmax(t, axis=0)
+    columns = np.arange(x.shape[1])
+    stat = t[best, columns]
+    return np.where(np.isfinite(stat), stat, np.nan), splits[best], before[best, columns], after[best, columns]
+
+
+def detect(cube: KPICube, history: int = 28, window: int = 14, limit: int = 200) -> pd.DataFrame:
+    """Findings for the last day of ``cube``, most severe first, at most ``limit`` of each kind."""
+    cube = cube.between(cube.labels["Date"][max(len(cube.labels["Date"]) - history, 0)]) if len(cube.labels["Date"]) else cube
+    dates = cube.labels["Date"]
+    shape = cube.shape[1:]
+    sku_brand = np.asarray(cube.brands)[np.maximum(cube.sku_brand, 0)]
+    found = []
+    for metric in METRICS:
+        x = series_matrix(cube, metric)
+        if len(x) < 3:
+            break
+        z, mean = rolling_zscore(x, window)
+        ewz = ewma_zscore(x)
+        cp_t, cp_split, cp_before, cp_after = changepoint(x)
+        spike = (np.abs(z) >= Z_THRESHOLD) & (np.abs(ewz) >= Z_THRESHOLD)
+        shift = (cp_t >= CP_THRESHOLD) & ~spike & (cp_split < len(x) - 1)
+        hit = np.flatnonzero(spike | shift)
+        if not len(hit):
+            continue
+        direction = np.sign(z[hit]) * GOOD_DIRECTION[metric]
+        kinds = np.where(shift[hit] | (direction == 0), "MARKET SHIFT", np.where(direction > 0, "OPPORTUNITY", "THREAT"))
+        positions = np.unravel_index(hit, shape)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shift_pct = np.where(cp_before[hit] != 0, (cp_after[hit] / cp_before[hit] - 1) * 100, np.nan)
+        found.append(pd.DataFrame({
+            "Kind": kinds, "Metric": metric, "Brand": sku_brand[positions[0]],
+            **{axis: np.asarray(cube.labels[axis])[at] for axis, at in zip(SERIES_AXES, positions)},
+            "Value": x[-1, hit], "Baseline": mean[hit], "Z": z[hit], "EWMA Z": ewz[hit],
+            "Shift (%)": shift_pct, "Shift Since": dates[cp_split[hit]], "Changepoint T": cp_t[hit],
+            "Severity": np.fmax(np.where(spike[hit], np.fmax(np.abs(z[hit]), np.abs(ewz[hit])), 0), np.where(shift[hit], cp_t[hit] / CP_THRESHOLD * Z_THRESHOLD, 0)),
+            "Series": hit,
+        }))
+    if not found:
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+    findings = pd.concat(found, ignore_index=True)
+    kept = []
+    for kind in FEED_MIX:
+        rows = np.flatnonzero(findings["Kind"].to_numpy() == kind)
+        if len(rows) > limit:  # partial selection, not a full sort of every finding
+            rows = rows[np.argpartition(-findings["Severity"].to_numpy()[rows], limit - 1)[:limit]]
+        kept.append(rows)
+    findings = findings.iloc[np.concatenate(kept)]
+    return findings.sort_values("Severity", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def series_history(cube: KPICube, finding, history: int = 28) -> pd.DataFrame:
+    """Daily values of the finding's series (for a rationale chart)."""
+    cube = cube.slice(**{axis: finding[axis] for axis in SERIES_AXES})
+    x = series_matrix(cube, finding["Metric"])[-history:, 0]
+    return pd.DataFrame({finding["Metric"]: x}, index=pd.Index(cube.labels["Date"][-history:], name="Date"))
+
+
+def feed(findings: pd.DataFrame, mix: dict = FEED_MIX) -> pd.DataFrame:
+    """The most severe findings of each kind per ``mix``, topped up with the next most severe of any kind."""
+    picked = [findings[findings["Kind"] == kind].head(n) for kind, n in mix.items()]
+    picked = pd.concat(picked) if picked else findings.head(0)
+    rest = findings.drop(index=picked.index).head(sum(mix.values()) - len(picked))
+    return pd.concat([picked, rest]).sort_values("Severity", ascending=False, kind="stable")
+
+
+def _slot(finding) -> str:
+    return f"'{finding['SKU']}' ({finding['Brand']}) on {finding['Platform']} in {finding['City']}, {finding['Daypart']} slot"
+
+
+def _fmt(metric: str, value) -> str:
+    return {"ROAS": f"{value:.2f}x", "Spend": f"₹{value:,.0f}", "Conversions": f"{value:,.0f}", "OOS Rate": f"{value:.0%}"}[metric]
+
+
+def agent_card(finding, with_kind: bool = True) -> str:
+    """Card text for one finding, in the feed's `[KIND]` style (untagged for the AI Logbook)."""
+    metric, kind = finding["Metric"], finding["Kind"]
+    if kind == "MARKET SHIFT" and not abs(finding["Z"]) >= Z_THRESHOLD:  # a level shift, not a spike
+        observed = f"{metric} for {_slot(finding)} has shifted {finding['Shift (%)']:+.0f}% since {finding['Shift Since']:%d %b} (changepoint t = {finding['Changepoint T']:.1f})."
+    else:
+        observed = f"{metric} for {_slot(finding)} is {_fmt(metric, finding['Value'])} against a {_fmt(metric, finding['Baseline'])} norm ({finding['Z']:+.1f}σ)."
+    action = {
+        ("OPPORTUNITY", "ROAS"): "Suggesting a budget shift toward this slot while returns hold.",
+        ("OPPORTUNITY", "Conversions"): "Raising bids to capture the extra demand.",
+        ("OPPORTUNITY", "OOS Rate"): "Stock is back; resuming paused campaigns.",
+        ("THREAT", "ROAS"): "Pulling bids back and checking competitor activity on this slot.",
+        ("THREAT", "Conversions"): "Auditing the listing and creatives for this slot.",
+        ("THREAT", "OOS Rate"): "Pausing spend until inventory recovers.",
+    }.get((kind, metric), "Re-baselining forecasts and bid caps for this slot.")
+    return f"`[{kind}]` {observed} {action}" if with_kind else f"{observed} {action}"
+
+
+def rationale(finding, window: int = 14) -> str:
+    """The statistics behind a finding, for the logbook's "Show Rationale"."""
+    text = f"Latest {finding['Metric']} is {finding['Z']:+.1f}σ from its {window}-day mean of {_fmt(finding['Metric'], finding['Baseline'])} and {finding['EWMA Z']:+.1f}σ from its EWMA."
+    if np.isfinite(finding["Changepoint T"]):
+        text += f" The strongest recent level shift starts {finding['Shift Since']:%d %b} ({finding['Shift (%)']:+.0f}%, t = {finding['Changepoint T']:.1f})."
+    return text
+
+
+if __name__ == "__main__":
+    from kily.data_engine import DEFAULT_SEED, DataScale
+    from kily.data_sources import source_from_env
+
+    parser = argparse.ArgumentParser(description="Time the anomaly engine over every SKU x Platform x City x Daypart series of a generated dataset.")
+    parser.add_argument("--scale", default="days=60,extra_skus=100,extra_cities=20", help="DataScale spec; the default is about 150k series per metric")
+    parser.add_argument("--history", type=int, default=28)
+    args = parser.parse_args()
+    scale = DataScale.parse(args.scale)
+    cube = KPICube.from_frame(source_from_env(seed=DEFAULT_SEED, scale=scale).load(True))
+    started = time.perf_counter()
+    findings = detect(cube, history=args.history)
+    elapsed = time.perf_counter() - started
+    series = int(np.prod(cube.shape[1:]))
+    print(json.dumps({"series": series * len(METRICS), "days": min(args.history, cube.shape[0]), "seconds": round(elapsed, 3), "findings": findings["Kind"].value_counts().to_dict(), "feed": [agent_card(finding) for _, finding in feed(findings).iterrows()]}, indent=2, ensure_ascii=False))
@@ -0,0 +1,382 @@
+"""Append-only, segmented on-disk store of agent audit events with secondary indexes.
+
+A store directory holds:
+
+    manifest.json            segments in append order: record count, sealed flag, time bounds
+    dictionary.json          append-only string dictionary per encoded field
+    segment-000001.bin       fixed-width little-endian records (``RECORD_DTYPE``)
+    segment-000001.idx.npz   sealed segments only: timestamp order plus per-code postings
+    store.lock               advisory lock serializing writers across processes
+
+A segment is sealed once it holds ``segment_records`` events. Sealed segments are memory-mapped
+read-only and queried through their index files; the open segment is indexed in memory on demand.
+Timestamps are UTC epoch milliseconds (naive inputs are taken as UTC).
+
+Several processes may share a store. Writers hold ``store.lock`` and reload the manifest and
+dictionary before appending, so no process overwrites another's segments or strings; the manifest
+is rewritten atomically after every append and readers pick up a newer one on their next query.
+A torn tail past the recorded count is truncated on open.
+
+    python -m kily.audit_store --dir audit --events 2000000
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import pandas as pd
+
+from kily.schema import BRANDS_SKUS, CITIES, PLATFORMS
+
+STRING_FIELDS = ("source", "actor", "trigger", "sku", "city", "action", "target", "reason")
+INDEXED_FIELDS = ("sku", "actor", "action")
+RECORD_DTYPE = np.dtype([("ts", "<i8"), ("event_id", "V16")] + [(field, "<u4") for field in STRING_FIELDS] + [("loss", "<f4"), ("confidence", "<f4"), ("override", "?")])
+DISPLAY_COLUMNS = {"ts": "Timestamp", "sku": "SKU_ID", "city": "City", "trigger": "Event", "action": "Action", "target": "Target", "actor": "Actor", "source": "Evidence", "reason": "Reason", "loss": "Impact Forecast (₹/hr)", "confidence": "Confidence", "override": "Override"}
+
+
+@dataclass(frozen=True)
+class AuditPage:
+    records: np.ndarray  # RECORD_DTYPE, newest first
+    frame: pd.DataFrame
+    total: int
+    offset: int
+    limit: int
+    elapsed_ms: float
+
+
+def _write_json(path: str, payload):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(payload, fh)
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive advisory lock on ``path`` across processes (``flock``, or ``msvcrt.locking`` on Windows)."""
+    with open(path, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def random_uuids(n: int) -> np.ndarray:
+    """``n`` random (version 4) UUIDs as 16-byte records, generated in one batch."""
+    raw = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    return raw.view("V16").ravel()
+
+
+def _read_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def _build_index(records: np.ndarray, dictionary: dict) -> dict:
+    # int32 positions: a segment never exceeds 2**31 records. Postings keep position order, which is
+    # also time order when the segment was appended in time order ("monotonic").
+    index = {"ts_order": np.argsort(records["ts"], kind="stable").astype(np.int32), "monotonic": np.asarray(bool(np.all(np.diff(records["ts"]) >= 0)))}
+    for field in INDEXED_FIELDS:
+        codes = records[field]
+        order = np.argsort(codes, kind="stable").astype(np.int32)
+        index[f"{field}_order"], index[f"{field}_offsets"] = order, np.searchsorted(codes[order], np.arange(len(dictionary[field]) + 1))
+    return index
+
+
+class AuditStore:
+    def __init__(self, root: str, segment_records: int = 1 << 18):
+        self.root, self.segment_records = root, segment_records
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.RLock()
+        self._manifest_path, self._dictionary_path = os.path.join(root, "manifest.json"), os.path.join(root, "dictionary.json")
+        self._lock_path = os.path.join(root, "store.lock")
+        self.segments, self.dictionary, self._codes, self._manifest_stamp = [], {}, {}, None
+        self._maps, self._indexes = {}, {}
+        with self._lock, _file_lock(self._lock_path):
+            self._reload()
+            if self.segments and not self.segments[-1]["sealed"]:
+                tail = self.segments[-1]
+                with open(self._path(tail["name"]), "ab") as fh:
+                    fh.truncate(tail["records"] * RECORD_DTYPE.itemsize)
+
+    def _reload(self, force: bool = True):
+        """Re-read the manifest, then the (append-only, so at least as new) dictionary, if another process rewrote them."""
+        try:
+            stat = os.stat(self._manifest_path)
+            stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except FileNotFoundError:
+            stamp = None
+        if not force and stamp == self._manifest_stamp:
+            return
+        segments = _read_json(self._manifest_path, {"segments": []})["segments"]
+        known = {segment["name"]: (segment["records"], segment["sealed"]) for segment in self.segments}
+        for segment in segments:
+            if known.get(segment["name"]) != (segment["records"], segment["sealed"]):
+                self._maps.pop(segment["name"], None)
+                self._indexes.pop(segment["name"], None)
+        self.segments, self._manifest_stamp = segments, stamp
+        self.dictionary = _read_json(self._dictionary_path, {field: [] for field in STRING_FIELDS})
+        self._codes = {field: {value: code for code, value in enumerate(values)} for field, values in self.dictionary.items()}
+
+    def __len__(self) -> int:
+        return sum(segment["records"] for segment in self.segments)
+
+    def _path(self, name: str, suffix: str = ".bin") -> str:
+        return os.path.join(self.root, name + suffix)
+
+    # --- write side ------------------------------------------------------------------------
+    def _encode(self, field: str, values) -> np.ndarray:
+        inverse, uniques = pd.factorize(np.asarray(values, dtype=object).astype(str))
+        lookup = self._codes[field]
+        for value in uniques:
+            if value not in lookup:
+                lookup[value] = len(self.dictionary[field])
+                self.dictionary[field].append(value)
+        return np.asarray([lookup[value] for value in uniques], dtype=np.uint32)[inverse]
+
+    def append_columns(self, ts, event_id=None, loss=0.0, confidence=1.0, override=False, **fields) -> int:
+        """Bulk append; ``ts`` in UTC epoch milliseconds, one array (or scalar) per field in ``STRING_FIELDS``."""
+        with self._lock, _file_lock(self._lock_path):
+            self._reload()
+            return self._append(ts, event_id, loss, confidence, override, **fields)
+
+    def seed(self, build) -> int:
+        """Append ``build()`` (``append_columns`` keywords) only if the store is still empty, once across processes."""
+        with self._lock, _file_lock(self._lock_path):
+            self._reload()
+            if len(self):
+                return 0
+            return self._append(**build())
+
+    def _append(self, ts, event_id=None, loss=0.0, confidence=1.0, override=False, **fields) -> int:
+        ts = np.asarray(ts, dtype=np.int64)
+        records = np.zeros(len(ts), dtype=RECORD_DTYPE)
+        records["ts"], records["loss"], records["confidence"], records["override"] = ts, loss, confidence, override
+        records["event_id"] = random_uuids(len(ts)) if event_id is None else np.asarray([uuid.UUID(str(e)).bytes for e in event_id], dtype="V16")
+        for field in STRING_FIELDS:
+            records[field] = self._encode(field, np.broadcast_to(np.asarray(fields.get(field, ""), dtype=object), len(ts)))
+        _write_json(self._dictionary_path, self.dictionary)
+        written = 0
+        while written < len(records):
+            if not self.segments or self.segments[-1]["sealed"]:
+                self.segments.append({"name": f"segment-{len(self.segments) + 1:06d}", "records": 0, "sealed": False, "ts_min": None, "ts_max": None})
+            tail = self.segments[-1]
+            chunk = records[written:written + self.segment_records - tail["records"]]
+            with open(self._path(tail["name"]), "ab") as fh:
+                fh.write(chunk.tobytes())
+            tail["records"] += len(chunk)
+            tail["ts_min"] = int(min(chunk["ts"].min(), tail["ts_min"] if tail["ts_min"] is not None else chunk["ts"].min()))
+            tail["ts_max"] = int(max(chunk["ts"].max(), tail["ts_max"] if tail["ts_max"] is not None else chunk["ts"].max()))
+            self._maps.pop(tail["name"], None)
+            self._indexes.pop(tail["name"], None)
+            if tail["records"] >= self.segment_records:
+                self._seal(tail)
+            written += len(chunk)
+        _write_json(self._manifest_path, {"segments": self.segments})
+        return len(records)
+
+    def append(self, events) -> int:
+        """Append events in the JSON audit schema (eventId, timestamp, source, actor, trigger, action, metadata); naive timestamps are UTC."""
+        events = list(events)
+        get = lambda path: [e.get(path[0], {}).get(path[1]) if len(path) == 2 else e.get(path[0]) for e in events]
+        return self.append_columns(
+            ts=pd.to_datetime(get(("timestamp",)), utc=True).as_unit("ms").asi8, event_id=[e.get("eventId") or uuid.uuid4() for e in events],
+            source=get(("source",)), actor=get(("actor",)), trigger=get(("trigger", "type")), sku=get(("trigger", "sku")), city=get(("trigger", "city")),
+            action=get(("action", "type")), target=get(("action", "targetId")), reason=get(("action", "reason")),
+            loss=[e.get("metadata", {}).get("forecastedLossPerHour", 0) for e in events], confidence=[e.get("metadata", {}).get("confidenceScore", 1.0) for e in events], override=[e.get("metadata", {}).get("humanOverride", False) for e in events])
+
+    def _seal(self, segment: dict):
+        np.savez(self._path(segment["name"], ".idx.npz"), **_build_index(self._records(segment), self.dictionary))
+        segment["sealed"] = True
+        self._indexes.pop(segment["name"], None)
+
+    # --- read side -------------------------------------------------------------------------
+    def _records(self, segment: dict) -> np.ndarray:
+        name = segment["name"]
+        if name not in self._maps:
+            self._maps[name] = np.memmap(self._path(name), dtype=RECORD_DTYPE, mode="r", shape=(segment["records"],)) if segment["records"] else np.empty(0, RECORD_DTYPE)
+        return self._maps[name]
+
+    def _index(self, segment: dict) -> dict:
+        name = segment["name"]
+        if name not in self._indexes:
+            records = self._records(segment)
+            if segment["sealed"]:
+                with np.load(self._path(name, ".idx.npz")) as stored:
+                    index = {key: stored[key] for key in stored.files}
+            else:  # open segment: built in memory, dropped on the next append
+                index = _build_index(records, self.dictionary)
+            index["ts_sorted"] = np.asarray(records["ts"])[index["ts_order"]]
+            self._indexes[name] = index
+        return self._indexes[name]
+
+    def _matches(self, segment: dict, start: int, end: int, wanted: dict) -> np.ndarray:
+        """Positions in ``segment`` within [start, end] matching every wanted code, in ascending time order."""
+        records, index = self._records(segment), self._index(segment)
+        lo, hi = np.searchsorted(index["ts_sorted"], start, "left"), np.searchsorted(index["ts_sorted"], end, "right")
+        postings = {}
+        for field, code in wanted.items():
+            offsets = index[f"{field}_offsets"]
+            postings[field] = index[f"{field}_order"][offsets[code]:offsets[code + 1]] if code + 1 < len(offsets) else np.empty(0, np.int64)
+        if not postings or min(map(len, postings.values())) > hi - lo:
+            rows, remaining, ordered = index["ts_order"][lo:hi], wanted, True
+        else:  # start from the most selective posting list, then probe the rest
+            lead = min(postings, key=lambda field: len(postings[field]))
+            rows = postings[lead]
+            ts = records["ts"][rows]
+            rows, remaining, ordered = rows[(ts >= start) & (ts <= end)], {field: code for field, code in wanted.items() if field != lead}, bool(index["monotonic"])
+        for field, code in remaining.items():
+            rows = rows[records[field][rows] == code]
+        return rows if ordered else rows[np.lexsort((rows, records["ts"][rows]))]
+
+    def query(self, start=None, end=None, offset: int = 0, limit: int = 50, **filters) -> AuditPage:
+        """Newest-first page of events in [start, end] (timestamps or ms) matching ``sku=``, ``actor=``, ``action=`` filters."""
+        began = time.perf_counter()
+        start = -2 ** 62 if start is None else pd.Timestamp(start).value // 10 ** 6 if not isinstance(start, (int, np.integer)) else int(start)
+        end = 2 ** 62 if end is None else pd.Timestamp(end).value // 10 ** 6 if not isinstance(end, (int, np.integer)) else int(end)
+        with self._lock:
+            self._reload(force=False)
+            wanted = {}
+            for field, value in filters.items():
+                if value is not None:
+                    if value not in self._codes[field]:
+                        return AuditPage(np.empty(0, RECORD_DTYPE), self.to_frame(np.empty(0, RECORD_DTYPE)), 0, offset, limit, (time.perf_counter() - began) * 1e3)
+                    wanted[field] = self._codes[field][value]
+            total, candidates = 0, []
+            for segment in self.segments:
+                if not segment["records"] or segment["ts_max"] < start or segment["ts_min"] > end:
+                    continue
+                rows = self._matches(segment, start, end, wanted)
+                total += len(rows)
+                newest = rows[::-1][:offset + limit]
+                candidates.append(self._records(segment)[newest])
+            merged = np.concatenate(candidates) if candidates else np.empty(0, RECORD_DTYPE)
+            page = merged[np.argsort(-merged["ts"], kind="stable")][offset:offset + limit]
+            page = np.array(page, dtype=RECORD_DTYPE)  # detach from the memory maps
+        return AuditPage(page, self.to_frame(page), total, offset, limit, (time.perf_counter() - began) * 1e3)
+
+    def values(self, field: str) -> list:
+        with self._lock:
+            self._reload(force=False)
+            return sorted(self.dictionary[field])
+
+    def to_frame(self, records: np.ndarray) -> pd.DataFrame:
+        out = {}
+        for field, column in DISPLAY_COLUMNS.items():
+            if field == "ts":
+                out[column] = pd.to_datetime(records["ts"], unit="ms", utc=True)
+            elif field in STRING_FIELDS:
+                out[column] = np.asarray(self.dictionary[field], dtype=object)[records[field]] if len(records) else np.empty(0, dtype=object)
+            else:
+                out[column] = records[field]
+        return pd.DataFrame(out)
+
+    def to_event(self, record) -> dict:
+        """One record decoded back into the JSON audit schema."""
+        label = lambda field: self.dictionary[field][int(record[field])]
+        return {
+            "eventId": str(uuid.UUID(bytes=bytes(record["event_id"]))),
+            "timestamp": pd.Timestamp(int(record["ts"]), unit="ms", tz="UTC").isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "source": label("source"), "actor": label("actor"),
+            "trigger": {"type": label("trigger"), "sku": label("sku"), "city": label("city")},
+            "action": {"type": label("action"), "targetId": label("target"), "reason": label("reason")},
+            "metadata": {"forecastedLossPerHour": round(float(record["loss"]), 2), "humanOverride": bool(record["override"]), "confidenceScore": round(float(record["confidence"]), 3)},
+        }
+
+
+# --- event generation ------------------------------------------------------------------------
+AGENT_ACTIONS = [  # actor, trigger type, action type, reason, target prefix
+    ("BudgetAgent v1.3", "roas.threshold.high", "budget.reallocate", "HIGH_ROAS", "BG"),
+    ("BudgetAgent v1.3", "roas.threshold.low", "budget.reduce", "LOW_ROAS", "BG"),
+    ("BiddingAgent v2.1", "auction.pressure", "bid.adjust", "COMPETITOR_BID", "BD"),
+    ("CreativeAgent v1.0", "ctr.uplift", "creative.promote", "WINNING_VARIATION", "CR"),
+    ("ContentAgent v1.2", "content.score.low", "content.ticket", "MISSING_ASSETS", "CT"),
+    ("PriceAgent v1.0", "competitor.promo", "promo.counter", "PRICE_WAR", "PR"),
+]
+
+
+def synthetic_columns(n: int, start, end, seed: int = 0) -> dict:
+    """``n`` plausible agent actions spread uniformly over [start, end], as ``append_columns`` keyword arrays."""
+    rng = np.random.default_rng(seed)
+    skus = np.asarray([sku for skus in BRANDS_SKUS.values() for sku in skus], dtype=object)
+    kind = rng.integers(0, len(AGENT_ACTIONS), n)
+    table = np.asarray(AGENT_ACTIONS, dtype=object)
+    lo, hi = pd.Timestamp(start).value // 10 ** 6, pd.Timestamp(end).value // 10 ** 6
+    return {
+        "ts": np.sort(rng.integers(lo, hi, n)), "actor": table[kind, 0], "trigger": table[kind, 1], "action": table[kind, 2], "reason": table[kind, 3],
+        "target": np.char.add(table[kind, 4].astype(str), np.char.mod("-%03d", rng.integers(0, 1000, n))),
+        "source": np.char.add(np.asarray(PLATFORMS, dtype=str)[rng.integers(0, len(PLATFORMS), n)], "API"),
+        "sku": skus[rng.integers(0, len(skus), n)], "city": np.asarray(CITIES, dtype=object)[rng.integers(0, len(CITIES), n)],
+        "loss": rng.gamma(2.0, 8000.0, n).astype(np.float32), "confidence": rng.uniform(0.8, 1.0, n).astype(np.float32), "override": rng.random(n) < 0.02,
+    }
+
+
+def concat_columns(*parts) -> dict:
+    """Merge several ``append_columns`` keyword dicts into one, in timestamp order (scalars are broadcast)."""
+    sizes = [len(part["ts"]) for part in parts]
+    merged = {}
+    for key in set().union(*parts):
+        default = {"loss": 0.0, "confidence": 1.0, "override": False}.get(key, "")
+        merged[key] = np.concatenate([np.broadcast_to(np.asarray(part.get(key, default)), n) if np.ndim(part.get(key, default)) == 0 else np.asarray(part[key]) for part, n in zip(parts, sizes)])
+    order = np.argsort(merged["ts"], kind="stable")
+    return {key: values[order] for key, values in merged.items()}
+
+
+def oos_alert_columns(alerts: pd.DataFrame) -> dict:
+    """OOS detector alerts (``OOSDetector.alert_frame``) as inventory pause/resume actions."""
+    pause = (alerts["Alert"] == "PAUSE").to_numpy()
+    platform = alerts["Platform"].astype(str).str.replace(" ", "")
+    return {
+        "ts": alerts["Time"].to_numpy().astype("datetime64[ms]").astype(np.int64), "actor": "InventoryAgent v1.1",
+        "trigger": np.where(pause, "inventory.level.zero", "inventory.restocked"), "action": np.where(pause, "campaign.pause", "campaign.resume"),
+        "reason": np.where(pause, "OOS_DETECTED", "STOCK_RESTORED"), "target": (platform.str.upper() + "-OOS").to_numpy(object),
+        "source": (platform + "InventoryAPI").to_numpy(object), "sku": alerts["SKU"].astype(str).to_numpy(object), "city": alerts["City"].astype(str).to_numpy(object),
+        "loss": alerts["Spend"].to_numpy(np.float32), "confidence": 0.998,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill an audit store with synthetic agent actions and time a few queries.")
+    parser.add_argument("--dir", default="kily_audit")
+    parser.add_argument("--events", type=int, default=2_000_000)
+    parser.add_argument("--batch", type=int, default=250_000)
+    args = parser.parse_args()
+    store = AuditStore(args.dir)
+    end = pd.Timestamp.now().normalize()
+    start = end - pd.Timedelta(days=365)
+    began = time.perf_counter()
+    for i, lo in enumerate(range(0, args.events, args.batch)):
+        n = min(args.batch, args.events - lo)
+        span = (end - start) / max(-(-args.events // args.batch), 1)
+        store.append_columns(**synthetic_columns(n, start + span * i, start + span * (i + 1), seed=i))
+    ingest = time.perf_counter() - began
+    store = AuditStore(args.dir)  # reopen: queries run on memory-mapped segments
+    timings = {}
+    for name, kwargs in {"latest": {}, "sku": {"sku": "Mad Angles"}, "actor+action": {"actor": "BudgetAgent v1.3", "action": "budget.reduce"}, "last_week": {"start": end - pd.Timedelta(days=7)}, "sku+range+page10": {"sku": "Guava Juice", "start": end - pd.Timedelta(days=90), "offset": 500}}.items():
+        page = store.query(**kwargs)
+        timings[name] = {"total": page.total, "ms": round(page.elapsed_ms, 2)}
+    print(json.dumps({"events": len(store), "segments": len(store.segments), "ingest_seconds": round(ingest, 2), "queries": timings}))
@@ -0,0 +1,146 @@
+"""Dense KPI cube of additive campaign measures over Date x SKU x Platform x City x Daypart.
+
+Brand is a roll-up of SKU, so Brand filters and groupings select SKU slabs. Every query is a
+slice plus a reduction over the cube cells; the raw rows are only touched once, by ``from_frame``.
+"""
+import numpy as np
+import pandas as pd
+
+AXES = ("Date", "SKU", "Platform", "City", "Daypart")
+MEASURES = ("Direct Sales", "Spend", "Conversions", "Impressions", "Clicks", "ROAS Sum", "ROAS Count", "OOS Count", "Content Sum")
+ALL_LABELS = {"Brand": "All Brands", "SKU": "All SKUs", "Platform": "All Platforms", "City": "All Cities", "Daypart": "All Dayparts"}
+
+
+def _labels_and_codes(col: pd.Series):
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return col.cat.categories, col.cat.codes.to_numpy()
+    codes, labels = pd.factorize(col, sort=True)
+    return labels, codes
+
+
+class KPICube:
+    def __init__(self, labels: dict, brands: pd.Index, sku_brand: np.ndarray, cells: dict):
+        self.labels = labels  # axis name -> pd.Index of labels along that axis
+        self.brands = brands
+        self.sku_brand = sku_brand  # brand code of every SKU on the SKU axis
+        self.cells = cells  # measure name -> ndarray shaped like the axes
+        for values in cells.values():
+            values.flags.writeable = False
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "KPICube":
+        labels, codes = {}, []
+        for axis in AXES:
+            axis_labels, axis_codes = _labels_and_codes(frame["Date"].dt.normalize() if axis == "Date" else frame[axis])
+            labels[axis] = pd.DatetimeIndex(axis_labels) if axis == "Date" else axis_labels
+            codes.append(axis_codes)
+        brands, brand_codes = _labels_and_codes(frame["Brand"])
+        sku_brand = np.full(len(labels["SKU"]), -1, dtype=np.int64)  # -1: SKU has no rows in this frame
+        sku_brand[codes[1]] = brand_codes
+        shape = tuple(len(labels[axis]) for axis in AXES)
+        flat = np.ravel_multi_index(codes, shape)
+        size = int(np.prod(shape))
+        sources = {"Direct Sales": "Direct Sales", "Spend": "Spend", "Conversions": "Conversions", "Impressions": "Impressions", "Clicks": "Clicks", "ROAS Sum": "ROAS", "OOS Count": "Is OOS", "Content Sum": "Content Score"}
+        # Cells are stored as float32 and always reduced with float64 accumulators.
+        cells = {name: np.bincount(flat, weights=frame[col].to_numpy(np.float64), minlength=size).astype(np.float32).reshape(shape) for name, col in sources.items()}
+        cells["ROAS Count"] = np.bincount(flat, minlength=size).astype(np.float32).reshape(shape)
+        return cls(labels, brands, sku_brand, cells)
+
+    @classmethod
+    def concat(cls, cubes) -> "KPICube":
+        """Stack cubes along Date (e.g. per-day partitions); all other axes must carry identical labels."""
+        first = cubes[0]
+        for cube in cubes[1:]:
+            if any(not cube.labels[axis].equals(first.labels[axis]) for axis in AXES[1:]) or not cube.brands.equals(first.brands):
+                raise ValueError("Cannot concatenate KPI cubes with different SKU/Platform/City/Daypart labels")
+        labels = dict(first.labels, Date=pd.DatetimeIndex(np.concatenate([cube.labels["Date"].values for cube in cubes])))
+        sku_brand = np.max([cube.sku_brand for cube in cubes], axis=0)
+        return cls(labels, first.brands, sku_brand, {name: np.concatenate([cube.cells[name] for cube in cubes]) for name in first.cells})
+
+    @property
+    def shape(self):
+        return tuple(len(self.labels[axis]) for axis in AXES)
+
+    def between(self, start=None, end=None) -> "KPICube":
+        """Prune the Date axis to [start, end] (inclusive, either side open). Date labels are sorted, so this is a view, not a copy."""
+        dates = self.labels["Date"]
+        lo = 0 if start is None else int(dates.searchsorted(pd.Timestamp(start), side="left"))
+        hi = len(dates) if end is None else int(dates.searchsorted(pd.Timestamp(end), side="right"))
+        if lo == 0 and hi == len(dates):
+            return self
+        return KPICube(dict(self.labels, Date=dates[lo:hi]), self.brands, self.sku_brand, {name: values[lo:hi] for name, values in self.cells.items()})
+
+    def _positions(self, axis: str, value) -> np.ndarray:
+        values = [value] if isinstance(value, str) or not np.iterable(value) else list(value)
+        if axis == "Brand":
+            return np.flatnonzero(np.isin(self.sku_brand, self.brands.get_indexer(values)))
+        return np.flatnonzero(self.labels[axis].isin(values))
+
+    def slice(self, **filters) -> "KPICube":
+        """Restrict axes to the given labels, e.g. ``slice(City="Delhi", Brand=["Bingo!", "Sunfeast"])``.
+
+        ``None`` or the "All ..." selectbox label leaves an axis untouched.
+        """
+        selectors = {}
+        for axis, value in filters.items():
+            if value is None or value == ALL_LABELS.get(axis):
+                continue
+            positions = self._positions(axis, value)
+            axis = "SKU" if axis == "Brand" else axis
+            selectors[axis] = positions if axis not in selectors else np.intersect1d(selectors[axis], positions)
+        if not selectors:
+            return self
+        index = np.ix_(*(selectors.get(axis, np.arange(n)) for axis, n in zip(AXES, self.shape)))
+        labels = {axis: self.labels[axis][selectors[axis]] if axis in selectors else self.labels[axis] for axis in AXES}
+        sku_brand = self.sku_brand[selectors["SKU"]] if "SKU" in selectors else self.sku_brand
+        return KPICube(labels, self.brands, sku_brand, {name: values[index] for name, values in self.cells.items()})
+
+    def total(self, measure: str) -> float:
+        if measure == "ROAS":
+            count = self.total("ROAS Count")
+            return self.total("ROAS Sum") / count if count else 0.0
+        return float(self.cells[measure].sum(dtype=np.float64))
+
+    def kpis(self) -> dict:
+        sales, spend, conv = self.total("Direct Sales"), self.total("Spend"), int(round(self.total("Conversions")))
+        return {"sales": sales, "spend": spend, "conv": conv, "roas": sales / spend if spend > 0 else 0, "cpa": spend / conv if conv > 0 else 0}
+
+    def reduce(self, axes: tuple, measure: str) -> tuple:
+        """Sum ``measure`` onto ``axes`` (Brand allowed in place of SKU); returns (array, labels per axis)."""
+        kept = ["SKU" if axis == "Brand" else axis for axis in axes]
+        drop = tuple(i for i, axis in enumerate(AXES) if axis not in kept)
+        values = self.cells[measure].sum(axis=drop, dtype=np.float64)
+        remaining = [axis for axis in AXES if axis in kept]
+        labels = [self.labels[axis] for axis in remaining]
+        if "Brand" in axes:
+            at = remaining.index("SKU")
+            present = np.unique(self.sku_brand[self.sku_brand >= 0])
+            membership = (self.sku_brand[:, None] == present[None, :]).astype(np.float64)
+            rolled = np.tensordot(np.moveaxis(values, at, -1), membership, axes=1)
+            values, labels[at], remaining[at] = np.moveaxis(rolled, -1, at), self.brands[present], "Brand"
+        order = [remaining.index(axis) for axis in axes]
+        return np.transpose(values, order), [labels[i] for i in order]
+
+    def by(self, axis: str, measures) -> pd.DataFrame:
+        """Group by one axis (or Brand); ``ROAS`` is the row-weighted mean. Labels without rows are dropped."""
+        counts, (labels,) = self.reduce((axis,), "ROAS Count")
+        out = {}
+        for measure in measures:
+            if measure == "ROAS":
+                sums, _ = self.reduce((axis,), "ROAS Sum")
+                out[measure] = np.divide(sums, counts, out=np.full(len(counts), np.nan), where=counts > 0)
+            else:
+                out[measure] = self.reduce((axis,), measure)[0]
+        frame = pd.DataFrame(out, index=pd.Index(labels, name=axis))
+        return frame[counts > 0]
+
+    def pivot(self, index: str, columns: str, measure: str = "ROAS") -> pd.DataFrame:
+        """Two-axis table like ``pivot_table``; ROAS cells are means, empty cells NaN, empty rows/columns dropped."""
+        counts, (row_labels, col_labels) = self.reduce((index, columns), "ROAS Count")
+        if measure == "ROAS":
+            sums, _ = self.reduce((index, columns), "ROAS Sum")
+            values = np.divide(sums, counts, out=np.full(counts.shape, np.nan), where=counts > 0)
+        else:
+            values = np.where(counts > 0, self.reduce((index, columns), measure)[0], np.nan)
+        table = pd.DataFrame(values, index=pd.Index(row_labels, name=index), columns=pd.Index(col_labels, name=columns))
+        return table.loc[counts.sum(axis=1) > 0, counts.sum(axis=0) > 0]
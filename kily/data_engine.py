@@ -0,0 +1,111 @@
+"""Vectorized synthetic campaign data generator.
+
+Every day of data is drawn from its own seeded stream, so a given (seed, mode, day)
+always produces the same rows no matter how large the surrounding window is.
+"""
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+from kily.schema import BRANDS_SKUS, CITIES, COLUMNS, DAYPART_ORDER, DAYPARTS, MEASURE_DTYPES, PLATFORMS, categorical, dimension_categories
+
+MODE_CONFIG = {"old_way": {"roas_mean": 1.8, "roas_std": 0.8, "oos_prob": 0.10, "cvr_lift": 0.0, "content_score_range": (4, 7)}, "kily_way": {"roas_mean": 2.8, "roas_std": 0.4, "oos_prob": 0.005, "cvr_lift": 0.15, "content_score_range": (8, 11)}}
+DEFAULT_SEED = 42
+
+
+@dataclass(frozen=True)
+class DataScale:
+    """Size of the generated grid: history length plus synthetic extra SKUs (per brand), cities and platforms."""
+    days: int = 30
+    extra_skus: int = 0
+    extra_cities: int = 0
+    extra_platforms: int = 0
+
+    @classmethod
+    def parse(cls, spec: str) -> "DataScale":
+        """Parse a spec such as ``"days=365,extra_skus=8,extra_cities=15"``; an empty spec is the default scale."""
+        names = {f.name for f in fields(cls)}
+        values = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            key, _, value = item.partition("=")
+            if key.strip() not in names:
+                raise ValueError(f"Unknown data scale field '{key.strip()}' (expected one of {sorted(names)})")
+            values[key.strip()] = int(value)
+        return cls(**values)
+
+    def dimensions(self):
+        brands_skus = {brand: skus + [f"{brand} Variant {i + 1}" for i in range(self.extra_skus)] for brand, skus in BRANDS_SKUS.items()}
+        platforms = PLATFORMS + [f"Platform {len(PLATFORMS) + i + 1}" for i in range(self.extra_platforms)]
+        cities = CITIES + [f"City {len(CITIES) + i + 1}" for i in range(self.extra_cities)]
+        return brands_skus, platforms, cities, DAYPARTS
+
+    @property
+    def rows_per_day(self) -> int:
+        brands_skus, platforms, cities, dayparts = self.dimensions()
+        return sum(map(len, brands_skus.values())) * len(platforms) * len(cities) * len(dayparts)
+
+    @property
+    def rows(self) -> int:
+        return self.days * self.rows_per_day
+
+
+def mode_name(is_kily_activated: bool) -> str:
+    return "kily_way" if is_kily_activated else "old_way"
+
+
+def day_rng(seed: int, is_kily_activated: bool, day: pd.Timestamp) -> np.random.Generator:
+    return np.random.default_rng([seed, int(is_kily_activated), pd.Timestamp(day).toordinal()])
+
+
+def _grid(scale: DataScale):
+    # Per-day cartesian grid in the historic loop order: brand > sku > platform > city > daypart.
+    brands_skus, platforms, cities, dayparts = scale.dimensions()
+    brand_of_sku = np.repeat(np.arange(len(brands_skus)), [len(skus) for skus in brands_skus.values()])
+    n_s, n_p, n_c, n_d = len(brand_of_sku), len(platforms), len(cities), len(dayparts)
+    sku_codes = np.repeat(np.arange(n_s), n_p * n_c * n_d)
+    daypart_codes = np.asarray([DAYPART_ORDER.index(d) for d in dayparts])
+    codes = {
+        "Brand": brand_of_sku[sku_codes],
+        "SKU": sku_codes,
+        "Platform": np.tile(np.repeat(np.arange(n_p), n_c * n_d), n_s),
+        "City": np.tile(np.repeat(np.arange(n_c), n_d), n_s * n_p),
+        "Daypart": np.tile(daypart_codes, n_s * n_p * n_c),
+    }
+    return codes, dimension_categories(brands_skus, platforms, cities), len(sku_codes)
+
+
+def _draw_day(rng: np.random.Generator, n: int, cfg: dict, out: dict, sl: slice):
+    daily_volatility = rng.uniform(0.85, 1.15)
+    base_roas = rng.normal(cfg["roas_mean"], cfg["roas_std"], n)
+    spend = rng.uniform(500, 5000, n) * daily_volatility
+    effective_cvr = rng.uniform(0.02, 0.10, n) * (1 + cfg["cvr_lift"])
+    impressions = rng.integers(2500, 40000, n)
+    clicks = (impressions * rng.uniform(0.005, 0.05, n)).astype(np.int64)
+    roas = np.maximum(0.5, base_roas + rng.normal(0, 0.15, n))
+    out["Spend"][sl] = spend
+    out["Impressions"][sl] = impressions
+    out["Clicks"][sl] = clicks
+    out["Conversions"][sl] = (clicks * effective_cvr).astype(np.int64)
+    out["Direct Sales"][sl] = spend * roas
+    out["ROAS"][sl] = roas
+    out["Is OOS"][sl] = rng.random(n) < cfg["oos_prob"]
+    out["Content Score"][sl] = rng.integers(*cfg["content_score_range"], n)
+
+
+def generate_campaign_data(is_kily_activated: bool, seed: int = DEFAULT_SEED, scale: DataScale = DataScale(), end=None) -> pd.DataFrame:
+    """Build the full Date x SKU x Platform x City x Daypart grid, drawing each column as one array per day.
+
+    The frame comes back in the compact schema of ``kily.schema`` (categorical dimensions, narrow measures).
+    """
+    cfg = MODE_CONFIG[mode_name(is_kily_activated)]
+    dates = pd.date_range(end=pd.Timestamp.now().normalize() if end is None else pd.Timestamp(end).normalize(), periods=scale.days)
+    codes, categories, n_day = _grid(scale)
+    n = n_day * len(dates)
+    measures = {name: np.empty(n, dtype=dtype) for name, dtype in MEASURE_DTYPES.items()}
+    for i, day in enumerate(dates):
+        _draw_day(day_rng(seed, is_kily_activated, day), n_day, cfg, measures, slice(i * n_day, (i + 1) * n_day))
+    columns = {"Date": np.repeat(dates.values, n_day)}
+    columns.update({name: categorical(np.tile(day_codes, len(dates)), categories[name]) for name, day_codes in codes.items()})
+    columns.update(measures)
+    return pd.DataFrame(columns, columns=COLUMNS)
@@ -0,0 +1,150 @@
+"""Process-wide, read-only store of versioned campaign datasets.
+
+Frames are published once per version with every column backed by a read-only array, and are
+handed out as shallow views, so all sessions and reruns share one copy of the data: in-place
+writes raise, and column assignments only ever touch the caller's view. Publishing a new version
+swaps it in atomically; the old version stays alive until the last lease on it is released.
+"""
+import threading
+import weakref
+
+import pandas as pd
+
+
+def freeze_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Zero-copy twin of ``frame`` whose columns sit on read-only arrays."""
+    columns = {}
+    for name in frame.columns:
+        col = frame[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            columns[name] = pd.Categorical.from_codes(col.array.codes, dtype=col.dtype, validate=False)
+        else:
+            values = col.to_numpy().view()
+            values.flags.writeable = False
+            columns[name] = values
+    return pd.DataFrame(columns, index=frame.index, copy=False)
+
+
+class Dataset:
+    """One immutable version: named frames plus derived artifacts built lazily, once, per version."""
+
+    def __init__(self, version: int, frames: dict, artifacts: dict = None, label: str = ""):
+        self.version, self.label = version, label
+        self._frames = {name: freeze_frame(frame) for name, frame in frames.items()}
+        self._artifacts = dict(artifacts or {})
+        self._building = {}
+        self._lock = threading.Lock()
+        self.refcount = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self._artifacts
+
+    @property
+    def frame_names(self) -> tuple:
+        return tuple(self._frames)
+
+    def frame(self, name: str) -> pd.DataFrame:
+        return self._frames[name].copy(deep=False)
+
+    @property
+    def rows(self) -> int:
+        return sum(len(frame) for frame in self._frames.values())
+
+    def artifact(self, key, builder):
+        """Return the artifact ``key``, calling ``builder()`` at most once per version even under concurrent reruns."""
+        with self._lock:
+            if key in self._artifacts:
+                return self._artifacts[key]
+            event = self._building.get(key)
+            if event is None:
+                event = self._building[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            event.wait()
+            return self.artifact(key, builder)
+        try:
+            value = builder()
+            with self._lock:
+                self._artifacts[key] = value
+            return value
+        finally:
+            with self._lock:
+                del self._building[key]
+            event.set()
+
+    def release_artifacts(self):
+        with self._lock:
+            self._artifacts.clear()
+
+
+class Lease:
+    """A reference on one dataset version; released explicitly or when garbage collected (e.g. a closed session)."""
+
+    def __init__(self, store: "DatasetStore", dataset: Dataset):
+        self.dataset = dataset
+        self._finalizer = weakref.finalize(self, store._release, dataset)
+
+    def release(self):
+        self._finalizer()
+
+
+class DatasetStore:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._current = None
+        self._live = {}  # version -> Dataset still referenced by a lease (or current)
+        self._next_version = 1
+
+    @property
+    def current(self) -> Dataset:
+        return self._current
+
+    def publish(self, frames: dict, artifacts: dict = None, label: str = "") -> Dataset:
+        """Install a new version; readers holding the previous one keep it until they release."""
+        with self._lock:
+            dataset = Dataset(self._next_version, frames, artifacts, label)
+            self._next_version += 1
+            previous, self._current = self._current, dataset
+            self._live[dataset.version] = dataset
+            if previous is not None:
+                self._retire_if_unused(previous)
+            return dataset
+
+    def publish_if(self, stale, build) -> Dataset:
+        """Single-flight publish: ``build()`` -> (frames, artifacts, label) runs only while ``stale(current)`` holds."""
+        with self._lock:
+            if self._current is None or stale(self._current):
+                self.publish(*build())
+            return self._current
+
+    def acquire(self) -> Lease:
+        with self._lock:
+            if self._current is None:
+                raise LookupError("No dataset has been published yet")
+            self._current.refcount += 1
+            return Lease(self, self._current)
+
+    def lease_for(self, holder: dict, key: str = "dataset_lease") -> Dataset:
+        """Keep ``holder[key]`` (e.g. ``st.session_state``) leased on the current version and return that version."""
+        lease = holder.get(key)
+        if lease is None or lease.dataset is not self._current:
+            holder[key] = self.acquire()
+            if lease is not None:
+                lease.release()
+        return holder[key].dataset
+
+    def _release(self, dataset: Dataset):
+        with self._lock:
+            dataset.refcount -= 1
+            self._retire_if_unused(dataset)
+
+    def _retire_if_unused(self, dataset: Dataset):
+        if dataset is not self._current and dataset.refcount <= 0:
+            self._live.pop(dataset.version, None)
+            dataset.release_artifacts()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"current_version": self._current.version if self._current else None, "live_versions": {version: dataset.refcount for version, dataset in self._live.items()}}
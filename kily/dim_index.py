@@ -0,0 +1,111 @@
+"""Positional index over the dimension columns of a campaign frame.
+
+For every dimension the row positions are stored grouped by value (one stable argsort plus
+offsets), so the rows of a value are a contiguous, already-sorted slice of that array. Multi
+dimension filters start from the smallest candidate set and either probe the other dimensions'
+codes at those positions or, when every candidate set is large, AND packed per-value bitmaps.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+INDEXED = ("Brand", "SKU", "Platform", "City", "Daypart", "Is OOS", "Content Score")
+
+
+class DimensionIndex:
+    def __init__(self, frame: pd.DataFrame, dims=INDEXED):
+        self.n = len(frame)
+        self.labels, self.codes, self._order, self._offsets = {}, {}, {}, {}
+        self._bitmaps, self._pairs, self._lock = {}, {}, threading.Lock()
+        for dim in dims:
+            col = frame[dim]
+            if isinstance(col.dtype, pd.CategoricalDtype):
+                labels, codes = col.cat.categories, col.cat.codes.to_numpy()
+            else:
+                codes, labels = pd.factorize(col, sort=True)
+            order = np.argsort(codes, kind="stable").astype(np.int64)
+            self.labels[dim], self.codes[dim], self._order[dim] = pd.Index(labels), codes, order
+            self._offsets[dim] = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+            order.flags.writeable = False
+
+    @classmethod
+    def from_arrays(cls, n: int, labels: dict, arrays: dict) -> "DimensionIndex":
+        """Index over the ``arrays()`` of an index built elsewhere (e.g. memory-mapped from another process); nothing is sorted again."""
+        index = cls.__new__(cls)
+        index.n, index.labels = n, {dim: pd.Index(values) for dim, values in labels.items()}
+        index.codes = {dim: parts["codes"] for dim, parts in arrays.items()}
+        index._order = {dim: parts["order"] for dim, parts in arrays.items()}
+        index._offsets = {dim: parts["offsets"] for dim, parts in arrays.items()}
+        index._bitmaps, index._pairs, index._lock = {}, {}, threading.Lock()
+        return index
+
+    def arrays(self) -> dict:
+        """The codes, grouped row positions and offsets of every dimension, e.g. to publish the index to other processes."""
+        return {dim: {"codes": self.codes[dim], "order": self._order[dim], "offsets": self._offsets[dim]} for dim in self.labels}
+
+    def _code_list(self, dim: str, value) -> np.ndarray:
+        values = [value] if isinstance(value, (str, bool, np.bool_)) or not np.iterable(value) else list(value)
+        codes = self.labels[dim].get_indexer(values)
+        return np.unique(codes[codes >= 0])
+
+    def _rows(self, dim: str, codes: np.ndarray) -> np.ndarray:
+        offsets, order = self._offsets[dim], self._order[dim]
+        if len(codes) == 1:
+            return order[offsets[codes[0]]:offsets[codes[0] + 1]]  # read-only view, no copy
+        return np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in codes])) if len(codes) else np.empty(0, np.int64)
+
+    def _bitmap(self, dim: str, code: int) -> np.ndarray:
+        key = (dim, code)
+        with self._lock:
+            if key not in self._bitmaps:
+                mask = np.zeros(self.n, dtype=bool)
+                mask[self._rows(dim, np.asarray([code]))] = True
+                self._bitmaps[key] = np.packbits(mask)
+            return self._bitmaps[key]
+
+    def positions(self, **filters) -> np.ndarray:
+        """Ascending row positions matching every filter; each value may be a label or a list of labels (OR).
+
+        Dimension names with spaces are passed as ``**{"Is OOS": True}``.
+        """
+        if not filters:
+            return np.arange(self.n)
+        wanted = {dim: self._code_list(dim, value) for dim, value in filters.items()}
+        sizes = {dim: int(sum(self._offsets[dim][c + 1] - self._offsets[dim][c] for c in codes)) for dim, codes in wanted.items()}
+        lead = min(sizes, key=sizes.get)
+        if len(wanted) == 1 or sizes[lead] * len(wanted) <= self.n // 8:
+            rows = self._rows(lead, wanted[lead])
+            for dim, codes in wanted.items():
+                if dim != lead:
+                    rows = rows[np.isin(self.codes[dim][rows], codes)]
+            return rows
+        bits = None
+        for dim, codes in wanted.items():
+            dim_bits = np.bitwise_or.reduce([self._bitmap(dim, int(c)) for c in codes]) if len(codes) else np.zeros((self.n + 7) // 8, np.uint8)
+            bits = dim_bits if bits is None else bits & dim_bits
+        return np.flatnonzero(np.unpackbits(bits, count=self.n))
+
+    def count(self, **filters) -> int:
+        return len(self.positions(**filters))
+
+    def take(self, frame: pd.DataFrame, **filters) -> pd.DataFrame:
+        """Rows of ``frame`` (the indexed frame) matching ``filters``: an ``iloc`` view when they are contiguous."""
+        rows = self.positions(**filters)
+        if len(rows) == 0 or rows[-1] - rows[0] + 1 == len(rows):
+            return frame.iloc[rows[0]:rows[-1] + 1] if len(rows) else frame.iloc[:0]
+        return frame.take(rows)
+
+    def values(self, dim: str, **filters) -> list:
+        """Labels of ``dim`` present in the matching rows, in category order (e.g. the SKUs of a brand)."""
+        if len(filters) == 1:
+            (other, value), = filters.items()
+            key = (other, dim)
+            with self._lock:
+                if key not in self._pairs:
+                    pairs = np.unique(self.codes[other].astype(np.int64) * len(self.labels[dim]) + self.codes[dim])
+                    self._pairs[key] = (pairs // len(self.labels[dim]), pairs % len(self.labels[dim]))
+                parents, children = self._pairs[key]
+            return list(self.labels[dim][np.unique(children[np.isin(parents, self._code_list(other, value))])])
+        codes = self.codes[dim] if not filters else self.codes[dim][self.positions(**filters)]
+        return list(self.labels[dim][np.unique(codes)])
@@ -0,0 +1,108 @@
+"""Kily Efficiency Score: ROAS, OOS prevention, content quality and CPA combined into one 0-100 number.
+
+Every component is a ratio of additive cube measures, so the score of any slice (a single
+Date x SKU x Platform x City x Daypart cell, a filtered range, the whole dataset) is taken from
+its summed measures rather than by averaging finer scores. Scores are computed for all cells at
+once with array operations; ``worst_slices`` ranks them with a partial selection.
+"""
+import numpy as np
+import pandas as pd
+
+from kily.cube import AXES, KPICube
+
+WEIGHTS = {"ROAS": 0.35, "OOS Prevention": 0.20, "Content Quality": 0.25, "CPA": 0.20}
+ROAS_TARGET = 3.5  # blended ROAS that earns the full ROAS component
+OOS_TOLERANCE = 0.15  # share of out-of-stock rows that earns nothing
+CONTENT_MAX = 10.0
+CPA_TARGET, CPA_CEILING = 40.0, 120.0  # full marks at or below the target, none at or above the ceiling
+SCORE_MEASURES = ("Direct Sales", "Spend", "Conversions", "ROAS Count", "OOS Count", "Content Sum")
+SLICE_AXES = ("SKU", "Platform", "City", "Daypart")
+
+
+def _ratio(num, den, fill):
+    return np.divide(num, den, out=np.full(np.broadcast(num, den).shape, fill, dtype=np.result_type(num, den, np.float32)), where=den > 0)
+
+
+def components(sums: dict) -> dict:
+    """0-1 component scores from arrays (or scalars) of the summed ``SCORE_MEASURES``; float32 cells stay float32."""
+    sales, spend, conv, rows, oos, content = (np.asarray(sums[name]) for name in SCORE_MEASURES)
+    cpa = _ratio(spend, conv, np.inf)  # spend without a conversion earns nothing
+    return {
+        "ROAS": np.clip(_ratio(sales, spend * ROAS_TARGET, 0.0), 0, 1),
+        "OOS Prevention": np.clip(1 - _ratio(oos, rows * OOS_TOLERANCE, 0.0), 0, 1),
+        "Content Quality": np.clip(_ratio(content, rows * CONTENT_MAX, 0.0), 0, 1),
+        "CPA": np.where(spend > 0, np.clip((CPA_CEILING - cpa) / (CPA_CEILING - CPA_TARGET), 0, 1), 1),
+    }
+
+
+def score(sums: dict):
+    """Weighted 0-100 score from summed measures; NaN where there are no rows."""
+    total = sum(WEIGHTS[name] * value for name, value in components(sums).items())
+    return np.where(np.asarray(sums["ROAS Count"]) > 0, 100 * total, np.nan)
+
+
+def cube_score(cube: KPICube) -> float:
+    """Score of everything in ``cube``, e.g. the Orchestrator's filtered range."""
+    return float(score({name: cube.total(name) for name in SCORE_MEASURES}))
+
+
+def cell_scores(cube: KPICube) -> np.ndarray:
+    """Score of every cell, shaped like the cube: each slice on each day."""
+    return score(cube.cells)
+
+
+def slice_scores(cube: KPICube, axes=SLICE_AXES):
+    """Score of every slice over ``axes`` with the other axes (by default only Date) summed out; returns (scores, sums, labels)."""
+    sums = {}
+    for name in SCORE_MEASURES:
+        sums[name], labels = cube.reduce(axes, name)
+    return score(sums), sums, labels
+
+
+def worst_slices(cube: KPICube, n: int = 10, axes=SLICE_AXES) -> pd.DataFrame:
+    """The ``n`` lowest-scoring slices, worst first, with their components; found by ``argpartition``, not a full sort."""
+    scores, sums, labels = slice_scores(cube, axes)
+    flat = scores.ravel()
+    ranked = np.where(np.isnan(flat), np.inf, flat)
+    n = min(n, int(np.isfinite(ranked).sum()))
+    if n == 0:
+        return pd.DataFrame(columns=list(axes) + ["Score"] + list(WEIGHTS))
+    picked = np.argpartition(ranked, n - 1)[:n] if n < len(ranked) else np.arange(len(ranked))
+    picked = picked[np.argsort(ranked[picked], kind="stable")]
+    positions = np.unravel_index(picked, scores.shape)
+    out = {axis: np.asarray(axis_labels)[at] for axis, axis_labels, at in zip(axes, labels, positions)}
+    if "SKU" in axes and "Brand" not in axes:
+        sku_positions = cube.labels["SKU"].get_indexer(out["SKU"])
+        out = {"Brand": np.asarray(cube.brands)[cube.sku_brand[sku_positions]], **out}
+    out["Score"] = flat[picked]
+    parts = components({name: values.ravel()[picked] for name, values in sums.items()})
+    out.update({name: 100 * values for name, values in parts.items()})
+    out["Spend"] = sums["Spend"].ravel()[picked]
+    return pd.DataFrame(out)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    from kily.data_engine import DEFAULT_SEED, DataScale
+    from kily.data_sources import source_from_env
+
+    parser = argparse.ArgumentParser(description="Time the Kily Efficiency Score over every cell and slice of a generated dataset.")
+    parser.add_argument("--scale", default="days=730,extra_skus=8,extra_cities=6", help="DataScale spec; the default is about 10M rows")
+    parser.add_argument("--worst", type=int, default=10)
+    args = parser.parse_args()
+    scale = DataScale.parse(args.scale)
+    report = {"rows": scale.rows, "cells": None, "axes": list(AXES)}
+    for is_kily in (True, False):
+        cube = KPICube.from_frame(source_from_env(seed=DEFAULT_SEED, scale=scale).load(is_kily))
+        report["cells"] = int(np.prod(cube.shape))
+        started = time.perf_counter()
+        per_cell = cell_scores(cube)
+        cells_s = time.perf_counter() - started
+        started = time.perf_counter()
+        worst = worst_slices(cube, args.worst)
+        worst_s = time.perf_counter() - started
+        report["kily" if is_kily else "old"] = {"score": round(cube_score(cube), 1), "cell_scores_s": round(cells_s, 3), "worst_slices_s": round(worst_s, 3), "scored_cells": int(np.isfinite(per_cell).sum()), "worst": worst.head(3).round(1).astype(str).to_dict("records")}
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,80 @@
+"""Byte-bounded LRU cache for Plotly figures and Largest-Triangle-Three-Buckets downsampling."""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def _as_float(x) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.number):
+        return x.astype(np.float64)
+    return pd.to_datetime(x).asi8.astype(np.float64)  # dates / timestamps
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """Indices of the ``n_out`` points LTTB keeps from the series ``(x, y)``; first and last points always survive."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 buckets between the end points
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(frame: pd.DataFrame, x: str, y: str, max_points: int) -> pd.DataFrame:
+    """``frame`` reduced to at most ``max_points`` rows of the ``y`` over ``x`` line (unchanged when already small)."""
+    if len(frame) <= max_points:
+        return frame
+    return frame.iloc[lttb(frame[x].to_numpy(), frame[y].to_numpy(), max_points)]
+
+
+def figure_nbytes(fig) -> int:
+    return len(fig.to_json())
+
+
+class FigureCache:
+    """LRU of built figures keyed by (dataset version, chart, filter state), evicted to stay under ``max_bytes``."""
+
+    def __init__(self, max_bytes: int = 64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.nbytes = self.hits = self.misses = 0
+        self._entries = OrderedDict()  # key -> (figure, size)
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+        fig = build()
+        size = figure_nbytes(fig)
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (fig, size)
+                self.nbytes += size
+                while self.nbytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.nbytes -= evicted
+        return fig
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.nbytes, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,208 @@
+"""Rolling, day-partitioned campaign dataset maintained in place.
+
+The window's rows and its day KPI cube live in preallocated arrays stacked along rows and along the
+Date axis. A refresh writes the days that arrived past the live range and expires old days by moving
+its start, so publishing a day costs one day of rows and cells, plus an occasional compaction that
+copies the live range into fresh arrays. Frames and cubes handed out earlier are views of ranges that
+are never written again, so published versions stay valid. The week/month rollups are updated by
+adding the new days' cells and subtracting the expired ones.
+"""
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from kily.cube import AXES, KPICube
+from kily.timeline import period_start
+
+ROLLUP_FREQS = ("W", "M")
+SLACK = 4  # spare capacity of 1/SLACK of the live range, so one compaction pays for many appended days
+
+
+@dataclass
+class DayPartition:
+    day: pd.Timestamp
+    rows: int
+
+
+class _Stack:
+    """Named arrays stacked along their first axis, live in [start, stop), with spare capacity past stop."""
+
+    def __init__(self):
+        self.arrays, self.start, self.stop = {}, 0, 0
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def extend(self, chunk: dict):
+        n = len(next(iter(chunk.values())))
+        capacity = len(next(iter(self.arrays.values()))) if self.arrays else 0
+        if self.stop + n > capacity:
+            # Compact into fresh arrays; views of the old ones (published versions) keep them alive.
+            live = len(self)
+            size = live + n + (live + n) // SLACK
+            grown = {}
+            for name, values in chunk.items():
+                grown[name] = np.empty((size,) + values.shape[1:], dtype=values.dtype)
+                grown[name][:live] = self.arrays[name][self.start:self.stop] if name in self.arrays else 0
+            self.arrays, self.start, self.stop = grown, 0, live
+        for name, values in chunk.items():
+            self.arrays[name][self.stop:self.stop + n] = values
+        self.stop += n
+
+    def drop(self, n: int):
+        self.start += n
+
+    def view(self) -> dict:
+        return {name: values[self.start:self.stop] for name, values in self.arrays.items()}
+
+
+class RollingDataset:
+    def __init__(self, source, is_kily_activated: bool, window_days: int = 30):
+        self.source, self.is_kily_activated, self.window_days = source, is_kily_activated, window_days
+        self.end = None
+        self.version = 0
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.partitions = {}  # day -> DayPartition, in day order, matching the stacked rows and Date cells
+        self.rollups = {freq: {} for freq in ROLLUP_FREQS}  # freq -> {period start: [days, {measure: float64 cells}]}
+        self._rows, self._cells = _Stack(), _Stack()
+        self._dtypes = {}  # column -> dtype; categorical columns are stacked as codes
+        self._axes, self._dates_dtype = None, None  # non-Date cube labels and brands, fixed by the categories
+        self._brand_of_sku = self._sku_rows = None
+        self._frame, self._cubes = None, {}
+
+    # --- partition maintenance -------------------------------------------------------------
+    def _add(self, day, cells: dict, sign: int):
+        for freq, buckets in self.rollups.items():
+            period = period_start([day], freq)[0]
+            bucket = buckets.setdefault(period, [0, {name: np.zeros(values.shape) for name, values in cells.items()}])
+            bucket[0] += sign
+            for name, values in cells.items():
+                bucket[1][name] += sign * values
+            if not bucket[0]:
+                del buckets[period]
+
+    def _fits(self, frame: pd.DataFrame) -> bool:
+        """Whether ``frame`` can be appended in place: only later days, known columns and categories."""
+        if not self.partitions:
+            return True
+        if set(frame.columns) != set(self._dtypes) or frame["Date"].min().normalize() <= next(reversed(self.partitions)):
+            return False
+        return all(frame[name].cat.categories.isin(dtype.categories).all() for name, dtype in self._dtypes.items() if isinstance(dtype, pd.CategoricalDtype))
+
+    def _columns(self, frame: pd.DataFrame) -> dict:
+        columns = {}
+        for name in frame.columns:
+            col = frame[name]
+            dtype = self._dtypes.setdefault(name, col.dtype)
+            if isinstance(dtype, pd.CategoricalDtype):
+                columns[name] = (col if col.dtype == dtype else col.cat.set_categories(dtype.categories)).cat.codes.to_numpy()
+            else:
+                columns[name] = col.to_numpy(dtype)
+        return columns
+
+    def _as_frame(self, columns: dict) -> pd.DataFrame:
+        return pd.DataFrame({name: pd.Categorical.from_codes(values, dtype=self._dtypes[name], validate=False) if isinstance(self._dtypes[name], pd.CategoricalDtype) else values for name, values in columns.items()}, copy=False)
+
+    def _extend(self, frame: pd.DataFrame):
+        """Write the rows and day cells of days after the window's last one past the live range."""
+        days = frame["Date"].dt.normalize()
+        if not days.is_monotonic_increasing:
+            frame = frame.take(np.argsort(days.to_numpy(), kind="stable")).reset_index(drop=True)
+        columns = self._columns(frame)
+        cube = KPICube.from_frame(self._as_frame(columns))
+        axes = ({axis: cube.labels[axis] for axis in AXES[1:]}, cube.brands)
+        if self._axes is None:
+            self._axes, self._dates_dtype = axes, cube.labels["Date"].dtype
+            self._brand_of_sku, self._sku_rows = cube.sku_brand.copy(), np.zeros(len(cube.sku_brand))
+        elif any(not axes[0][axis].equals(self._axes[0][axis]) for axis in AXES[1:]) or not axes[1].equals(self._axes[1]):
+            raise ValueError("Cannot append days whose SKU/Platform/City/Daypart labels differ from the window's")
+        self._rows.extend(columns)
+        self._cells.extend(cube.cells)
+        rows = cube.cells["ROAS Count"]
+        np.maximum(self._brand_of_sku, cube.sku_brand, out=self._brand_of_sku)
+        self._sku_rows += rows.sum(axis=(0, 2, 3, 4), dtype=np.float64)
+        for at, (day, count) in enumerate(zip(cube.labels["Date"], rows.sum(axis=(1, 2, 3, 4), dtype=np.float64))):
+            self.partitions[day] = DayPartition(day, int(count))
+            self._add(day, {name: values[at] for name, values in cube.cells.items()}, +1)
+
+    def _rebuild(self, frame: pd.DataFrame):
+        """Restack the window with ``frame``'s days replaced or inserted; for out-of-order days and new categories."""
+        old = self.frame() if self.partitions else frame.iloc[:0]
+        old, frame = old[~old["Date"].dt.normalize().isin(frame["Date"].dt.normalize().unique())], frame.copy(deep=False)
+        for name, dtype in self._dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype) and isinstance(frame[name].dtype, pd.CategoricalDtype) and frame[name].dtype != dtype:
+                union = dtype.categories.append(frame[name].cat.categories.difference(dtype.categories, sort=False))
+                old[name], frame[name] = old[name].cat.set_categories(union), frame[name].cat.set_categories(union)
+        combined = pd.concat([old, frame], ignore_index=True)
+        self._reset()
+        self._extend(combined)
+
+    def _append_frame(self, frame: pd.DataFrame):
+        if len(frame):
+            self._extend(frame) if self._fits(frame) else self._rebuild(frame)
+            self._changed()
+
+    def append(self, day, frame: pd.DataFrame):
+        """Add (or replace) the partition for ``day``; a day after the window's last one only costs its own rows."""
+        with self._lock:
+            self._append_frame(frame[frame["Date"].dt.normalize() == pd.Timestamp(day).normalize()])
+
+    def expire(self, before):
+        """Drop every partition older than ``before``, subtracting it from the rollups."""
+        with self._lock:
+            stale = [day for day in self.partitions if day < pd.Timestamp(before).normalize()]
+            if stale:
+                cells = self._cells.view()
+                for at, day in enumerate(stale):
+                    self._add(day, {name: values[at] for name, values in cells.items()}, -1)
+                self._sku_rows -= cells["ROAS Count"][:len(stale)].sum(axis=(0, 2, 3, 4), dtype=np.float64)
+                self._rows.drop(sum(self.partitions.pop(day).rows for day in stale))
+                self._cells.drop(len(stale))
+                self._changed()
+            return stale
+
+    def _changed(self):
+        self._frame, self._cubes = None, {}
+        self.version += 1
+
+    def refresh(self, end=None) -> list:
+        """Slide the window so it ends at ``end`` (default today): expire the old days, load the missing ones."""
+        end = pd.Timestamp.now().normalize() if end is None else pd.Timestamp(end).normalize()
+        with self._lock:
+            if end == self.end:
+                return []
+            start = end - pd.Timedelta(days=self.window_days - 1)
+            self.expire(start)
+            missing = [day for day in pd.date_range(start, end) if day not in self.partitions]
+            if missing:
+                frame = self.source.load(self.is_kily_activated, dates=(missing[0], missing[-1]))
+                self._append_frame(frame[frame["Date"].dt.normalize().isin(missing)].reset_index(drop=True))
+            self.end = end
+            return missing
+
+    # --- read side --------------------------------------------------------------------------
+    def frame(self) -> pd.DataFrame:
+        """The whole window as one frame of views into the stacked columns."""
+        with self._lock:
+            if self._frame is None:
+                self._frame = self._as_frame(self._rows.view()) if self.partitions else pd.DataFrame()
+            return self._frame
+
+    def cube(self, freq: str = "D") -> KPICube:
+        """KPI cube of the window: views of the stacked day cells ("D") or the week/month rollups ("W"/"M",
+        Date = period start) stacked without touching raw rows."""
+        with self._lock:
+            if freq not in self._cubes:
+                labels = dict(self._axes[0], Date=pd.DatetimeIndex(list(self.partitions), dtype=self._dates_dtype))
+                day = KPICube(labels, self._axes[1], np.where(self._sku_rows > 0, self._brand_of_sku, -1), self._cells.view())
+                if freq != "D":
+                    buckets = sorted(self.rollups[freq].items())
+                    cells = {name: np.stack([sums[name] for _, (_, sums) in buckets]).reshape((len(buckets),) + day.shape[1:]).astype(np.float32) for name in day.cells}
+                    day = KPICube(dict(day.labels, Date=pd.DatetimeIndex([period for period, _ in buckets])), day.brands, day.sku_brand, cells)
+                self._cubes[freq] = day
+            return self._cubes[freq]
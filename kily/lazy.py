@@ -0,0 +1,37 @@
+"""Deferred imports for heavy optional-at-startup modules.
+
+``lazy_import(name)`` returns a proxy that imports ``name`` on its first attribute access, so a
+page that never draws a chart never pays for Plotly. Every import resolved this way is timed in
+``IMPORT_TIMES`` for the startup report.
+"""
+import importlib
+import threading
+import time
+
+IMPORT_TIMES = {}  # module name -> milliseconds spent importing it on first use
+_lock = threading.Lock()
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self):
+        with _lock:
+            if self._module is None:
+                started = time.perf_counter()
+                module = importlib.import_module(self._name)
+                IMPORT_TIMES[self._name] = (time.perf_counter() - started) * 1e3
+                object.__setattr__(self, "_module", module)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r} ({'loaded' if self._module is not None else 'not loaded'})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -0,0 +1,167 @@
+"""Streaming out-of-stock detector over inventory/spend events.
+
+Events arrive as batches of ``EVENT_DTYPE`` records from any iterable: ``dataset_events`` replays a
+campaign frame (one observation per row, stamped at its daypart's hour) and ``simulated_feed`` is
+a synthetic high-rate stand-in for a live inventory feed. State is a handful of flat arrays indexed
+by SKU x Platform x City key; each batch is processed with vectorized segment arithmetic, emitting
+one PAUSE alert when a key goes out of stock and one RESUME alert when it comes back, no matter
+how many OOS observations arrive in between. Wasted spend (spend observed while OOS) is kept as a
+running total per key and in an hourly ring buffer for sliding-window totals.
+
+    python -m kily.oos_stream --events 5000000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+EVENT_DTYPE = np.dtype([("ts", "i8"), ("key", "i4"), ("oos", "?"), ("spend", "f4")])  # ts: epoch seconds
+ALERT_DTYPE = np.dtype([("ts", "i8"), ("key", "i4"), ("pause", "?"), ("spend", "f8")])  # spend: trigger (pause) or episode total (resume)
+DAYPART_HOURS = {"Breakfast": 8, "Lunch": 13, "Snacks": 17, "Dinner": 20}
+KEY_DIMS = ("SKU", "Platform", "City")
+
+
+def event_keys(frame: pd.DataFrame):
+    """(key per row, key labels): one key per SKU x Platform x City, from the categorical codes."""
+    cats = [frame[dim].cat.categories for dim in KEY_DIMS]
+    codes = [frame[dim].cat.codes.to_numpy().astype(np.int32) for dim in KEY_DIMS]
+    keys = (codes[0] * len(cats[1]) + codes[1]) * len(cats[2]) + codes[2]
+    return keys, pd.MultiIndex.from_product(cats, names=KEY_DIMS)
+
+
+def dataset_events(frame: pd.DataFrame, batch_size: int = 8192):
+    """Replay ``frame`` as time-ordered event batches."""
+    keys, _ = event_keys(frame)
+    hours = np.asarray([DAYPART_HOURS.get(str(d), 12) for d in frame["Daypart"].cat.categories], dtype=np.int64)
+    events = np.empty(len(frame), dtype=EVENT_DTYPE)
+    events["ts"] = frame["Date"].dt.normalize().to_numpy().astype("datetime64[s]").astype(np.int64) + hours[frame["Daypart"].cat.codes.to_numpy()] * 3600
+    events["key"], events["oos"], events["spend"] = keys, frame["Is OOS"].to_numpy(), frame["Spend"].to_numpy()
+    events = events[np.argsort(events["ts"], kind="stable")]
+    for start in range(0, len(events), batch_size):
+        yield events[start:start + batch_size]
+
+
+def simulated_feed(n_keys: int, n_events: int, batch_size: int = 65536, oos_prob: float = 0.05, events_per_second: int = 50, seed: int = 0, start_ts: int = 1_700_000_000):
+    """Synthetic feed of ``n_events`` observations across ``n_keys`` keys, ``events_per_second`` apart in time."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_events, batch_size):
+        n = min(batch_size, n_events - start)
+        batch = np.empty(n, dtype=EVENT_DTYPE)
+        batch["ts"] = start_ts + (start + np.arange(n)) // events_per_second
+        batch["key"] = rng.integers(0, n_keys, n)
+        batch["oos"] = rng.random(n) < oos_prob
+        batch["spend"] = rng.gamma(2.0, 500.0, n)
+        yield batch
+
+
+class OOSDetector:
+    def __init__(self, n_keys: int, labels: pd.MultiIndex = None, bucket_seconds: int = 3600, buckets: int = 24 * 7, max_alerts: int = 100_000):
+        self.labels, self.bucket_seconds, self.max_alerts = labels, bucket_seconds, max_alerts
+        self.oos = np.zeros(n_keys, dtype=bool)
+        self.paused_at = np.full(n_keys, -1, dtype=np.int64)
+        self.episode_spend = np.zeros(n_keys)  # wasted spend of each key's open OOS episode
+        self.wasted = np.zeros(n_keys)  # running total per key
+        self.ring = np.zeros((buckets, n_keys))  # wasted spend per (hour bucket mod buckets, key)
+        self.head = None  # newest bucket seen
+        self.events = self.pauses = self.resumes = 0
+        self._alerts = []
+
+    def _advance(self, newest: int):
+        if self.head is None or newest - self.head >= len(self.ring):
+            self.ring[:] = 0
+        elif newest > self.head:
+            self.ring[np.arange(self.head + 1, newest + 1) % len(self.ring)] = 0
+        self.head = newest if self.head is None else max(self.head, newest)
+
+    def process(self, batch: np.ndarray) -> np.ndarray:
+        """Consume one batch of events; returns the batch's alerts in time order."""
+        if len(batch) == 0:
+            return np.empty(0, dtype=ALERT_DTYPE)
+        batch = batch[np.lexsort((batch["ts"], batch["key"]))]
+        key, ts, oos = batch["key"], batch["ts"], batch["oos"]
+        wasted = np.where(oos, batch["spend"].astype(np.float64), 0.0)
+        first = np.empty(len(batch), dtype=bool)
+        first[0], first[1:] = True, key[1:] != key[:-1]
+        prev = np.where(first, self.oos[key], np.roll(oos, 1))
+        change = oos != prev
+        # Segments are runs of one key in one state; a key's first segment continues the episode carried in from earlier batches.
+        starts = np.flatnonzero(first | change)
+        seg_key, seg_oos, seg_change, seg_first = key[starts], oos[starts], change[starts], first[starts]
+        seg_total = np.add.reduceat(wasted, starts) + np.where(seg_first & ~seg_change & seg_oos, self.episode_spend[seg_key], 0.0)
+        closed = np.where(seg_first, self.episode_spend[seg_key], np.roll(seg_total, 1))  # episode ended by a RESUME segment
+        alert_at = seg_change
+        alerts = np.empty(int(alert_at.sum()), dtype=ALERT_DTYPE)
+        alerts["ts"], alerts["key"], alerts["pause"] = ts[starts[alert_at]], seg_key[alert_at], seg_oos[alert_at]
+        alerts["spend"] = np.where(seg_oos[alert_at], wasted[starts[alert_at]], closed[alert_at])
+        # Per-key state after the batch comes from each key's last segment.
+        last = np.flatnonzero(np.append(seg_key[1:] != seg_key[:-1], True))
+        last_key = seg_key[last]
+        self.oos[last_key] = seg_oos[last]
+        self.episode_spend[last_key] = np.where(seg_oos[last], seg_total[last], 0.0)
+        self.paused_at[last_key] = np.where(seg_oos[last], np.where(seg_change[last], ts[starts[last]], self.paused_at[last_key]), -1)
+        self.wasted += np.bincount(key, weights=wasted, minlength=len(self.wasted))
+        bucket = ts // self.bucket_seconds
+        self._advance(int(bucket.max()))
+        live = (bucket > self.head - len(self.ring)) & (wasted > 0)
+        flat = (bucket[live] % len(self.ring)) * len(self.wasted) + key[live]
+        self.ring += np.bincount(flat, weights=wasted[live], minlength=self.ring.size).reshape(self.ring.shape)
+        self.events += len(batch)
+        self.pauses += int(alerts["pause"].sum())
+        self.resumes += int((~alerts["pause"]).sum())
+        alerts = alerts[np.argsort(alerts["ts"], kind="stable")]
+        self._alerts.append(alerts)
+        if sum(map(len, self._alerts)) > 2 * self.max_alerts:
+            self._alerts = [np.concatenate(self._alerts)[-self.max_alerts:]]
+        return alerts
+
+    def consume(self, batches) -> "OOSDetector":
+        for batch in batches:
+            self.process(batch)
+        return self
+
+    def alerts(self) -> np.ndarray:
+        merged = np.concatenate(self._alerts) if self._alerts else np.empty(0, dtype=ALERT_DTYPE)
+        return merged[np.argsort(merged["ts"], kind="stable")][-self.max_alerts:]
+
+    def window_wasted(self, seconds: int, per_key: bool = False):
+        """Wasted spend over the last ``seconds`` (rounded up to whole buckets, capped at the ring length)."""
+        if self.head is None:
+            return np.zeros(len(self.wasted)) if per_key else 0.0
+        n = min(-(-seconds // self.bucket_seconds), len(self.ring))
+        totals = self.ring[(self.head - np.arange(n)) % len(self.ring)].sum(axis=0)
+        return totals if per_key else float(totals.sum())
+
+    # --- frames for display -----------------------------------------------------------------
+    def alert_frame(self) -> pd.DataFrame:
+        alerts = self.alerts()
+        keys = self.labels[alerts["key"]]
+        return pd.DataFrame({
+            "Time": pd.to_datetime(alerts["ts"], unit="s"),
+            "Alert": pd.Categorical(np.where(alerts["pause"], "PAUSE", "RESUME"), categories=["PAUSE", "RESUME"]),
+            **{dim: pd.Categorical.from_codes(keys.codes[i], categories=keys.levels[i]) for i, dim in enumerate(KEY_DIMS)},
+            "Spend": alerts["spend"],
+        })
+
+    def open_episodes(self) -> pd.DataFrame:
+        """Keys currently out of stock, with when they were paused and the spend wasted since."""
+        keys = np.flatnonzero(self.oos)
+        frame = self.labels[keys].to_frame(index=False)
+        frame["Paused Since"] = pd.to_datetime(self.paused_at[keys], unit="s")
+        frame["Wasted Spend"] = self.episode_spend[keys]
+        return frame
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure OOS detector throughput on a simulated feed.")
+    parser.add_argument("--events", type=int, default=5_000_000)
+    parser.add_argument("--keys", type=int, default=12 * 5 * 8)
+    parser.add_argument("--batch", type=int, default=65536)
+    args = parser.parse_args()
+    feed = list(simulated_feed(args.keys, args.events, args.batch))
+    detector = OOSDetector(args.keys)
+    start = time.perf_counter()
+    detector.consume(feed)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"events": detector.events, "seconds": round(elapsed, 3), "events_per_second": round(detector.events / elapsed), "pauses": detector.pauses, "resumes": detector.resumes, "wasted_24h": round(detector.window_wasted(86400), 2)}))
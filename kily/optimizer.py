@@ -0,0 +1,157 @@
+"""Budget allocation optimizer over Platform x City x Daypart cells and the days of a campaign.
+
+Each cell gets a diminishing-returns response curve ``revenue = a * spend ** b`` fitted on its
+daily history (log-log least squares, ``b`` shrunk towards ``PRIOR_ELASTICITY``), and each
+weekday a demand multiplier. A cross-entropy search then splits the budget across cells and days,
+with every day's spend held within ``pacing`` of an even pace. Candidate populations are scored in
+chunks on a process pool; the search stops at its wall-clock budget and returns the best plan so
+far (anytime), or earlier once it stops improving.
+"""
+import time
+from concurrent.futures import FIRST_EXCEPTION, wait
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from kily.cube import KPICube
+
+PRIOR_ELASTICITY, PRIOR_WEIGHT = 0.7, 5.0
+ELASTICITY_RANGE = (0.2, 0.95)
+PACING = (0.5, 1.5)  # daily spend bounds as a multiple of budget / days
+
+
+@dataclass(frozen=True)
+class ResponseCurves:
+    cells: pd.MultiIndex  # Platform x City x Daypart
+    scale: np.ndarray  # a
+    elasticity: np.ndarray  # b
+    spend_share: np.ndarray  # historical share of spend per cell
+    weekday: np.ndarray  # demand multiplier per weekday (Mon=0), mean 1
+
+
+@dataclass(frozen=True)
+class Plan:
+    cells: pd.MultiIndex
+    cell_spend: np.ndarray  # total spend per cell over the campaign
+    dates: pd.DatetimeIndex
+    daily_spend: np.ndarray
+    revenue: float
+    baseline_revenue: float  # historical spend shares, even pacing
+    generations: int
+    evaluations: int
+    elapsed_s: float
+    stopped: str  # "converged" or "time budget"
+
+    def by(self, level: str) -> pd.Series:
+        return pd.Series(self.cell_spend, index=self.cells).groupby(level=level, sort=False).sum()
+
+
+def fit_response_curves(cube: KPICube, brand: str, platforms=None, cities=None) -> ResponseCurves:
+    sub = cube.slice(Brand=brand, Platform=list(platforms) if platforms else None, City=list(cities) if cities else None)
+    axes = ("Platform", "City", "Daypart", "Date")
+    spend, labels = sub.reduce(axes, "Spend")
+    sales, _ = sub.reduce(axes, "Direct Sales")
+    cells = pd.MultiIndex.from_product(labels[:3], names=axes[:3])
+    spend, sales = spend.reshape(len(cells), -1), sales.reshape(len(cells), -1)
+    active = spend.sum(axis=1) > 0
+    cells, spend, sales = cells[active], spend[active], sales[active]
+    observed = (spend > 0) & (sales > 0)
+    log_x, log_y = np.log(np.where(observed, spend, 1)), np.log(np.where(observed, sales, 1))
+    n = np.maximum(observed.sum(axis=1), 1)
+    mean_x, mean_y = (log_x * observed).sum(axis=1) / n, (log_y * observed).sum(axis=1) / n
+    dx, dy = (log_x - mean_x[:, None]) * observed, (log_y - mean_y[:, None]) * observed
+    elasticity = np.clip(((dx * dy).sum(axis=1) + PRIOR_WEIGHT * PRIOR_ELASTICITY) / ((dx * dx).sum(axis=1) + PRIOR_WEIGHT), *ELASTICITY_RANGE)
+    scale = np.exp(mean_y - elasticity * mean_x)  # curve passes through the cell's typical day
+    day_of_week = labels[3].dayofweek
+    weekday_roas = np.array([sales[:, day_of_week == d].sum() / max(spend[:, day_of_week == d].sum(), 1e-9) for d in range(7)])
+    weekday_roas = np.where(weekday_roas > 0, weekday_roas, weekday_roas[weekday_roas > 0].mean() if (weekday_roas > 0).any() else 1.0)
+    return ResponseCurves(cells, scale, elasticity, spend.sum(axis=1) / spend.sum(), weekday_roas / weekday_roas.mean())
+
+
+def paced(days: np.ndarray, pacing=PACING, rounds: int = 20) -> np.ndarray:
+    """Project each row of day weights onto {sum = 1, lo/n <= w <= hi/n} by alternating clip and rescale."""
+    n = days.shape[-1]
+    lo, hi = pacing[0] / n, pacing[1] / n
+    days = days / days.sum(axis=-1, keepdims=True)
+    for _ in range(rounds):
+        days = np.clip(days, lo, hi)
+        free = (days > lo) & (days < hi)
+        gap = 1 - days.sum(axis=-1, keepdims=True)
+        if np.abs(gap).max() < 1e-12:
+            break
+        days = days + gap * free / np.maximum(free.sum(axis=-1, keepdims=True), 1)
+    return days
+
+
+def revenue(budget: float, scale, elasticity, demand, cell_weights, day_weights) -> np.ndarray:
+    """Expected revenue of candidate allocations, vectorized over the leading (population) axis."""
+    spend = budget * cell_weights[:, :, None] * day_weights[:, None, :]  # (population, cells, days)
+    return (scale[None, :, None] * demand[None, None, :] * np.power(spend, elasticity[None, :, None])).sum(axis=(1, 2))
+
+
+def _softmax(logits):
+    z = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return z / z.sum(axis=-1, keepdims=True)
+
+
+def score_chunk(budget, scale, elasticity, demand, cell_logits, day_logits, pacing=PACING):
+    """Pool task: decode one chunk of candidates and return (cell weights, day weights, revenue)."""
+    cell_weights, day_weights = _softmax(cell_logits), paced(_softmax(day_logits), pacing)
+    return cell_weights, day_weights, revenue(budget, scale, elasticity, demand, cell_weights, day_weights)
+
+
+def optimize(curves: ResponseCurves, budget: float, start, end, pool=None, workers: int = 1, time_budget: float = 1.5, population: int = 256, elite: float = 0.1, patience: int = 15, seed: int = 0, pacing=PACING, progress=None) -> Plan:
+    """Cross-entropy search for the revenue-maximizing cell x day split of ``budget``.
+
+    ``pool`` (an executor) scores ``workers`` chunks of each population in parallel; without one the
+    chunks are scored in-process. ``progress(generation, best_revenue, elapsed)`` is called every
+    generation. Returns when ``time_budget`` seconds have passed or ``patience`` generations pass
+    without improvement.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    dates = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize())
+    demand = curves.weekday[dates.dayofweek]
+    args = (budget, curves.scale, curves.elasticity, demand)
+    rng = np.random.default_rng(seed)
+    n_cells, n_days = len(curves.cells), len(dates)
+    mean = np.concatenate([np.log(curves.spend_share), np.zeros(n_days)])
+    std = np.full(n_cells + n_days, 0.25)
+    baseline_cells, baseline_days, baseline = score_chunk(*args, mean[None, :n_cells], mean[None, n_cells:], pacing)
+    best = (float(baseline[0]), baseline_cells[0], baseline_days[0])
+    generations = evaluations = stale = 0
+    stopped = "converged"
+    while stale < patience:
+        if time.perf_counter() >= deadline:
+            stopped = "time budget"
+            break
+        logits = mean + std * rng.standard_normal((population, n_cells + n_days))
+        logits[0] = mean  # keep the current centre in the population so the elite never regresses
+        chunks = np.array_split(logits, max(workers, 1))
+        if pool is None:
+            results = [score_chunk(*args, chunk[:, :n_cells], chunk[:, n_cells:], pacing) for chunk in chunks]
+        else:
+            futures = [pool.submit(score_chunk, *args, chunk[:, :n_cells], chunk[:, n_cells:], pacing) for chunk in chunks]
+            _, pending = wait(futures, timeout=max(deadline - time.perf_counter(), 0), return_when=FIRST_EXCEPTION)
+            if pending:  # out of time: keep the best plan found so far
+                for future in pending:
+                    future.cancel()
+                stopped = "time budget"
+                break
+            results = [future.result() for future in futures]
+        scores = np.concatenate([r[2] for r in results])
+        generations, evaluations = generations + 1, evaluations + len(scores)
+        top = np.argpartition(scores, -max(int(elite * len(scores)), 2))[-max(int(elite * len(scores)), 2):]
+        mean, std = logits[top].mean(axis=0), np.maximum(logits[top].std(axis=0), 1e-3)
+        leader = int(np.argmax(scores))
+        if scores[leader] > best[0] * (1 + 1e-6):
+            offset = np.cumsum([0] + [len(r[2]) for r in results])
+            chunk = int(np.searchsorted(offset, leader, side="right") - 1)
+            best, stale = (float(scores[leader]), results[chunk][0][leader - offset[chunk]], results[chunk][1][leader - offset[chunk]]), 0
+        else:
+            stale += 1
+        if progress is not None:
+            progress(generations, best[0], time.perf_counter() - started)
+    revenue_best, cell_weights, day_weights = best
+    return Plan(curves.cells, budget * cell_weights, dates, budget * day_weights, revenue_best, float(baseline[0]), generations, evaluations, time.perf_counter() - started, stopped)
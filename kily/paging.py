@@ -0,0 +1,84 @@
+"""Server-side paging of large row selections: text search, partial top-k sort and lazy page slicing.
+
+Only the rows of the requested page are materialized. Sorting selects the first
+``(page + 1) * page_size`` keys with ``argpartition`` and orders just those, so the full selection
+is never sorted. Ties keep row order, which keeps pages disjoint.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class TablePage:
+    frame: pd.DataFrame  # the page's rows only
+    matched: int  # rows matching the selection and search
+    page: int  # 0-based, clamped to the last page
+    pages: int
+    page_size: int
+
+    @property
+    def first_row(self) -> int:
+        return self.page * self.page_size + 1 if self.matched else 0
+
+    @property
+    def last_row(self) -> int:
+        return min((self.page + 1) * self.page_size, self.matched)
+
+
+def sort_keys(col: pd.Series, rows: np.ndarray, descending: bool = False) -> np.ndarray:
+    """Float sort keys for ``rows`` of ``col``: categoricals rank by label, NaN always last."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        rank = np.empty(len(col.cat.categories), dtype=np.float64)
+        rank[np.argsort(col.cat.categories.astype(str))] = np.arange(len(rank))
+        codes = col.cat.codes.to_numpy()[rows]
+        keys = np.where(codes >= 0, rank[codes], np.nan)
+    else:
+        values = col.to_numpy()[rows]
+        keys = (values.view(np.int64) if values.dtype.kind == "M" else values).astype(np.float64)
+    keys = -keys if descending else keys
+    return np.where(np.isnan(keys), np.inf, keys)
+
+
+def top_k(keys: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the ``k`` smallest keys in ascending, stable order, without sorting all of ``keys``."""
+    if k >= len(keys):
+        return np.argsort(keys, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    kth = keys[np.argpartition(keys, k - 1)[k - 1]]
+    below = np.flatnonzero(keys < kth)
+    chosen = np.concatenate([below, np.flatnonzero(keys == kth)[:k - len(below)]])
+    return chosen[np.lexsort((chosen, keys[chosen]))]
+
+
+def search_mask(frame: pd.DataFrame, rows: np.ndarray, columns, needle: str) -> np.ndarray:
+    """Rows whose value in any of ``columns`` contains ``needle`` (case-insensitive); categoricals match per label."""
+    needle = needle.strip().lower()
+    mask = np.zeros(len(rows), dtype=bool)
+    for name in columns:
+        col = frame[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            hits = np.asarray([needle in str(label).lower() for label in col.cat.categories])
+            codes = col.cat.codes.to_numpy()[rows]
+            mask |= (codes >= 0) & hits[np.maximum(codes, 0)]
+        else:
+            mask |= col.iloc[rows].astype(str).str.lower().str.contains(needle, regex=False).to_numpy()
+    return mask
+
+
+def page_rows(frame: pd.DataFrame, rows: np.ndarray, columns, sort_by: str = None, descending: bool = False, page: int = 0, page_size: int = 50, search: str = "", search_columns=None) -> TablePage:
+    """One page of ``frame.iloc[rows]``, limited to ``columns`` after searching and sorting server-side."""
+    rows = np.asarray(rows)
+    if search.strip():
+        rows = rows[search_mask(frame, rows, search_columns or columns, search)]
+    pages = max(-(-len(rows) // page_size), 1)
+    page = min(max(int(page), 0), pages - 1)
+    start = page * page_size
+    if sort_by is None:
+        picked = rows[start:start + page_size]
+    else:
+        order = top_k(sort_keys(frame[sort_by], rows, descending), start + page_size)
+        picked = rows[order[start:]]
+    return TablePage(frame.iloc[picked][list(columns)], len(rows), page, pages, page_size)
@@ -0,0 +1,135 @@
+"""Performance Brief PDF rendering, plus a batch mode that renders every filter combination in a process pool.
+
+    python -m kily.pdf_brief --out briefs.zip --workers 8
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from kily.cube import ALL_LABELS, KPICube
+from kily.data_engine import DEFAULT_SEED, DataScale, generate_campaign_data
+
+
+def brief_inputs(kpis: dict) -> dict:
+    """The subset of a KPI dict the brief prints, rounded to its print precision (a stable memo key)."""
+    return {"sales": round(float(kpis["sales"])), "roas": round(float(kpis["roas"]), 4), "conv": int(kpis["conv"])}
+
+
+def brief_scope(brand=ALL_LABELS["Brand"], city=ALL_LABELS["City"], platform=ALL_LABELS["Platform"], period=None) -> str:
+    return " | ".join((brand, city, platform) + ((period,) if period else ()))
+
+
+def create_pdf_summary(kpis_kily, kpis_old, scope=None):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font("Arial", 'B', 20)
+    pdf.set_text_color(40, 40, 40)
+    pdf.cell(0, 10, "Kily Agentic AI Engine: Performance Brief", 0, 1, 'C')
+    pdf.set_font("Arial", '', 10)
+    pdf.set_text_color(128, 128, 128)
+    pdf.cell(0, 8, f"Report for ITC Foods | Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')}", 0, 1, 'C')
+    if scope:
+        pdf.cell(0, 6, f"Scope: {scope}", 0, 1, 'C')
+    pdf.ln(10)
+    pdf.set_font("Arial", 'B', 14)
+    pdf.set_text_color(0, 0, 0)
+    pdf.cell(0, 10, "1. Executive Summary", 0, 1, 'L')
+    pdf.set_font("Arial", '', 11)
+    uplift = (kpis_kily['roas'] / kpis_old['roas'] - 1) * 100 if kpis_old['roas'] > 0 else 0
+    revenue_gain = kpis_kily['sales'] - kpis_old['sales']
+    summary_text = f"Activation of the Kily Agentic AI Engine resulted in a transformative impact on performance marketing over the reporting period. The engine delivered a {uplift:.1f}% improvement in blended ROAS, generating an additional Rs. {revenue_gain:,.0f} in incremental revenue. This was achieved through autonomous, real-time optimization across more than 40,000 campaign variables, validating the shift from manual oversight to an agentic framework."
+    pdf.multi_cell(0, 6, summary_text)
+    pdf.ln(5)
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "2. Top-Line Impact Analysis", 0, 1, 'L')
+    pdf.set_font("Arial", 'B', 10)
+    pdf.set_fill_color(220, 220, 220)
+    pdf.cell(80, 8, "Metric", 1, 0, 'C', 1)
+    pdf.cell(35, 8, "Baseline (Manual)", 1, 0, 'C', 1)
+    pdf.cell(35, 8, "Kily Engine (Active)", 1, 0, 'C', 1)
+    pdf.cell(35, 8, "Impact", 1, 1, 'C', 1)
+    pdf.set_font("Arial", '', 10)
+    pdf.cell(80, 8, "Total Direct Sales (Rs.)", 1, 0, 'L')
+    pdf.cell(35, 8, f"{kpis_old['sales']:,.0f}", 1, 0, 'R')
+    pdf.cell(35, 8, f"{kpis_kily['sales']:,.0f}", 1, 0, 'R')
+    pdf.set_font("Arial", 'B', 10); pdf.set_text_color(0, 128, 0)
+    pdf.cell(35, 8, f"+{revenue_gain:,.0f}", 1, 1, 'R'); pdf.set_text_color(0, 0, 0)
+    pdf.set_font("Arial", '', 10)
+    pdf.cell(80, 8, "Blended ROAS", 1, 0, 'L')
+    pdf.cell(35, 8, f"{kpis_old['roas']:.2f}x", 1, 0, 'R')
+    pdf.cell(35, 8, f"{kpis_kily['roas']:.2f}x", 1, 0, 'R')
+    pdf.set_font("Arial", 'B', 10); pdf.set_text_color(0, 128, 0)
+    pdf.cell(35, 8, f"+{uplift:.1f}%", 1, 1, 'R'); pdf.set_text_color(0, 0, 0)
+    conv_gain = kpis_kily['conv'] - kpis_old['conv']
+    pdf.set_font("Arial", '', 10)
+    pdf.cell(80, 8, "Total Conversions", 1, 0, 'L')
+    pdf.cell(35, 8, f"{kpis_old['conv']:,}", 1, 0, 'R')
+    pdf.cell(35, 8, f"{kpis_kily['conv']:,}", 1, 0, 'R')
+    pdf.set_font("Arial", 'B', 10); pdf.set_text_color(0, 128, 0)
+    pdf.cell(35, 8, f"+{conv_gain:,}", 1, 1, 'R'); pdf.set_text_color(0, 0, 0)
+    pdf.ln(5)
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "3. Key Impact Drivers & Conclusion", 0, 1, 'L')
+    pdf.set_font("Arial", '', 11)
+    drivers_text = """The Kily Engine's outperformance is not marginal; it's structural. The primary drivers include:\n\n  * Operational Efficiency: Eradication of wasted ad spend on Out-of-Stock SKUs.\n  * Predictive Allocation: Superior, algorithm-driven budget distribution over human heuristics.\n  * Bidding Superiority: Real-time, reinforcement learning-based bidding that minimizes acquisition cost."""
+    pdf.multi_cell(0, 6, drivers_text)
+    pdf.ln(2)
+    conclusion_text = "Conclusion: The data confirms that an agentic AI approach is a prerequisite for achieving market-leading profitability and scale in the hyper-competitive Quick Commerce landscape."
+    pdf.set_font("Arial", 'B', 11)
+    pdf.multi_cell(0, 6, conclusion_text)
+    return bytes(pdf.output(dest='S'))
+
+
+def _render_job(job):
+    file_name, kpis_kily, kpis_old, scope = job
+    return file_name, create_pdf_summary(kpis_kily, kpis_old, scope)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-")
+
+
+def brief_jobs(cube_kily: KPICube, cube_old: KPICube):
+    """One (file name, Kily KPIs, baseline KPIs, scope) job per Brand x City x Platform selection, "All" included."""
+    brands = [ALL_LABELS["Brand"]] + list(cube_kily.brands)
+    cities = [ALL_LABELS["City"]] + list(cube_kily.labels["City"])
+    platforms = [ALL_LABELS["Platform"]] + list(cube_kily.labels["Platform"])
+    for brand, city, platform in itertools.product(brands, cities, platforms):
+        kily = cube_kily.slice(Brand=brand, City=city, Platform=platform).kpis()
+        old = cube_old.slice(Brand=brand, City=city, Platform=platform).kpis()
+        file_name = f"ITC_Kily_Performance_Brief__{_slug(brand)}__{_slug(city)}__{_slug(platform)}.pdf"
+        yield file_name, brief_inputs(kily), brief_inputs(old), brief_scope(brand, city, platform)
+
+
+def render_batch(cube_kily: KPICube, cube_old: KPICube, out, workers: int = None, chunksize: int = 4) -> dict:
+    """Render every brief across a process pool into the zip ``out`` (path or binary file); returns throughput stats."""
+    jobs = list(brief_jobs(cube_kily, cube_old))
+    start = time.perf_counter()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive, ProcessPoolExecutor(max_workers=workers) as pool:
+        for file_name, pdf_bytes in pool.map(_render_job, jobs, chunksize=chunksize):
+            archive.writestr(file_name, pdf_bytes)
+    elapsed = time.perf_counter() - start
+    return {"pdfs": len(jobs), "workers": workers or os.cpu_count(), "seconds": round(elapsed, 3), "pdfs_per_second": round(len(jobs) / elapsed, 1) if elapsed else None}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render Performance Briefs for every Brand x City x Platform filter combination.")
+    parser.add_argument("--out", default="performance_briefs.zip")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--scale", default="", help="DataScale spec, e.g. days=90")
+    args = parser.parse_args()
+    scale = DataScale.parse(args.scale)
+    cubes = [KPICube.from_frame(generate_campaign_data(is_kily, seed=args.seed, scale=scale)) for is_kily in (True, False)]
+    stats = render_batch(*cubes, out=args.out, workers=args.workers)
+    print(json.dumps({"out": args.out, **stats}))
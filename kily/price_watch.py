@@ -0,0 +1,409 @@
+"""Competitor price collection: async pollers, a compact time-series store and a price-war detector.
+
+``PriceCollector`` polls every platform's price endpoint for every city once per round. It runs on
+its own asyncio loop in a background thread, with a keep-alive connection pool per platform, a
+global concurrency limit and exponential backoff with jitter on failed requests. Each round lands
+in ``PriceStore`` as one row of float32 prices and traffic, one column per Brand x SKU x Category x
+Platform x City series, in a fixed-capacity ring. ``price_war_alerts`` scans the whole ring at once
+for competitor promotions: runs of rounds where a series trades ``depth`` or more below its recent
+regular price.
+
+Without real endpoints, ``StubServers`` serves a simulated market over local HTTP (market time runs
+``speed`` times faster than the wall clock, so two-hour promotions come and go within a session).
+
+    python -m kily.price_watch --seconds 10
+"""
+import argparse
+import asyncio
+import functools
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from kily.schema import BRANDS_SKUS, CITIES
+
+COLLECTED_PLATFORMS = ("Blinkit", "Zepto", "Swiggy Instamart")
+# (brand, SKU, category, MRP in ₹); ITC brands are the ones in ``kily.schema.BRANDS_SKUS``.
+PRICE_CATALOGUE = (
+    ("Sunfeast", "Dark Fantasy Choco Fills", "Biscuits", 40), ("Britannia", "Bourbon", "Biscuits", 35), ("Parle", "Hide & Seek", "Biscuits", 30), ("Cadbury", "Oreo", "Biscuits", 35),
+    ("YiPPee!", "Magic Masala Noodles", "Noodles", 15), ("Maggi", "2-Minute Noodles", "Noodles", 14), ("Ching's Secret", "Schezwan Noodles", "Noodles", 15),
+    ("Bingo!", "Mad Angles", "Chips", 20), ("Lay's", "Classic Salted", "Chips", 20), ("Uncle Chipps", "Spicy Treat", "Chips", 20),
+    ("Aashirvaad", "Select Atta", "Atta", 335), ("Pillsbury", "Chakki Fresh Atta", "Atta", 290), ("Fortune", "Chakki Fresh Atta", "Atta", 275),
+    ("B Natural", "Mixed Fruit Juice", "Juice", 120), ("Tropicana", "100% Mixed Fruit Juice", "Juice", 125), ("Real", "Mixed Fruit Juice", "Juice", 115),
+    ("ITC Master Chef", "Classic Aloo Tikki", "Frozen Snacks", 160), ("McCain", "Smiles", "Frozen Snacks", 165), ("Godrej Yummiez", "Aloo Tikki", "Frozen Snacks", 150),
+)
+PRICE_CATALOGUE_MRP = {(brand, sku): mrp for brand, sku, _, mrp in PRICE_CATALOGUE}
+CATEGORY_DEFENDERS = {category: sku for brand, sku, category, _ in PRICE_CATALOGUE if brand in BRANDS_SKUS}  # ITC's listing per category
+SERIES_LEVELS = ("Brand", "SKU", "Category", "Platform", "City")
+
+
+def price_series(platforms=COLLECTED_PLATFORMS, cities=CITIES) -> pd.MultiIndex:
+    """One series per catalogue SKU x platform x city."""
+    return pd.MultiIndex.from_tuples([(brand, sku, category, platform, city) for brand, sku, category, _ in PRICE_CATALOGUE for platform in platforms for city in cities], names=SERIES_LEVELS)
+
+
+def is_own_brand(series: pd.MultiIndex) -> np.ndarray:
+    return np.asarray(series.get_level_values("Brand").isin(list(BRANDS_SKUS)))
+
+
+@dataclass(frozen=True)
+class PriceHistory:
+    series: pd.MultiIndex
+    mrp: np.ndarray  # (series,)
+    ts: np.ndarray  # (rounds,) market epoch seconds, oldest first
+    price: np.ndarray  # (rounds, series) float32, NaN where a request failed
+    traffic: np.ndarray  # (rounds, series) float32 views per hour
+    rounds: int = 0  # store rounds appended when the snapshot was taken
+
+    def latest(self) -> pd.DataFrame:
+        """Last observed price per series (searching back past failed rounds)."""
+        seen = ~np.isnan(self.price)
+        last = np.where(seen.any(axis=0), len(self.ts) - 1 - np.argmax(seen[::-1], axis=0), -1)
+        price = np.where(last >= 0, self.price[np.maximum(last, 0), np.arange(len(self.series))], np.nan)
+        frame = self.series.to_frame(index=False)
+        frame["Price"], frame["MRP"] = price, self.mrp
+        frame["Discount (%)"] = (1 - price / self.mrp) * 100
+        return frame
+
+    def traffic_since(self, seconds: int) -> np.ndarray:
+        """Views per series over the last ``seconds`` of market time (mean observed rate x window)."""
+        if len(self.ts) == 0:
+            return np.zeros(len(self.series))
+        recent = self.traffic[self.ts >= self.ts[-1] - seconds]
+        return np.nan_to_num(np.nanmean(recent, axis=0)) * seconds / 3600 if len(recent) else np.zeros(len(self.series))
+
+
+class PriceStore:
+    """Fixed-capacity ring of collection rounds; safe for one writer thread and many readers."""
+
+    def __init__(self, series: pd.MultiIndex, mrp=None, capacity: int = 2048):
+        self.series, self.capacity = series, capacity
+        self.mrp = np.asarray(mrp if mrp is not None else [PRICE_CATALOGUE_MRP[(b, s)] for b, s in zip(series.get_level_values("Brand"), series.get_level_values("SKU"))], dtype=np.float32)
+        self.slot = {key: i for i, key in enumerate(series)}
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._price = np.full((capacity, len(series)), np.nan, dtype=np.float32)
+        self._traffic = np.full((capacity, len(series)), np.nan, dtype=np.float32)
+        self.rounds = 0  # appended since creation; the ring keeps the last ``capacity``
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.rounds, self.capacity)
+
+    def append(self, ts: int, price: np.ndarray, traffic: np.ndarray):
+        with self._lock:
+            row = self.rounds % self.capacity
+            self._ts[row], self._price[row], self._traffic[row] = ts, price, traffic
+            self.rounds += 1
+
+    def history(self) -> PriceHistory:
+        with self._lock:
+            order = (np.arange(len(self)) + (self.rounds - len(self))) % self.capacity
+            return PriceHistory(self.series, self.mrp, self._ts[order], self._price[order], self._traffic[order], self.rounds)
+
+
+def price_war_alerts(history: PriceHistory, depth: float = 0.10, lookback: int = 12, competitors_only: bool = True) -> pd.DataFrame:
+    """Promotion episodes, newest first: runs where price sits ``depth`` or more below the max of the previous ``lookback`` rounds.
+
+    ``lookback`` should cover the longest promotion expected: after that many rounds the discounted
+    price becomes the reference and the episode closes.
+    """
+    columns = ["Start", "End", "Active", *SERIES_LEVELS, "Regular Price", "Promo Price", "Depth (%)"]
+    price = history.price.astype(np.float64)
+    rounds, n = price.shape
+    if rounds < 2:
+        return pd.DataFrame(columns=columns)
+    padded = np.vstack([np.full((lookback, n), np.nan), price])
+    reference = np.fmax.reduce(sliding_window_view(padded, lookback, axis=0)[:rounds], axis=-1)  # max of the rounds before each one
+    off = 1 - price / reference
+    in_war = np.nan_to_num(off) >= depth
+    if competitors_only:
+        in_war &= ~is_own_brand(history.series)
+    # Episode bounds from transitions, series-major so starts and ends pair up.
+    edges = np.diff(np.vstack([np.zeros((1, n), bool), in_war, np.zeros((1, n), bool)]).astype(np.int8), axis=0).T
+    series, start = np.nonzero(edges == 1)
+    _, end = np.nonzero(edges == -1)  # exclusive
+    flat = np.append(np.nan_to_num(price, nan=np.inf).T.ravel(), np.inf)
+    promo = np.minimum.reduceat(flat, np.ravel(np.column_stack([series * rounds + start, series * rounds + end])))[::2]
+    regular = reference[start, series]
+    labels = history.series[series].to_frame(index=False)
+    frame = pd.DataFrame({
+        "Start": pd.to_datetime(history.ts[start], unit="s"),
+        "End": pd.to_datetime(np.where(end < rounds, history.ts[np.minimum(end, rounds - 1)], 0), unit="s").where(end < rounds),
+        "Active": end == rounds,
+        **{level: labels[level] for level in SERIES_LEVELS},
+        "Regular Price": regular, "Promo Price": promo, "Depth (%)": (1 - promo / regular) * 100,
+    }, columns=columns)
+    return frame.sort_values("Start", ascending=False, kind="stable").reset_index(drop=True)
+
+
+# --- collection ------------------------------------------------------------------------------
+class FetchError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one host, at most ``size`` open at a time."""
+
+    def __init__(self, base_url: str, size: int = 4):
+        parts = urlsplit(base_url)
+        self.host, self.port, self.prefix = parts.hostname, parts.port or 80, parts.path.rstrip("/")
+        self._idle, self._slots = [], asyncio.Semaphore(size)
+
+    async def get_json(self, path: str, timeout: float):
+        async with self._slots:
+            reader, writer = self._idle.pop() if self._idle else await asyncio.wait_for(asyncio.open_connection(self.host, self.port), timeout)
+            try:
+                writer.write(f"GET {self.prefix}{path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: keep-alive\r\n\r\n".encode())
+                status, headers, body = await asyncio.wait_for(_read_response(reader), timeout)
+            except BaseException:
+                writer.close()
+                raise
+            if headers.get("connection") == "close":
+                writer.close()
+            else:
+                self._idle.append((reader, writer))
+        if status != 200:
+            raise FetchError(f"HTTP {status} from {self.host}:{self.port}{path}")
+        return json.loads(body)
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+async def _read_response(reader):
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split()[1])
+    headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(":") for line in head[1:] if line)}
+    return status, headers, await reader.readexactly(int(headers.get("content-length", 0)))
+
+
+@dataclass
+class CollectorStats:
+    rounds: int = 0
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0  # requests that failed after all retries
+    last_round_ms: float = 0.0
+    last_error: str = ""
+
+
+class PriceCollector:
+    """Polls ``endpoints`` ({platform: base URL}) for every city each ``interval`` seconds, in a background thread.
+
+    ``servers`` (e.g. the ``StubServers`` behind ``endpoints``) are owned by the collector and shut down by ``stop``.
+    """
+
+    def __init__(self, endpoints: dict, store: PriceStore, interval: float = 2.0, concurrency: int = 8, pool_size: int = 4, timeout: float = 2.0, retries: int = 3, backoff: float = 0.1, servers=None):
+        self.endpoints, self.store, self.interval, self.servers = endpoints, store, interval, servers
+        self.concurrency, self.pool_size, self.timeout, self.retries, self.backoff = concurrency, pool_size, timeout, retries, backoff
+        self.cities = list(dict.fromkeys(store.series.get_level_values("City")))
+        self.stats = CollectorStats()
+        self._stop, self._round_done, self._thread = threading.Event(), threading.Event(), None
+        self._loop = self._wake = None
+
+    async def _fetch(self, pool, limit, path):
+        for attempt in range(self.retries + 1):
+            try:
+                async with limit:
+                    self.stats.requests += 1
+                    return await pool.get_json(path, self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, FetchError, ValueError) as exc:
+                if attempt == self.retries:
+                    self.stats.failures += 1
+                    self.stats.last_error = f"{type(exc).__name__}: {exc}"
+                    return None
+                self.stats.retries += 1
+                await asyncio.sleep(min(self.backoff * 2 ** attempt, 2.0) * (0.5 + random.random()))
+
+    async def collect_round(self, pools, limit) -> bool:
+        """Fetch every platform x city once and append the round; False if nothing came back."""
+        started = time.perf_counter()
+        jobs = [(platform, city) for platform in pools for city in self.cities]
+        payloads = await asyncio.gather(*(self._fetch(pools[platform], limit, f"/v1/prices?city={city}") for platform, city in jobs))
+        price = np.full(len(self.store.series), np.nan, dtype=np.float32)
+        traffic = np.full(len(self.store.series), np.nan, dtype=np.float32)
+        stamps = []
+        for (platform, city), payload in zip(jobs, payloads):
+            if payload is None:
+                continue
+            stamps.append(payload["ts"])
+            for item in payload["items"]:
+                slot = self.store.slot.get((item["brand"], item["sku"], item["category"], platform, city))
+                if slot is not None:
+                    price[slot], traffic[slot] = item["price"], item["views_per_hour"]
+        if stamps:
+            self.store.append(max(stamps), price, traffic)
+        self.stats.rounds += bool(stamps)
+        self.stats.last_round_ms = (time.perf_counter() - started) * 1e3
+        return bool(stamps)
+
+    async def run(self, rounds: int = None):
+        pools = {platform: ConnectionPool(url, self.pool_size) for platform, url in self.endpoints.items()}
+        limit = asyncio.Semaphore(self.concurrency)
+        self._loop, self._wake = asyncio.get_running_loop(), asyncio.Event()
+        try:
+            done = 0
+            while not self._stop.is_set() and (rounds is None or done < rounds):
+                next_round = time.monotonic() + self.interval
+                await self.collect_round(pools, limit)
+                self._round_done.set()
+                done += 1
+                try:  # the pause between rounds ends early when stop() wakes the loop
+                    await asyncio.wait_for(self._wake.wait(), max(next_round - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for pool in pools.values():
+                pool.close()
+
+    def start(self) -> "PriceCollector":
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), name="price-collector", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_for_round(self, timeout: float) -> bool:
+        return self._round_done.wait(timeout)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop polling, wait for the collector thread, then shut down the owned ``servers``."""
+        self._stop.set()
+        loop, wake = self._loop, self._wake
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:  # loop closed in the meantime
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.servers is not None:
+            self.servers.stop(timeout)
+
+
+def parse_endpoints(spec: str) -> dict:
+    """``"Blinkit=http://host:port,Zepto=http://..."`` -> {platform: base URL}."""
+    return dict(item.strip().split("=", 1) for item in spec.split(",") if item.strip())
+
+
+# --- local stub market -----------------------------------------------------------------------
+class StubMarket:
+    """Deterministic simulated listings: everyday discounts, two-hour promotions and diurnal traffic."""
+
+    def __init__(self, series: pd.MultiIndex, seed: int = 0, speed: float = 360.0, promo_prob: float = 0.04, slot_seconds: int = 7200):
+        self.series, self.seed, self.speed, self.promo_prob, self.slot_seconds = series, seed, speed, promo_prob, slot_seconds
+        rng = np.random.default_rng(seed)
+        self.mrp = np.asarray([PRICE_CATALOGUE_MRP[(b, s)] for b, s in zip(series.get_level_values("Brand"), series.get_level_values("SKU"))], dtype=np.float64)
+        self.everyday = rng.uniform(0.0, 0.06, len(series))
+        self.views = rng.gamma(2.0, 400.0, len(series))
+        self.own = is_own_brand(series)
+        self.rows = {key: np.flatnonzero((series.get_level_values("Platform") == key[0]) & (series.get_level_values("City") == key[1])) for key in {(p, c) for _, _, _, p, c in series}}
+        self.started, self.epoch = time.monotonic(), int(time.time())
+
+    def now(self) -> int:
+        return int(self.epoch + (time.monotonic() - self.started) * self.speed)
+
+    @functools.lru_cache(maxsize=64)
+    def promotions(self, slot: int) -> np.ndarray:
+        """Promotion depth per series during one slot (0 = none); ITC's own listings promote half as often."""
+        rng = np.random.default_rng([self.seed, slot])
+        active = rng.random(len(self.series)) < np.where(self.own, self.promo_prob / 2, self.promo_prob)
+        return np.where(active, rng.uniform(0.10, 0.25, len(self.series)), 0.0)
+
+    def listings(self, platform: str, city: str, ts: int) -> list:
+        rows = self.rows.get((platform, city), np.empty(0, dtype=np.int64))
+        promo = self.promotions(ts // self.slot_seconds)[rows]
+        jitter = np.random.default_rng([self.seed, ts // 900, len(rows)]).uniform(-0.01, 0.01, len(rows))
+        price = np.minimum(np.round(self.mrp[rows] * (1 - self.everyday[rows]) * (1 - promo) * (1 + jitter) * 2) / 2, self.mrp[rows])
+        hour = (ts % 86400) / 3600
+        views = self.views[rows] * (1 + 0.5 * np.sin((hour - 9) / 24 * 2 * np.pi)) * np.where(promo > 0, 1.6, 1.0)
+        return [{"brand": self.series[i][0], "sku": self.series[i][1], "category": self.series[i][2], "price": float(p), "mrp": float(self.mrp[i]), "views_per_hour": round(float(v), 1)} for i, p, v in zip(rows, price, views)]
+
+
+class StubServers:
+    """One local HTTP price endpoint per platform, served from a background event loop."""
+
+    def __init__(self, market: StubMarket, platforms=COLLECTED_PLATFORMS, error_rate: float = 0.02, host: str = "127.0.0.1"):
+        self.market, self.platforms, self.error_rate, self.host = market, platforms, error_rate, host
+        self.endpoints, self._ready = {}, threading.Event()
+        self._loop = self._stopped = self._thread = None
+
+    async def _handle(self, platform, reader, writer):
+        try:
+            while True:
+                request = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")[0].split()
+                url = urlsplit(request[1])
+                if url.path != "/v1/prices":
+                    status, body = 404, {"error": "not found"}
+                elif random.random() < self.error_rate:
+                    status, body = 503, {"error": "busy"}
+                else:
+                    city = parse_qs(url.query).get("city", [""])[0]
+                    ts = self.market.now()
+                    status, body = 200, {"ts": ts, "platform": platform, "city": city, "items": self.market.listings(platform, city, ts)}
+                payload = json.dumps(body).encode()
+                writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\nConnection: keep-alive\r\n\r\n".encode() + payload)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve(self):
+        servers = []
+        for platform in self.platforms:
+            server = await asyncio.start_server(functools.partial(self._handle, platform), self.host, 0)
+            self.endpoints[platform] = f"http://{self.host}:{server.sockets[0].getsockname()[1]}"
+            servers.append(server)
+        self._loop, self._stopped = asyncio.get_running_loop(), asyncio.Event()
+        self._ready.set()
+        try:
+            await self._stopped.wait()
+        finally:
+            for server in servers:
+                server.close()
+            await asyncio.gather(*(server.wait_closed() for server in servers))
+
+    def start(self) -> dict:
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(),), name="price-stubs", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return dict(self.endpoints)
+
+    def stop(self, timeout: float = 5.0):
+        """Close the listening sockets and end the event loop thread."""
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._stopped.set)
+            except RuntimeError:  # loop closed in the meantime
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect prices from local stub endpoints and report collector throughput and price-war alerts.")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--interval", type=float, default=0.25)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--speed", type=float, default=3600.0, help="market seconds per wall-clock second")
+    args = parser.parse_args()
+    series = price_series()
+    store = PriceStore(series)
+    stubs = StubServers(StubMarket(series, speed=args.speed))
+    collector = PriceCollector(stubs.start(), store, interval=args.interval, concurrency=args.concurrency, servers=stubs).start()
+    time.sleep(args.seconds)
+    collector.stop()
+    history = store.history()
+    started = time.perf_counter()
+    alerts = price_war_alerts(history)
+    detect_ms = (time.perf_counter() - started) * 1e3
+    stats = collector.stats
+    print(json.dumps({"rounds": stats.rounds, "series": len(series), "requests": stats.requests, "retries": stats.retries, "failures": stats.failures, "last_round_ms": round(stats.last_round_ms, 1), "alerts": len(alerts), "active_alerts": int(alerts["Active"].sum()), "detect_ms": round(detect_ms, 2)}))
@@ -0,0 +1,112 @@
+"""Opt-in per-rerun profiler: named section timings, tracemalloc allocations and loader cache hits.
+
+Each rerun is split into laps (``lap(name)`` closes the section that started at the previous lap)
+plus any explicitly wrapped ``section(name)`` blocks. ``finish()`` returns the rerun's record and
+appends it to a rolling JSON-lines log that can be aggregated across sessions.
+
+tracemalloc is process-wide and slows every allocation, so it only runs while at least one
+profiled rerun is in flight: the first one starts it, the last one to finish stops it again,
+unless something else had turned tracing on before.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+
+_log_lock = threading.Lock()
+_trace_lock = threading.Lock()
+_tracers, _owns_tracing = 0, False
+
+
+def _start_tracing():
+    global _tracers, _owns_tracing
+    with _trace_lock:
+        if _tracers == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _owns_tracing = True
+        _tracers += 1
+
+
+def _stop_tracing():
+    global _tracers, _owns_tracing
+    with _trace_lock:
+        _tracers -= 1
+        if _tracers == 0 and _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
+
+
+def append_jsonl(path: str, record: dict, max_bytes: int):
+    """Append ``record`` to ``path``, rotating it to ``path.1`` once it grows past ``max_bytes``."""
+    line = json.dumps(record, default=str) + "\n"
+    with _log_lock:
+        if os.path.exists(path) and os.path.getsize(path) + len(line) > max_bytes:
+            os.replace(path, path + ".1")
+        with open(path, "a") as fh:
+            fh.write(line)
+
+
+class Profiler:
+    def __init__(self, enabled: bool, log_path: str = None, max_log_bytes: int = 16 * 2 ** 20):
+        self.enabled, self.log_path, self.max_log_bytes = enabled, log_path, max_log_bytes
+        self.sections, self.caches, self.context = [], {}, {}
+        self._release = None
+        if enabled:
+            _start_tracing()
+            self._release = weakref.finalize(self, _stop_tracing)  # run by finish(), or on collection if the rerun stopped early
+        self._started = self._lap_start = time.perf_counter()
+        self._lap_memory = self._lap_peak = self._memory()
+        if enabled:
+            tracemalloc.reset_peak()
+
+    @staticmethod
+    def _memory() -> int:
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    def _record(self, name, started, memory_before, peak, kind):
+        # alloc_kb: net growth of the traced heap over the block; peak_kb: its high-water mark above the starting size
+        current = tracemalloc.get_traced_memory()[0]
+        self.sections.append({"section": name, "kind": kind, "ms": round((time.perf_counter() - started) * 1e3, 3), "alloc_kb": round((current - memory_before) / 1024, 1), "peak_kb": round((peak - memory_before) / 1024, 1)})
+
+    def lap(self, name: str):
+        """Close the section running since the previous lap (or the start of the rerun) under ``name``."""
+        if not self.enabled:
+            return
+        self._record(name, self._lap_start, self._lap_memory, max(self._lap_peak, tracemalloc.get_traced_memory()[1]), "lap")
+        tracemalloc.reset_peak()
+        self._lap_start = time.perf_counter()
+        self._lap_memory = self._lap_peak = self._memory()
+
+    @contextmanager
+    def section(self, name: str):
+        """Time a nested block; it is also counted inside the enclosing lap."""
+        if not self.enabled:
+            yield
+            return
+        self._lap_peak = max(self._lap_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()  # the section gets its own high-water mark; the lap keeps the max of both
+        started, memory_before = time.perf_counter(), self._memory()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            self._lap_peak = max(self._lap_peak, peak)
+            self._record(name, started, memory_before, peak, "section")
+
+    def cache(self, name: str, hit: bool):
+        if self.enabled:
+            counts = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def finish(self, **context) -> dict:
+        """The rerun's record (``None`` when disabled), also appended to the JSON-lines log."""
+        if not self.enabled:
+            return None
+        record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "total_ms": round((time.perf_counter() - self._started) * 1e3, 3), "traced_kb": round(self._memory() / 1024, 1), **self.context, **context, "sections": self.sections, "caches": self.caches}
+        self._release()
+        if self.log_path:
+            append_jsonl(self.log_path, record, self.max_log_bytes)
+        return record
@@ -0,0 +1,93 @@
+"""Stale-while-revalidate refresh of an expensive value (the published campaign dataset).
+
+``RefreshScheduler.get`` returns the last good value immediately. Once that value is older than
+``max_age`` (or ``is_stale`` says so), one background thread builds the next one; reruns that
+arrive meanwhile keep getting the current value and are counted as served stale. A finished build
+is swapped in atomically; a failed one leaves the last good value in place and is retried after
+``retry_after`` seconds. Only a caller asking for keys the current value does not cover yet (a
+dataset mode loaded for the first time) waits for a build, and concurrent waiters share it.
+"""
+import threading
+import time
+
+
+class RefreshScheduler:
+    def __init__(self, build, max_age: float = 3600.0, is_stale=None, retry_after: float = 60.0, clock=time.monotonic):
+        self._build, self._is_stale = build, is_stale or (lambda value: False)  # build(keys: frozenset) -> value
+        self.max_age, self.retry_after, self._clock = max_age, retry_after, clock
+        self._value, self._keys = None, frozenset()
+        self._built_at = self._failed_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # one build at a time, background or blocking
+        self.builds = self.failures = self.stale_serves = 0
+        self.last_build_s, self.last_error = None, None
+
+    @property
+    def value(self):
+        return self._value
+
+    def _stale(self, now) -> bool:
+        if self._failed_at is not None and now - self._failed_at < self.retry_after:
+            return False
+        return now - self._built_at >= self.max_age or self._is_stale(self._value)
+
+    def get(self, keys=()):
+        """Current value covering ``keys``; starts a background revalidation when it is stale."""
+        keys = frozenset(keys)
+        with self._lock:
+            if self._built_at is not None and keys <= self._keys:
+                in_flight = self._thread is not None
+                if not in_flight and self._stale(self._clock()):
+                    self._thread = threading.Thread(target=self._revalidate, name="dataset-refresh", daemon=True)
+                    self._thread.start()
+                    in_flight = True
+                self.stale_serves += in_flight
+                return self._value
+        return self._build_now(keys)
+
+    def _run(self, keys):
+        started = self._clock()
+        try:
+            value = self._build(keys)
+        except Exception as exc:
+            with self._lock:
+                self.failures += 1
+                self._failed_at, self.last_error = self._clock(), f"{type(exc).__name__}: {exc}"
+            raise
+        with self._lock:
+            self._value, self._keys, self._built_at, self._failed_at, self.last_error = value, keys, self._clock(), None, None
+            self.builds += 1
+            self.last_build_s = self._built_at - started
+        return value
+
+    def _build_now(self, keys):
+        with self._build_lock:
+            with self._lock:
+                if self._built_at is not None and keys <= self._keys:
+                    return self._value  # another caller's build already covered these keys
+                keys = keys | self._keys
+            return self._run(keys)
+
+    def _revalidate(self):
+        try:
+            with self._build_lock:
+                self._run(self._keys)
+        except Exception:
+            pass  # recorded in failures/last_error; the last good value keeps being served
+        finally:
+            with self._lock:
+                self._thread = None
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until an in-flight revalidation finishes; False on timeout."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def metrics(self) -> dict:
+        with self._lock:
+            now = self._clock()
+            return {"age_s": None if self._built_at is None else now - self._built_at, "last_build_s": self.last_build_s, "builds": self.builds, "failures": self.failures, "stale_serves": self.stale_serves, "refreshing": self._thread is not None, "last_error": self.last_error}
@@ -0,0 +1,76 @@
+"""Columnar schema for the campaign frames: fixed-order categorical dimensions and narrow measures."""
+import numpy as np
+import pandas as pd
+
+BRANDS_SKUS = {"Aashirvaad": ["Select Atta", "Multigrain Atta"], "Sunfeast": ["Dark Fantasy Choco Fills", "Mom's Magic Cashew"], "YiPPee!": ["Magic Masala Noodles", "Power Up Atta Noodles"], "Bingo!": ["Mad Angles", "Tedhe Medhe"], "B Natural": ["Mixed Fruit Juice", "Guava Juice"], "ITC Master Chef": ["Classic Aloo Tikki", "Chicken Nuggets"]}
+PLATFORMS = ["Blinkit", "Zepto", "Swiggy Instamart", "Flipkart", "Amazon"]
+CITIES = ["Mumbai", "Delhi", "Bangalore", "Hyderabad", "Kolkata"]
+DAYPARTS = ["Breakfast", "Lunch", "Snacks", "Dinner"]
+# Category order of Daypart is the order the ROAS heatmaps display, so pivots come out pre-sorted.
+DAYPART_ORDER = ["Breakfast", "Dinner", "Lunch", "Snacks"]
+COLUMNS = ["Date", "Brand", "SKU", "Platform", "City", "Daypart", "Spend", "Impressions", "Clicks", "Conversions", "Direct Sales", "ROAS", "Is OOS", "Content Score"]
+DIMENSIONS = ["Brand", "SKU", "Platform", "City", "Daypart"]
+MEASURE_DTYPES = {"Spend": np.float32, "Impressions": np.int32, "Clicks": np.int32, "Conversions": np.int32, "Direct Sales": np.float32, "ROAS": np.float32, "Is OOS": np.bool_, "Content Score": np.int8}
+LEGACY_DTYPES = {"Spend": np.float64, "Impressions": np.int64, "Clicks": np.int64, "Conversions": np.int64, "Direct Sales": np.float64, "ROAS": np.float64, "Is OOS": np.bool_, "Content Score": np.int64}
+
+
+def dimension_categories(brands_skus=BRANDS_SKUS, platforms=PLATFORMS, cities=CITIES) -> dict:
+    return {"Brand": list(brands_skus), "SKU": [sku for skus in brands_skus.values() for sku in skus], "Platform": list(platforms), "City": list(cities), "Daypart": list(DAYPART_ORDER)}
+
+
+def categorical(codes: np.ndarray, categories) -> pd.Categorical:
+    return pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype=object))
+
+
+def compact_frame(frame: pd.DataFrame, categories: dict = None) -> pd.DataFrame:
+    """Return ``frame`` with categorical dimensions and narrow measures. Columns already in schema are not copied.
+
+    Values missing from ``categories`` (e.g. new cities in an export) are appended after the known ones.
+    """
+    categories = categories or dimension_categories()
+    out = {}
+    for name in frame.columns:
+        col = frame[name]
+        if name in DIMENSIONS:
+            known = list(categories.get(name, []))
+            target = pd.CategoricalDtype(pd.Index(known, dtype=object))
+            if col.dtype == target and col.cat.categories.dtype == object:
+                out[name] = col
+                continue
+            seen = set(known)
+            extra = sorted(v for v in pd.unique(col.astype(object)) if v not in seen)
+            out[name] = col.astype(pd.CategoricalDtype(pd.Index(known + extra, dtype=object)) if extra else target)
+        elif name in MEASURE_DTYPES:
+            out[name] = col if col.dtype == MEASURE_DTYPES[name] else col.astype(MEASURE_DTYPES[name])
+        else:
+            out[name] = col
+    return pd.DataFrame(out, index=frame.index, copy=False)
+
+
+def legacy_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Inverse of ``compact_frame``: object-dtype dimensions and 64-bit measures, as the loop generator produced."""
+    out = {name: (frame[name].astype(object) if name in DIMENSIONS else frame[name].astype(LEGACY_DTYPES.get(name, frame[name].dtype))) for name in frame.columns}
+    return pd.DataFrame(out, index=frame.index)
+
+
+def bytes_per_row(frame: pd.DataFrame) -> float:
+    return frame.memory_usage(deep=True, index=False).sum() / max(len(frame), 1)
+
+
+def memory_report(frame: pd.DataFrame) -> dict:
+    before, after = bytes_per_row(legacy_frame(frame)), bytes_per_row(compact_frame(frame))
+    return {"rows": len(frame), "bytes_per_row_before": round(before, 1), "bytes_per_row_after": round(after, 1), "reduction": round(1 - after / before, 3) if before else 0.0}
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from kily.data_engine import DataScale, generate_campaign_data
+
+    parser = argparse.ArgumentParser(description="Report bytes per row of the campaign frames before/after compaction.")
+    parser.add_argument("--scale", default="", help="DataScale spec, e.g. days=365,extra_skus=8")
+    args = parser.parse_args()
+    for is_kily in (True, False):
+        report = memory_report(generate_campaign_data(is_kily, scale=DataScale.parse(args.scale)))
+        print(json.dumps({"mode": "kily" if is_kily else "baseline", **report}))
@@ -0,0 +1,218 @@
+"""Cross-process dataset serving through memory-mapped column files.
+
+A loader process builds the campaign windows once and publishes every column as a ``.npy`` file
+under ``<root>/v<version>/`` (tmpfs at ``/dev/shm`` by default), then atomically replaces
+``<root>/manifest.json`` to point at it. Dashboard processes attach with ``np.load(mmap_mode="r")``:
+each column is a read-only, zero-copy view of the same physical pages in every process, so memory
+no longer grows with the number of server processes. Categoricals are stored as their codes, with
+the categories in the manifest; string columns are stored the same way and decoded on attach.
+
+The artifacts derived from the frames are published next to them, so workers map them instead of
+each building a private copy: the day KPI cubes and their week/month rollups (cells, Date labels
+and SKU brands as arrays, the other labels in the manifest), the dimension indexes' code, position
+and offset arrays, and the anomaly findings.
+
+Handover: the loader keeps the newest ``keep`` versions on disk and deletes older ones. A process
+that attached an older version keeps its mappings (unlinking a mapped file does not unmap it), so
+sessions still reading it are not interrupted; they move to the new version on their next rerun.
+
+    python -m kily.shared_frames serve --root /dev/shm/kily --interval 300
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = "/dev/shm/kily" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "kily-shared")
+MANIFEST = "manifest.json"
+
+
+@dataclass(frozen=True)
+class SharedFrames:
+    version: int
+    label: str
+    frames: dict  # name -> DataFrame of read-only memory-mapped columns
+    cubes: dict = field(default_factory=dict)  # name -> {"D"/"W"/"M": KPICube over mapped cells}
+    indexes: dict = field(default_factory=dict)  # name -> DimensionIndex over mapped arrays
+    anomalies: dict = field(default_factory=dict)  # name -> findings DataFrame
+
+
+def _version_dir(version: int) -> str:
+    return f"v{version:06d}"
+
+
+def read_manifest(root: str):
+    """The current manifest, or None if nothing has been published under ``root`` yet."""
+    try:
+        with open(os.path.join(root, MANIFEST)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def _save(staging: str, file: str, values) -> str:
+    np.save(os.path.join(staging, file), np.ascontiguousarray(values), allow_pickle=False)
+    return file
+
+
+def _frame_entry(staging: str, prefix: str, frame: pd.DataFrame) -> dict:
+    columns = []
+    for i, column in enumerate(frame.columns):
+        col = frame[column]
+        entry = {"name": column, "file": f"{prefix}.{i}.npy", "categories": None}
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            values = col.cat.codes.to_numpy()
+            entry["categories"], entry["ordered"] = [str(c) for c in col.cat.categories], bool(col.cat.ordered)
+        elif pd.api.types.is_string_dtype(col.dtype) or col.dtype == object:
+            values, uniques = pd.factorize(col)
+            entry["categories"], entry["decode"] = [str(c) for c in uniques], True
+        else:
+            values = col.to_numpy()
+        _save(staging, entry["file"], values)
+        columns.append(entry)
+    return {"rows": len(frame), "columns": columns}
+
+
+def _cube_entry(staging: str, prefix: str, cube) -> dict:
+    return {
+        "labels": {axis: [str(label) for label in labels] for axis, labels in cube.labels.items() if axis != "Date"},
+        "dates": _save(staging, f"{prefix}.dates.npy", cube.labels["Date"].values), "brands": [str(brand) for brand in cube.brands],
+        "sku_brand": _save(staging, f"{prefix}.sku_brand.npy", cube.sku_brand),
+        "cells": {measure: _save(staging, f"{prefix}.{i}.npy", values) for i, (measure, values) in enumerate(cube.cells.items())},
+    }
+
+
+def _index_entry(staging: str, prefix: str, index) -> dict:
+    return {
+        "rows": index.n, "labels": {dim: labels.tolist() for dim, labels in index.labels.items()},
+        "arrays": {dim: {part: _save(staging, f"{prefix}.{i}.{part}.npy", values) for part, values in parts.items()} for i, (dim, parts) in enumerate(index.arrays().items())},
+    }
+
+
+def publish(frames: dict, root: str, label: str = "", keep: int = 2, cubes: dict = None, indexes: dict = None, anomalies: dict = None) -> int:
+    """Write ``frames`` (plus any cubes, indexes and findings derived from them) as version N + 1 and swap the manifest to it; returns the new version."""
+    os.makedirs(root, exist_ok=True)
+    previous = read_manifest(root)
+    version = (previous["version"] if previous else 0) + 1
+    staging = tempfile.mkdtemp(prefix=f"{_version_dir(version)}.", dir=root)
+    manifest = {
+        "version": version, "dir": _version_dir(version), "label": label,
+        "frames": {name: _frame_entry(staging, name, frame) for name, frame in frames.items()},
+        "cubes": {name: {freq: _cube_entry(staging, f"{name}.cube.{freq}", cube) for freq, cube in by_freq.items()} for name, by_freq in (cubes or {}).items()},
+        "indexes": {name: _index_entry(staging, f"{name}.index", index) for name, index in (indexes or {}).items()},
+        "anomalies": {name: _frame_entry(staging, f"{name}.anomalies", findings) for name, findings in (anomalies or {}).items()},
+    }
+    os.rename(staging, os.path.join(root, _version_dir(version)))
+    manifest["published"] = time.time()
+    tmp = os.path.join(root, f"{MANIFEST}.tmp")
+    with open(tmp, "w") as fh:
+        json.dump(manifest, fh)
+    os.replace(tmp, os.path.join(root, MANIFEST))
+    _expire(root, version - keep)
+    return version
+
+
+def _expire(root: str, newest_to_drop: int):
+    for entry in os.listdir(root):
+        if entry.startswith("v") and entry[1:7].isdigit() and int(entry[1:7]) <= newest_to_drop:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def _load(base: str, file: str) -> np.ndarray:
+    return np.load(os.path.join(base, file), mmap_mode="r", allow_pickle=False).view(np.ndarray)  # plain read-only view of the mapping
+
+
+def _attach_frame(base: str, entry: dict) -> pd.DataFrame:
+    columns = {}
+    for column in entry["columns"]:
+        values = _load(base, column["file"])
+        if column.get("decode"):
+            values = pd.Index(column["categories"]).take(values, allow_fill=True)
+        elif column["categories"] is not None:
+            dtype = pd.CategoricalDtype(pd.Index(column["categories"], dtype=object), ordered=column["ordered"])
+            values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        columns[column["name"]] = values
+    return pd.DataFrame(columns, index=pd.RangeIndex(entry["rows"]), copy=False)
+
+
+def _attach_cube(base: str, entry: dict):
+    from kily.cube import KPICube
+
+    labels = {"Date": pd.DatetimeIndex(_load(base, entry["dates"])), **{axis: pd.Index(values, dtype=object) for axis, values in entry["labels"].items()}}
+    return KPICube(labels, pd.Index(entry["brands"], dtype=object), _load(base, entry["sku_brand"]), {measure: _load(base, file) for measure, file in entry["cells"].items()})
+
+
+def _attach_index(base: str, entry: dict):
+    from kily.dim_index import DimensionIndex
+
+    return DimensionIndex.from_arrays(entry["rows"], entry["labels"], {dim: {part: _load(base, file) for part, file in parts.items()} for dim, parts in entry["arrays"].items()})
+
+
+def _attach_version(root: str, manifest: dict) -> SharedFrames:
+    base = os.path.join(root, manifest["dir"])
+    return SharedFrames(
+        manifest["version"], manifest["label"], {name: _attach_frame(base, entry) for name, entry in manifest["frames"].items()},
+        {name: {freq: _attach_cube(base, entry) for freq, entry in by_freq.items()} for name, by_freq in manifest.get("cubes", {}).items()},
+        {name: _attach_index(base, entry) for name, entry in manifest.get("indexes", {}).items()},
+        {name: _attach_frame(base, entry) for name, entry in manifest.get("anomalies", {}).items()},
+    )
+
+
+def attach(root: str, manifest: dict = None, retries: int = 3) -> SharedFrames:
+    """Map the current version's columns read-only. If a newer publish removes the version mid-attach, re-read the manifest and retry."""
+    manifest = manifest or read_manifest(root)
+    for attempt in range(retries + 1):
+        if manifest is None:
+            raise LookupError(f"No dataset has been published under {root}")
+        try:
+            return _attach_version(root, manifest)
+        except FileNotFoundError:
+            if attempt == retries:
+                raise
+            manifest = read_manifest(root)
+
+
+def serve(root: str, source, window_days: int, interval: float, keep: int = 2, once: bool = False):
+    """Loader loop: slide both campaign windows and publish a new version whenever either one changes."""
+    from kily.anomaly import detect
+    from kily.dim_index import DimensionIndex
+    from kily.incremental import ROLLUP_FREQS, RollingDataset
+
+    windows = {"kily": RollingDataset(source, True, window_days), "old": RollingDataset(source, False, window_days)}
+    published = None
+    while True:
+        for window in windows.values():
+            window.refresh()
+        label = " ".join(f"{name}@{window.version}" for name, window in windows.items())
+        if label != published:
+            started = time.perf_counter()
+            frames = {name: window.frame() for name, window in windows.items()}
+            cubes = {name: {freq: window.cube(freq) for freq in ("D",) + ROLLUP_FREQS} for name, window in windows.items()}
+            indexes = {name: DimensionIndex(frame) for name, frame in frames.items()}
+            anomalies = {name: detect(by_freq["D"]) for name, by_freq in cubes.items()}
+            version = publish(frames, root, label, keep, cubes=cubes, indexes=indexes, anomalies=anomalies)
+            published = label
+            print(json.dumps({"version": version, "label": label, "rows": sum(len(frame) for frame in frames.values()), "publish_s": round(time.perf_counter() - started, 3), "root": root}), flush=True)
+        if once:
+            return
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    from kily.data_engine import DEFAULT_SEED, DataScale
+    from kily.data_sources import source_from_env
+
+    parser = argparse.ArgumentParser(description="Build the campaign datasets once and serve them to every dashboard process through memory-mapped column files.")
+    parser.add_argument("command", choices=["serve", "publish"], help="serve: keep the windows current; publish: one version, then exit")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    parser.add_argument("--interval", type=float, default=300.0, help="seconds between window refreshes")
+    parser.add_argument("--keep", type=int, default=2, help="versions kept on disk for processes still attaching")
+    args = parser.parse_args()
+    seed, scale = int(os.environ.get("KILY_DATA_SEED", DEFAULT_SEED)), DataScale.parse(os.environ.get("KILY_DATA_SCALE", ""))
+    serve(args.root, source_from_env(seed=seed, scale=scale), scale.days, args.interval, args.keep, once=args.command == "publish")
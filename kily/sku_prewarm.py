@@ -0,0 +1,179 @@
+"""Per-SKU Deep-Dive artifacts, precomputed on a background thread pool into a bounded LRU.
+
+``SkuPrewarmer.prewarm`` hands a dataset version's plan to the pool: a worker builds what the
+per-SKU builds share (the dimension indexes) and queues one build per (mode, SKU). The page reads
+artifacts with ``get``, which is a dictionary lookup once the build has landed, waits on the
+in-flight build if a worker already has it, and builds inline otherwise, including when the
+worker's build failed. Entries of older dataset versions are dropped when a new version is
+prewarmed.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from kily.cube import KPICube
+from kily.dim_index import DimensionIndex
+from kily.figure_cache import downsample
+from kily.timeline import period_start, pick_resolution
+
+
+@dataclass(frozen=True)
+class SkuArtifacts:
+    brand: str
+    rows: int
+    content_score: float
+    dates: pd.DatetimeIndex
+    dayparts: pd.Index
+    roas_sum: np.ndarray  # Date x Daypart
+    roas_count: np.ndarray  # Date x Daypart
+    competitor: dict  # name, sku
+
+    def _window(self, start, end) -> slice:
+        return slice(self.dates.searchsorted(pd.Timestamp(start)), self.dates.searchsorted(pd.Timestamp(end), side="right"))
+
+    def roas_heatmap(self, start, end) -> pd.DataFrame:
+        """Mean ROAS over [start, end], Daypart x Brand."""
+        window = self._window(start, end)
+        sums, counts = self.roas_sum[window].sum(axis=0), self.roas_count[window].sum(axis=0)
+        roas = np.divide(sums, counts, out=np.zeros(len(counts)), where=counts > 0)
+        table = pd.DataFrame({self.brand: roas}, index=pd.Index(self.dayparts, name='Daypart')).rename_axis(columns='Brand')
+        return table[counts > 0]
+
+    def roas_trend(self, start, end, max_points: int):
+        """(Date, mean ROAS) per day, week or month of [start, end], whichever fits ``max_points`` (LTTB-thinned months
+        beyond that); returns (frame, resolution)."""
+        freq, window = pick_resolution(start, end, max_points), self._window(start, end)
+        sums = pd.DataFrame({"ROAS Sum": self.roas_sum[window].sum(axis=1), "ROAS Count": self.roas_count[window].sum(axis=1)}, index=period_start(self.dates[window], freq)).groupby(level=0).sum()
+        sums = sums[sums["ROAS Count"] > 0]
+        return downsample(pd.DataFrame({"Date": sums.index, "ROAS": (sums["ROAS Sum"] / sums["ROAS Count"]).to_numpy()}), "Date", "ROAS", max_points), freq
+
+
+def sku_artifacts(frame: pd.DataFrame, index: DimensionIndex, cube: KPICube, sku: str, competitor_mapping: dict) -> SkuArtifacts:
+    rows = index.take(frame, SKU=sku)
+    brand = str(rows['Brand'].iloc[0]) if len(rows) else ""
+    # The whole history is kept as Date x Daypart sums, so any date range is a slice and a sum.
+    sku_cube = cube.slice(SKU=sku)
+    roas_sum, (dates, dayparts) = sku_cube.reduce(("Date", "Daypart"), "ROAS Sum")
+    return SkuArtifacts(
+        brand, len(rows), float(rows['Content Score'].mean()), dates, dayparts,
+        roas_sum, sku_cube.reduce(("Date", "Daypart"), "ROAS Count")[0],
+        competitor_mapping.get(brand, {"name": "Competitor", "sku": "Generic SKU"}),
+    )
+
+
+class SkuPrewarmer:
+    """LRU of ``max_entries`` artifacts keyed by (dataset version, mode, SKU), filled by ``workers`` threads."""
+
+    def __init__(self, max_entries: int = 256, workers: int = 2):
+        self.max_entries = max_entries
+        self.hits = self.waits = self.misses = self.failures = 0
+        self._entries = OrderedDict()
+        self._pending = {}  # key -> Future
+        self._plan = None  # Future of the current version's plan
+        self._version = None
+        self._queued = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sku-prewarm")
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        """Dataset version last prewarmed."""
+        return self._version
+
+    def _store(self, key, value):
+        with self._lock:
+            self._pending.pop(key, None)
+            if key[0] != self._version:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _run(self, key, build):
+        try:
+            value = build()
+        except Exception:
+            with self._lock:
+                self._pending.pop(key, None)
+                self.failures += 1
+            raise
+        self._store(key, value)
+        return value
+
+    def _queue(self, version, plan):
+        try:
+            jobs = list(plan().items())[:self.max_entries]
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        with self._lock:
+            if version != self._version:
+                return
+            self._queued = len(jobs)
+            for (mode, sku), build in jobs:
+                key = (version, mode, sku)
+                self._pending[key] = self._pool.submit(self._run, key, build)
+
+    def prewarm(self, version, plan) -> bool:
+        """Run ``plan()`` -> {(mode, sku): build} for ``version`` on a worker and queue its builds, at most once per version; False if already prewarmed."""
+        with self._lock:
+            if version == self._version:
+                return False
+            self._version = version
+            self._entries = OrderedDict((key, value) for key, value in self._entries.items() if key[0] == version)
+            for future in [self._plan, *self._pending.values()]:
+                if future is not None:
+                    future.cancel()
+            self._pending, self._queued = {}, 0
+            self._plan = self._pool.submit(self._queue, version, plan)
+        return True
+
+    def get(self, key, build):
+        """Artifacts for ``key`` = (version, mode, sku): cached, awaited from a worker, or built here."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            future = self._pending.get(key)
+            if future is not None:
+                self.waits += 1
+            else:
+                self.misses += 1
+        if future is not None and not future.cancelled():
+            try:
+                return future.result()
+            except Exception:
+                pass  # counted in failures; build it here instead
+        value = build()
+        self._store(key, value)
+        return value
+
+    def shutdown(self, wait: bool = True):
+        """Cancel the queued builds and stop the worker threads; in-flight builds are awaited when ``wait``."""
+        with self._lock:
+            self._version = None
+            for future in [self._plan, *self._pending.values()]:
+                if future is not None:
+                    future.cancel()
+            self._pending, self._queued = {}, 0
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def progress(self):
+        """(ready, queued) for the current version."""
+        with self._lock:
+            return sum(1 for key in self._entries if key[0] == self._version), self._queued
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.waits + self.misses
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "waits": self.waits, "misses": self.misses, "failures": self.failures, "hit_rate": self.hits / lookups if lookups else 0.0}
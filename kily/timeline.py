@@ -0,0 +1,115 @@
+"""Date-range queries over day, week and month KPI cubes.
+
+Every cube in a ``cubes`` mapping ({"D": day cube, "W": week rollup, "M": month rollup}) shares the
+SKU/Platform/City/Daypart axes; rollup cubes label each Date cell with its period start (weeks start
+on Monday). A range query prunes the Date axis to the range and covers it with as few cells as
+possible: whole months, then whole weeks, then the leftover days at the edges. A two-year range
+therefore reduces ~24 month cells plus a few dozen week/day cells instead of 730 day cells.
+"""
+import numpy as np
+import pandas as pd
+
+from kily.cube import KPICube
+from kily.figure_cache import lttb
+
+RESOLUTIONS = ("D", "W", "M")  # finest first
+RESOLUTION_NAMES = {"D": "Daily", "W": "Weekly", "M": "Monthly"}
+
+
+def period_start(dates, freq: str) -> pd.DatetimeIndex:
+    """Start of the day/week/month period of every date."""
+    dates = pd.DatetimeIndex(dates).normalize()
+    if freq == "D":
+        return dates
+    if freq == "W":
+        return dates - pd.to_timedelta(dates.dayofweek, unit="D")
+    return dates - pd.to_timedelta(dates.day - 1, unit="D")
+
+
+def period_end(starts, freq: str) -> pd.DatetimeIndex:
+    """Last day of the periods beginning at ``starts``."""
+    starts = pd.DatetimeIndex(starts)
+    if freq == "D":
+        return starts
+    if freq == "W":
+        return starts + pd.Timedelta(days=6)
+    return starts + pd.to_timedelta(starts.days_in_month - 1, unit="D")
+
+
+def periods_between(start, end, freq: str) -> int:
+    """Number of (possibly partial) periods touched by [start, end]."""
+    starts = period_start([start, end], freq)
+    if freq == "D":
+        return (starts[1] - starts[0]).days + 1
+    if freq == "W":
+        return (starts[1] - starts[0]).days // 7 + 1
+    return (starts[1].year - starts[0].year) * 12 + starts[1].month - starts[0].month + 1
+
+
+def pick_resolution(start, end, max_points: int = 500) -> str:
+    """Finest resolution whose point count over [start, end] still fits ``max_points`` (month otherwise, and
+    ``trend`` then thins the months with LTTB)."""
+    for freq in RESOLUTIONS:
+        if periods_between(start, end, freq) <= max_points:
+            return freq
+    return RESOLUTIONS[-1]
+
+
+def rollup(cube: KPICube, freq: str) -> KPICube:
+    """Sum a day cube into week/month cells; for sources that do not maintain rollups incrementally."""
+    if freq == "D" or not len(cube.labels["Date"]):
+        return cube
+    starts = period_start(cube.labels["Date"], freq)
+    breaks = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    cells = {name: np.add.reduceat(values, breaks, axis=0, dtype=np.float64).astype(np.float32) for name, values in cube.cells.items()}
+    return KPICube(dict(cube.labels, Date=starts[breaks]), cube.brands, cube.sku_brand, cells)
+
+
+def covering_cube(cubes: dict, start, end, coarsest: str = "M") -> KPICube:
+    """Cube whose Date cells exactly cover [start, end], using periods no coarser than ``coarsest``."""
+    day = pd.Timedelta(days=1)
+    freqs = RESOLUTIONS[1:RESOLUTIONS.index(coarsest) + 1][::-1]
+    pieces = []
+
+    def cover(lo, hi, freqs):
+        if lo > hi:
+            return
+        if freqs:
+            first = period_start([lo - day], freqs[0])[0]
+            first = period_end([first], freqs[0])[0] + day  # first period starting on or after lo
+            last = period_start([hi + day], freqs[0])[0] - day  # last day of the last period ending on or before hi
+            if first <= last:
+                cover(lo, first - day, freqs[1:])
+                pieces.append(cubes[freqs[0]].between(first, last))
+                cover(last + day, hi, freqs[1:])
+                return
+            return cover(lo, hi, freqs[1:])
+        pieces.append(cubes["D"].between(lo, hi))
+
+    dates = cubes["D"].labels["Date"]
+    if len(dates):
+        cover(max(pd.Timestamp(start).normalize(), dates[0]), min(pd.Timestamp(end).normalize(), dates[-1]), freqs)
+    pieces = [piece for piece in pieces if len(piece.labels["Date"])]
+    if not pieces:
+        return cubes["D"].between(end=dates[0] - day if len(dates) else None)
+    return pieces[0] if len(pieces) == 1 else KPICube.concat(pieces)
+
+
+def trend(cubes: dict, start, end, measures, max_points: int = 500, **filters):
+    """Time series of ``measures`` over [start, end] at the finest resolution fitting ``max_points``.
+
+    Returns (frame indexed by period start, resolution). Edge periods only partly inside the range
+    sum the days that are inside it; ROAS is the row-weighted mean, as in ``KPICube.by``. When even
+    the months exceed ``max_points``, LTTB over the first measure keeps ``max_points`` of them.
+    """
+    freq = pick_resolution(start, end, max_points)
+    cube = covering_cube(cubes, start, end, coarsest=freq).slice(**filters)
+    additive = [measure for measure in measures if measure != "ROAS"] + ["ROAS Sum", "ROAS Count"]
+    sums = {measure: cube.reduce(("Date",), measure)[0] for measure in additive}
+    frame = pd.DataFrame(sums, index=period_start(cube.labels["Date"], freq)).groupby(level=0).sum()
+    frame["ROAS"] = frame["ROAS Sum"] / frame["ROAS Count"]
+    frame.index.name = "Date"
+    frame = frame.loc[frame["ROAS Count"] > 0, list(measures)]
+    if len(frame) > max_points:
+        frame = frame.iloc[lttb(frame.index, frame[measures[0]].to_numpy(), max_points)]
+    return frame, freq